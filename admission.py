@@ -0,0 +1,160 @@
+"""
+Admission Control for RL Decision Brain
+Per-environment token buckets and an in-flight limit in front of decide()
+
+Each environment has a token bucket refilled at `rate` requests/s up to
+`burst`; a request that finds its bucket empty is shed. Requests without a
+valid environment are charged to dev. Critical events (prod crash) that find
+the prod bucket empty borrow a token from stage, then dev, so they are only
+shed once every bucket is empty.
+
+With max_in_flight > 0, dev and stage requests are also shed while the
+process already has max_in_flight * (1 - reserve) requests in progress;
+other prod requests may use the reserved rest up to max_in_flight, and
+critical events are never shed for concurrency.
+
+A shed request gets a NOOP with "shed": true and a reason starting with
+"Load shed" instead of a decision. Budgets are per worker process:
+
+    RL_BRAIN_ADMISSION="dev=50:100,stage=100:200,prod=1000:2000"   (rate:burst)
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from rl_decision_brain import Environment
+
+# (environment, event_type) pairs shed only when no environment has capacity left
+CRITICAL_EVENTS = frozenset({("prod", "crash")})
+
+# Buckets a critical event may borrow from, in order, once its own is empty
+BORROW_ORDER = ("stage", "dev")
+
+ENVIRONMENTS = frozenset(environment.value for environment in Environment)
+
+RATE_SHED_REASONS = {environment: f"Load shed: {environment} over its admission budget"
+                     for environment in ENVIRONMENTS}
+
+def parse_budgets(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "env=rate:burst,..." (burst defaults to rate) into {env: (rate, burst)}; raises ValueError"""
+    budgets = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        environment, _, budget = item.partition("=")
+        environment = environment.strip().lower()
+        if environment not in ENVIRONMENTS:
+            raise ValueError(f"Unknown environment in admission budget: {environment!r}")
+        rate, _, burst = budget.partition(":")
+        rate = float(rate)
+        burst = float(burst) if burst else rate
+        if rate < 0 or burst < 1:
+            raise ValueError(f"Admission budget for {environment} needs rate >= 0 and burst >= 1")
+        budgets[environment] = (rate, burst)
+    return budgets
+
+class _Bucket:
+    __slots__ = ("lock", "rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        """Refill for the time elapsed since the last call, then take one token if available"""
+        with self.lock:
+            tokens = self.tokens + (now - self.updated) * self.rate
+            if tokens > self.burst:
+                tokens = self.burst
+            self.updated = now
+            if tokens >= 1.0:
+                self.tokens = tokens - 1.0
+                return True
+            self.tokens = tokens
+            return False
+
+class AdmissionController:
+    """Sheds low-priority requests first when a worker is over its request budget"""
+
+    def __init__(self, budgets: Dict[str, Tuple[float, float]], max_in_flight: int = 0,
+                 reserve: float = 0.25, critical: FrozenSet[Tuple[str, str]] = CRITICAL_EVENTS,
+                 on_shed: Optional[Callable[[str, str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """on_shed(environment, cause) is called for every shed request; cause is "rate" or "in_flight" """
+        now = clock()
+        self.buckets = {environment: _Bucket(rate, burst, now) for environment, (rate, burst) in budgets.items()}
+        self.max_in_flight = max_in_flight
+        # dev and stage stop here; the rest of the in-flight limit is kept for prod
+        self._soft_limit = max(1, int(max_in_flight * (1.0 - reserve))) if max_in_flight else 0
+        self.critical = critical
+        self.on_shed = on_shed
+        self.clock = clock
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self.shed: Dict[Tuple[str, str], int] = {}
+
+    def enter(self):
+        """Count one request in progress (pair with leave())"""
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @staticmethod
+    def classify(payload: Any) -> Tuple[str, str]:
+        """(environment, event_type) a request is charged to; invalid environments count as dev"""
+        environment = event_type = None
+        if isinstance(payload, dict):
+            environment, event_type = payload.get("environment"), payload.get("event_type")
+        environment = environment.lower() if isinstance(environment, str) else "dev"
+        if environment not in ENVIRONMENTS:
+            environment = "dev"
+        return environment, event_type.lower() if isinstance(event_type, str) else ""
+
+    def admit(self, payload: Any) -> Optional[str]:
+        """None if the request may be decided, otherwise the reason it is shed"""
+        environment, event_type = self.classify(payload)
+        critical = (environment, event_type) in self.critical
+
+        # in_flight includes this request (enter() runs first)
+        if self._soft_limit and not critical and \
+                self.in_flight > (self.max_in_flight if environment == "prod" else self._soft_limit):
+            return self._shed(environment, "in_flight",
+                              f"Load shed: {self.in_flight} requests in progress, {environment} deferred")
+
+        bucket = self.buckets.get(environment)
+        if bucket is None:
+            return None
+        now = self.clock()
+        if bucket.take(now):
+            return None
+        if critical:
+            for lender in BORROW_ORDER:
+                other = self.buckets.get(lender)
+                if other is None or other.take(now):
+                    return None
+        return self._shed(environment, "rate", RATE_SHED_REASONS[environment])
+
+    def _shed(self, environment: str, cause: str, reason: str) -> str:
+        key = (environment, cause)
+        with self._lock:
+            self.shed[key] = self.shed.get(key, 0) + 1
+        if self.on_shed:
+            self.on_shed(environment, cause)
+        return reason
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            shed = dict(self.shed)
+        return {
+            "in_flight": self.in_flight,
+            "shed": {f"{environment}/{cause}": count for (environment, cause), count in sorted(shed.items())},
+            "tokens": {environment: round(bucket.tokens, 3) for environment, bucket in self.buckets.items()},
+        }
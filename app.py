@@ -3,17 +3,288 @@ HTTP Service Wrapper for RL Decision Brain
 Stateless Flask service ready for Render deployment
 """
 
-from flask import Flask, request, jsonify
-from rl_decision_brain import RLDecisionBrain
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from rl_decision_brain import Environment
+from bootstrap import create_agent
+from response_cache import ResponseEncoder
+from request_schema import REQUEST_VALIDATOR
+from metrics import Metrics
+from event_feed import DecisionFeed, sse_stream
+from static_assets import StaticAsset
+import hmac
+import json
 import logging
 import os
+import threading
+import time
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Stateless agent instance (no state mutation)
-agent = RLDecisionBrain()
+def _policy_installed(table):
+    """Refresh label bounds for the new policy's event vocabulary"""
+    global KNOWN_EVENTS
+    KNOWN_EVENTS = set(table.event_ids)
+
+# Stateless agent instance (no state mutation), configured as in bootstrap.py:
+# RL_BRAIN_VALIDATION, and RL_BRAIN_POLICY / RL_BRAIN_RULES polled every
+# RL_BRAIN_POLICY_RELOAD_INTERVAL seconds; an invalid policy file at startup is fatal
+agent, policy_watcher = create_agent(on_install=_policy_installed)
+
+# Pre-encoded JSON templates for compiled decisions (only the timestamp varies)
+encoder = ResponseEncoder()
+
+# Server-side metrics; set RL_BRAIN_METRICS_DIR to aggregate across gunicorn workers
+metrics = Metrics(directory=os.environ.get('RL_BRAIN_METRICS_DIR'),
+                  flush_interval=float(os.environ.get('RL_BRAIN_METRICS_FLUSH_INTERVAL', 1.0)))
+metrics.describe("rl_brain_http_requests_total", "counter", "HTTP requests by route, method and status")
+metrics.describe("rl_brain_http_request_duration_seconds", "histogram", "HTTP request latency by route")
+metrics.describe("rl_brain_decisions_total", "counter", "Decisions by environment, event type and action")
+metrics.describe("rl_brain_safety_filtered_total", "counter", "Actions downgraded to NOOP by the safety filter")
+metrics.describe("rl_brain_validation_failures_total", "counter", "Requests refused with a validation NOOP")
+metrics.describe("rl_brain_event_subscribers_dropped_total", "counter", "/events streams dropped for falling behind")
+metrics.describe("rl_brain_log_records_dropped_total", "counter", "Structured log records dropped under backpressure")
+metrics.describe("rl_brain_audit_dropped_total", "counter", "Audit records dropped because the write queue was full")
+metrics.describe("rl_brain_coalesced_total", "counter", "Duplicate events folded into an open coalescing window")
+metrics.describe("rl_brain_shed_total", "counter", "Requests answered with a load-shed NOOP by admission control")
+metrics.describe("rl_brain_shadow_dropped_total", "counter", "Decisions not shadowed because the shadow queue was full")
+metrics.describe("rl_brain_cooldown_blocked_total", "counter", "Actions downgraded to NOOP by a per-target cooldown")
+
+# Live decision feed for /events (per process, bounded)
+feed = DecisionFeed(capacity=int(os.environ.get('EVENT_FEED_SIZE', 4096)),
+                    max_subscribers=int(os.environ.get('MAX_EVENT_SUBSCRIBERS', 32)))
+
+# Seconds an /events stream stays open before the browser reconnects; keep below the gunicorn timeout
+EVENTS_MAX_DURATION = float(os.environ.get('EVENTS_MAX_DURATION', 25.0))
+
+# Cleared by gunicorn.conf.py in sync workers, where an open stream would block /decide
+EVENTS_ENABLED = True
+
+# RL_BRAIN_LOG_MODE=async: sampled JSON-lines decision records written off the request thread
+# (RL_BRAIN_LOG_SAMPLE, e.g. "*=0.01,prod=1"); the default logs each request synchronously
+decision_log = None
+if os.environ.get('RL_BRAIN_LOG_MODE', 'sync') == 'async':
+    from decision_log import DecisionLogger, parse_sample_rates
+    decision_log = DecisionLogger(
+        sample_rates=parse_sample_rates(os.environ.get('RL_BRAIN_LOG_SAMPLE', '')),
+        queue_size=int(os.environ.get('RL_BRAIN_LOG_QUEUE', 10000)),
+        on_drop=lambda priority: metrics.inc("rl_brain_log_records_dropped_total",
+                                             (("priority", str(priority).lower()),)))
+
+# RL_BRAIN_AUDIT_DIR: append every decision to binary audit segments, queryable at /audit
+audit = None
+if os.environ.get('RL_BRAIN_AUDIT_DIR'):
+    from audit_log import AuditLog
+    audit = AuditLog(os.environ['RL_BRAIN_AUDIT_DIR'],
+                     segment_bytes=int(os.environ.get('RL_BRAIN_AUDIT_SEGMENT_BYTES', 64 << 20)),
+                     retain_segments=int(os.environ.get('RL_BRAIN_AUDIT_RETAIN', 0)),
+                     on_drop=lambda: metrics.inc("rl_brain_audit_dropped_total"))
+
+# RL_BRAIN_COALESCE_WINDOW > 0: identical (environment, event_type, target) events within
+# the window reuse the first decision, marked "coalesced" (/decide and /decide/stream)
+coalescer = None
+if float(os.environ.get('RL_BRAIN_COALESCE_WINDOW', 0)) > 0:
+    from coalesce import Coalescer
+    coalescer = Coalescer(float(os.environ['RL_BRAIN_COALESCE_WINDOW']),
+                          max_keys=int(os.environ.get('RL_BRAIN_COALESCE_MAX_KEYS', 10000)))
+
+# RL_BRAIN_COOLDOWNS ("restart=300,scale_up=60,...") and/or RL_BRAIN_FLIP_INTERVAL > 0 (seconds between
+# scale_up and scale_down): actions repeated too soon on the same target become "cooldown" NOOPs.
+# State is per process, or shared by every worker through RL_BRAIN_COOLDOWN_DB (SQLite)
+cooldown = None
+if os.environ.get('RL_BRAIN_COOLDOWNS') or float(os.environ.get('RL_BRAIN_FLIP_INTERVAL', 0)) > 0:
+    from cooldown import CooldownGate, MemoryCooldownStore, SQLiteCooldownStore, parse_cooldowns
+    if os.environ.get('RL_BRAIN_COOLDOWN_DB'):
+        cooldown_store = SQLiteCooldownStore(
+            os.environ['RL_BRAIN_COOLDOWN_DB'],
+            flush_interval=float(os.environ.get('RL_BRAIN_COOLDOWN_FLUSH_INTERVAL', 0.05)))
+    else:
+        cooldown_store = MemoryCooldownStore(max_keys=int(os.environ.get('RL_BRAIN_COOLDOWN_MAX_KEYS', 100000)))
+    cooldown = CooldownGate(parse_cooldowns(os.environ.get('RL_BRAIN_COOLDOWNS', '')),
+                            float(os.environ.get('RL_BRAIN_FLIP_INTERVAL', 0)), cooldown_store,
+                            on_block=lambda environment, action: metrics.inc(
+                                "rl_brain_cooldown_blocked_total", (("environment", environment), ("action", action))))
+
+# RL_BRAIN_FEATURES (e.g. "ewma" or "cpu_percent=ewma,error_rate=p90"): requests with a "target"
+# are decided on sliding-window statistics of that target's metrics instead of the raw snapshot;
+# RL_BRAIN_FEATURE_DIR keeps the windows across restarts
+feature_store = None
+FEATURES = {}
+if os.environ.get('RL_BRAIN_FEATURES'):
+    from feature_store import FeatureStore, parse_feature_spec
+    FEATURES = parse_feature_spec(os.environ['RL_BRAIN_FEATURES'])
+    feature_store = FeatureStore(window=int(os.environ.get('RL_BRAIN_FEATURE_WINDOW', 60)),
+                                 alpha=float(os.environ.get('RL_BRAIN_FEATURE_ALPHA', 0.3)),
+                                 max_targets=int(os.environ.get('RL_BRAIN_FEATURE_MAX_TARGETS', 10000)),
+                                 idle_ttl=float(os.environ.get('RL_BRAIN_FEATURE_IDLE_TTL', 3600)))
+    if os.environ.get('RL_BRAIN_FEATURE_DIR'):
+        feature_store.autosave(os.environ['RL_BRAIN_FEATURE_DIR'],
+                               float(os.environ.get('RL_BRAIN_FEATURE_SNAPSHOT_INTERVAL', 30)))
+
+def _features(payload):
+    """
+    payload with its target's windowed metrics when the feature store is enabled;
+    only called for requests that passed validation and admission, so rejected
+    ones never move a target's windows
+    """
+    if feature_store is None:
+        return payload
+    return feature_store.smooth(payload, FEATURES)
+
+# RL_BRAIN_SHADOW_POLICIES: candidate policy files ("name=path,...") decide the same
+# requests on a bounded background pool; agreement with the served decision at /shadow
+shadow = None
+if os.environ.get('RL_BRAIN_SHADOW_POLICIES'):
+    from shadow import ShadowEvaluator, load_candidates
+    shadow = ShadowEvaluator(agent, load_candidates(os.environ['RL_BRAIN_SHADOW_POLICIES'], agent),
+                             workers=int(os.environ.get('RL_BRAIN_SHADOW_WORKERS', 1)),
+                             queue_size=int(os.environ.get('RL_BRAIN_SHADOW_QUEUE', 10000)),
+                             on_drop=lambda: metrics.inc("rl_brain_shadow_dropped_total"))
+
+def _count_shed(environment, cause):
+    metrics.inc("rl_brain_shed_total", (("environment", environment), ("cause", cause)))
+
+# RL_BRAIN_ADMISSION ("env=rate:burst,...") and/or RL_BRAIN_MAX_IN_FLIGHT > 0: requests over
+# their environment's budget get a "shed" NOOP; prod crash is shed only when no bucket has capacity
+admission = None
+if os.environ.get('RL_BRAIN_ADMISSION') or int(os.environ.get('RL_BRAIN_MAX_IN_FLIGHT', 0)) > 0:
+    from admission import AdmissionController, parse_budgets
+    admission = AdmissionController(parse_budgets(os.environ.get('RL_BRAIN_ADMISSION', '')),
+                                    max_in_flight=int(os.environ.get('RL_BRAIN_MAX_IN_FLIGHT', 0)),
+                                    reserve=float(os.environ.get('RL_BRAIN_ADMISSION_RESERVE', 0.25)),
+                                    on_shed=_count_shed)
+
+# Routes whose requests count towards the admission in-flight limit
+ADMITTED_ROUTES = {'decide', 'decide_batch', 'decide_stream'}
+
+def _shed_response(payload, reason):
+    """Fast-path NOOP for a request refused by admission control"""
+    env = payload.get("environment") if isinstance(payload, dict) else None
+    response = agent._noop_response(reason, env.lower() if isinstance(env, str) else "unknown")
+    response["shed"] = True
+    return response
+
+# RL_BRAIN_STAGE_TIMING=1: per-stage /decide timings (parse, admission, validate, features,
+# decide, record, log, encode, total) in per-thread accumulators, reported at /admin/timings
+stage_timer = None
+if os.environ.get('RL_BRAIN_STAGE_TIMING', '0') not in ('', '0'):
+    from profiling import StageTimer
+    stage_timer = StageTimer()
+
+# RL_BRAIN_ADMIN_TOKEN enables /admin/* for requests sending "Authorization: Bearer <token>"
+ADMIN_TOKEN = os.environ.get('RL_BRAIN_ADMIN_TOKEN', '')
+
+# Upper bound on one /admin/profile run (seconds); keep below the gunicorn timeout
+MAX_PROFILE_SECONDS = float(os.environ.get('MAX_PROFILE_SECONDS', 25.0))
+
+# One sampling profile at a time per worker
+profile_lock = threading.Lock()
+
+def _resolve_cooled(payload):
+    """agent.resolve_valid() followed by the action cooldowns"""
+    response, shared = agent.resolve_valid(payload)
+    return cooldown.apply(payload, response, shared)
+
+def _resolve(payload, stages=None):
+    """
+    agent.resolve() as (payload, response, shared, valid), through the feature
+    store, the cooldowns and the coalescing window when enabled (folded
+    duplicates reuse the first decision); payload is the request as decided,
+    with windowed metrics. stages times validation and features separately
+    """
+    validation_error = agent._validate_request(payload)
+    if stages is not None:
+        stages.lap("validate")
+    if validation_error:
+        return payload, agent._invalid_response(payload, validation_error), False, False
+    if feature_store is not None:
+        payload = _features(payload)
+        if stages is not None:
+            stages.lap("features")
+    resolve_valid = agent.resolve_valid if cooldown is None else _resolve_cooled
+    if coalescer is not None:
+        return (payload,) + coalescer.resolve(payload, resolve_valid) + (True,)
+    return (payload,) + resolve_valid(payload) + (True,)
+
+# Upper bound on records returned by one /audit query
+MAX_AUDIT_LIMIT = int(os.environ.get('MAX_AUDIT_LIMIT', 10000))
+
+# Dashboard page, read and compressed on its first request
+dashboard = StaticAsset(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'home.html'), 'text/html')
+
+# Label values outside these sets are folded to keep metric cardinality bounded
+KNOWN_ENVIRONMENTS = {environment.value for environment in Environment}
+KNOWN_EVENTS = set(agent.event_types())
+
+# Upper bound on items accepted by /decide/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# Upper bound on a single NDJSON line accepted by /decide/stream (bytes)
+MAX_STREAM_LINE = int(os.environ.get('MAX_STREAM_LINE', 65536))
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.before_request
+def _enter_admission():
+    if admission is not None and request.endpoint in ADMITTED_ROUTES:
+        g.admission = admission
+        admission.enter()
+
+@app.teardown_request
+def _leave_admission(error):
+    # Runs after a streamed response has finished
+    controller = g.pop('admission', None)
+    if controller is not None:
+        controller.leave()
+
+@app.after_request
+def _record_request(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.inc("rl_brain_http_requests_total",
+                (("route", route), ("method", request.method), ("status", str(response.status_code))))
+    metrics.observe("rl_brain_http_request_duration_seconds", (("route", route),),
+                    time.perf_counter() - g.request_start)
+    return response
+
+def _record_decision(payload, response, timestamp, valid):
+    """Count, publish and (in async log mode) log one decision; valid: payload passed validation"""
+    event_type = payload.get("event_type") if isinstance(payload, dict) else None
+    event_type = event_type.lower() if isinstance(event_type, str) else None
+    valid = valid and response["environment"] in KNOWN_ENVIRONMENTS
+    if feed.subscribers:
+        feed.publish(event_type or "unknown", response, timestamp)
+    if decision_log is not None:
+        decision_log.decision(event_type, response, timestamp, valid)
+
+    if audit is not None:
+        audit.record(timestamp, event_type, response, payload.get("metrics") if valid else None, valid)
+    if not valid:
+        metrics.inc("rl_brain_validation_failures_total")
+        return
+
+    environment = response["environment"]
+    if shadow is not None and "coalesced" not in response:
+        shadow.submit(payload, response)
+    metrics.inc("rl_brain_decisions_total", (
+        ("environment", environment),
+        ("event_type", event_type if event_type in KNOWN_EVENTS else "other"),
+        ("action", response["action"]),
+    ))
+    if "coalesced" in response:
+        metrics.inc("rl_brain_coalesced_total", (("environment", environment),))
+    if response["safety_filtered"]:
+        metrics.inc("rl_brain_safety_filtered_total",
+                    (("environment", environment), ("proposed_action", response["proposed_action"])))
+
+def _log_error(route, error):
+    """Errors are always logged, through the async writer when it is enabled"""
+    if decision_log is not None:
+        decision_log.error(route, str(error))
+    else:
+        logger.error("Error processing %s request: %s", route, error)
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -43,20 +314,48 @@ def decide():
         "demo_frozen": true,
         "timestamp": float,
         "environment": str,
-        "safety_filtered": bool
+        "safety_filtered": bool,
+        "policy_version": str
     }
     """
     try:
-        payload = request.get_json(force=True)
-        logger.info(f"Decision request: {payload.get('environment', 'unknown')} - {payload.get('event_type', 'unknown')}")
+        stages = None if stage_timer is None else stage_timer.begin()
+        # Malformed JSON parses to None and is answered like any other invalid request
+        payload = request.get_json(force=True, silent=True)
+        if stages is not None:
+            stages.lap("parse")
+        if admission is not None:
+            reason = admission.admit(payload)
+            if stages is not None:
+                stages.lap("admission")
+            if reason is not None:
+                body = encoder.encode(_shed_response(payload, reason), False, time.time())
+                if stages is not None:
+                    stages.end()   # shed requests count in "total" too, so stage counts reconcile
+                return Response(body, status=200, mimetype='application/json')
+        payload, response, shared, valid = _resolve(payload, stages)
+        if stages is not None:
+            stages.lap("decide")
+        now = time.time()
+        _record_decision(payload, response, now, valid)
+        if stages is not None:
+            stages.lap("record")
         
-        response = agent.decide(payload)
-        logger.info(f"Decision response: {response['action']} - {response['reason']}")
+        if decision_log is None and logger.isEnabledFor(logging.INFO):
+            logger.info("Decision request: %s - %s", response['environment'],
+                        payload.get('event_type', 'unknown') if isinstance(payload, dict) else 'unknown')
+            logger.info("Decision response: %s - %s", response['action'], response['reason'])
+        if stages is not None:
+            stages.lap("log")
         
-        return jsonify(response), 200
+        body = encoder.encode(response, shared, now)
+        if stages is not None:
+            stages.lap("encode")
+            stages.end()
+        return Response(body, status=200, mimetype='application/json')
     
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        _log_error("/decide", e)
         return jsonify({
             "action": "noop",
             "reason": f"Internal error: {str(e)}",
@@ -66,249 +365,244 @@ def decide():
             "safety_filtered": False
         }), 500
 
+@app.route('/decide/batch', methods=['POST'])
+def decide_batch():
+    """
+    Batch decision endpoint
+
+    Request body: JSON array of /decide request objects
+    Response: JSON array of /decide responses, in request order
+
+    Invalid items produce a NOOP result for that item only.
+    """
+    try:
+        payload = request.get_json(force=True, silent=True)
+        if not isinstance(payload, list):
+            return jsonify(agent._noop_response("Batch request must be a JSON array", "unknown")), 400
+        if len(payload) > MAX_BATCH_SIZE:
+            return jsonify(agent._noop_response(f"Batch too large: {len(payload)} > {MAX_BATCH_SIZE}", "unknown")), 413
+
+        if decision_log is None:
+            logger.info("Batch decision request: %d items", len(payload))
+        errors = REQUEST_VALIDATOR.validate_batch(payload)
+        reasons = None if admission is None else [admission.admit(item) for item in payload]
+        if feature_store is not None:
+            payload = [_features(item) if error is None and (reasons is None or reasons[i] is None) else item
+                       for i, (item, error) in enumerate(zip(payload, errors))]
+        if admission is None:
+            results = agent.decide_batch(payload, errors)
+        else:
+            admitted = [i for i, reason in enumerate(reasons) if reason is None]
+            decided = iter(agent.decide_batch([payload[i] for i in admitted], [errors[i] for i in admitted]))
+            results = [next(decided) if reason is None else _shed_response(item, reason)
+                       for item, reason in zip(payload, reasons)]
+        if cooldown is not None:
+            results = [cooldown.apply(item, result, False)[0] for item, result in zip(payload, results)]
+        for item, result, error in zip(payload, results, errors):
+            if "shed" not in result:
+                _record_decision(item, result, result["timestamp"], error is None)
+        return jsonify(results), 200
+
+    except Exception as e:
+        _log_error("/decide/batch", e)
+        return jsonify({
+            "action": "noop",
+            "reason": f"Internal error: {str(e)}",
+            "demo_frozen": True,
+            "timestamp": 0,
+            "environment": "unknown",
+            "safety_filtered": False
+        }), 500
+
+@app.route('/decide/stream', methods=['POST'])
+def decide_stream():
+    """
+    Streaming decision endpoint
+
+    Request body: newline-delimited JSON, one /decide request object per line
+    Response: chunked NDJSON, one /decide response per non-blank input line
+
+    Lines are decided as they arrive and nothing is buffered beyond the
+    current line, so memory stays constant for any stream length. A
+    malformed line produces a NOOP line with its reason.
+    """
+    logger.info("Decision stream opened")
+    return Response(stream_with_context(_decision_stream(request.stream)), status=200,
+                    mimetype='application/x-ndjson')
+
+def _decision_stream(stream):
+    """Yield one encoded decision per NDJSON line read from stream"""
+    lines = 0
+    while True:
+        line = stream.readline(MAX_STREAM_LINE + 1)
+        if not line:
+            break
+
+        payload, valid = None, False
+        if len(line) > MAX_STREAM_LINE and not line.endswith(b"\n"):
+            # Discard the remainder of an oversized line without holding it
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(MAX_STREAM_LINE)
+            response, shared = agent._noop_response(f"Line exceeds {MAX_STREAM_LINE} bytes", "unknown"), False
+        else:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+                reason = None if admission is None else admission.admit(payload)
+                if reason is None:
+                    payload, response, shared, valid = _resolve(payload)
+                else:
+                    response, shared = _shed_response(payload, reason), False
+            except ValueError as e:
+                response, shared = agent._noop_response(f"Malformed JSON line: {str(e)}", "unknown"), False
+            except Exception as e:
+                response, shared = agent._noop_response(f"Invalid request: {str(e)}", "unknown"), False
+
+        lines += 1
+        now = time.time()
+        if "shed" not in response:
+            _record_decision(payload, response, now, valid)
+        yield encoder.encode(response, shared, now)
+
+    logger.info("Decision stream closed after %d lines", lines)
+
+@app.route('/events', methods=['GET'])
+def events():
+    """
+    Live decision feed (Server-Sent Events)
+
+    Events: "decision" (one decision), "summary" (counts when decisions
+    arrive faster than a dashboard should render them) and "dropped" (the
+    subscriber fell behind and must reconnect). Streams close after
+    EVENTS_MAX_DURATION seconds and resume from Last-Event-ID.
+    """
+    if not EVENTS_ENABLED:
+        return jsonify({"error": "Live feed needs threaded workers (gunicorn --threads)"}), 503
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if request.method == 'HEAD':
+        return Response(status=200, mimetype='text/event-stream', headers=headers)
+    subscription = feed.subscribe(request.headers.get('Last-Event-ID'))
+    if subscription is None:
+        return jsonify({"error": "Too many event subscribers"}), 503
+
+    def stream():
+        yield from sse_stream(subscription, max_duration=EVENTS_MAX_DURATION)
+        if subscription.lapped:
+            metrics.inc("rl_brain_event_subscribers_dropped_total")
+
+    response = Response(stream(), status=200, mimetype='text/event-stream', headers=headers)
+    # Frees the slot even when the body is never iterated (client gone before the first chunk)
+    response.call_on_close(subscription.close)
+    return response
+
+@app.route('/audit', methods=['GET'])
+def audit_query():
+    """
+    Query the decision audit log (requires RL_BRAIN_AUDIT_DIR)
+
+    Query parameters (all optional): start, end (unix seconds, inclusive),
+    environment, action, limit (default 1000). Returns the oldest matching
+    records first.
+    """
+    if audit is None:
+        return jsonify({"error": "Audit log is disabled (set RL_BRAIN_AUDIT_DIR)"}), 404
+    try:
+        start, end = (None if request.args.get(name) is None else float(request.args[name])
+                      for name in ('start', 'end'))
+        limit = int(request.args.get('limit', 1000))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {str(e)}"}), 400
+    if not 0 < limit <= MAX_AUDIT_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {MAX_AUDIT_LIMIT}"}), 400
+
+    records = audit.query(start, end, request.args.get('environment'), request.args.get('action'), limit)
+    return jsonify({"count": len(records), "records": records}), 200
+
+@app.route('/features', methods=['GET'])
+def features():
+    """Windowed statistics of one target (?environment=&target=), requires RL_BRAIN_FEATURES"""
+    if feature_store is None:
+        return jsonify({"error": "Feature store is disabled (set RL_BRAIN_FEATURES)"}), 404
+    environment, target = request.args.get('environment'), request.args.get('target')
+    if not environment or target is None:
+        return jsonify({"error": "environment and target are required"}), 400
+    window = feature_store.features(environment, target)
+    if window is None:
+        return jsonify({"error": f"No samples for {environment}/{target} in this worker"}), 404
+    return jsonify({"environment": environment.lower(), "target": target, "decided_on": FEATURES,
+                    "metrics": window}), 200
+
+@app.route('/shadow', methods=['GET'])
+def shadow_stats():
+    """Agreement of shadow candidate policies with the served decisions (requires RL_BRAIN_SHADOW_POLICIES)"""
+    if shadow is None:
+        return jsonify({"error": "Shadow evaluation is disabled (set RL_BRAIN_SHADOW_POLICIES)"}), 404
+    return jsonify(shadow.stats()), 200
+
+def _admin_denied():
+    """Error response unless the request carries the admin token (404 when none is configured)"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (set RL_BRAIN_ADMIN_TOKEN)"}), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                               f"Bearer {ADMIN_TOKEN}".encode()):
+        return jsonify({"error": "Unauthorized"}), 401, {'WWW-Authenticate': 'Bearer'}
+    return None
+
+@app.route('/admin/timings', methods=['GET'])
+def admin_timings():
+    """Per-stage /decide timings of this worker (requires RL_BRAIN_STAGE_TIMING)"""
+    denied = _admin_denied()
+    if denied:
+        return denied
+    if stage_timer is None:
+        return jsonify({"error": "Stage timing is disabled (set RL_BRAIN_STAGE_TIMING=1)"}), 404
+    return jsonify(stage_timer.snapshot()), 200
+
+@app.route('/admin/profile', methods=['POST'])
+def admin_profile():
+    """
+    Sample the stacks of this worker's other threads for ?seconds= (default 10)
+    every ?interval_ms= (default 5); returns collapsed stacks for flamegraph tools
+    """
+    denied = _admin_denied()
+    if denied:
+        return denied
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval_ms', 5)) / 1e3
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {str(e)}"}), 400
+    if not 0 < seconds <= MAX_PROFILE_SECONDS or not 0.001 <= interval <= 1.0:
+        return jsonify({"error": f"seconds must be in (0, {MAX_PROFILE_SECONDS}], "
+                                 "interval_ms between 1 and 1000"}), 400
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({"error": "A profile is already running in this worker"}), 409
+
+    from profiling import collapsed, sample_stacks
+    try:
+        logger.info("Sampling profile for %.1fs every %.1fms", seconds, interval * 1e3)
+        counts = sample_stacks(seconds, interval)
+    finally:
+        profile_lock.release()
+    return Response(collapsed(counts), status=200, mimetype='text/plain',
+                    headers={'X-Profile-Samples': str(sum(counts.values()))})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of request, decision and latency metrics"""
+    return Response(metrics.render(), status=200, mimetype='text/plain; version=0.0.4')
+
 @app.route('/scope', methods=['GET'])
 def scope():
     """Return action scope per environment"""
-    return jsonify({
-        "dev": ["noop", "scale_up", "scale_down", "restart"],
-        "stage": ["noop", "scale_up", "scale_down"],
-        "prod": ["noop", "restart"]
-    }), 200
+    return jsonify(agent.scope_listing()), 200
 
 @app.route('/', methods=['GET'])
 def home():
     """Advanced interactive dashboard"""
-    html = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>RL Decision Brain - Dashboard</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; padding: 20px; }
-        .container { max-width: 1200px; margin: 0 auto; }
-        .header { background: rgba(255,255,255,0.95); padding: 30px; border-radius: 15px; box-shadow: 0 10px 40px rgba(0,0,0,0.2); margin-bottom: 20px; }
-        .header h1 { color: #667eea; font-size: 32px; margin-bottom: 10px; }
-        .badges { display: flex; gap: 10px; flex-wrap: wrap; }
-        .badge { background: #10b981; color: white; padding: 8px 15px; border-radius: 20px; font-size: 14px; font-weight: bold; }
-        .badge.frozen { background: #3b82f6; }
-        .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; margin-bottom: 20px; }
-        .card { background: rgba(255,255,255,0.95); padding: 25px; border-radius: 15px; box-shadow: 0 5px 20px rgba(0,0,0,0.1); }
-        .card h3 { color: #667eea; margin-bottom: 15px; font-size: 18px; }
-        .metric { font-size: 36px; font-weight: bold; color: #333; margin: 10px 0; }
-        .label { color: #666; font-size: 14px; }
-        .test-panel { background: rgba(255,255,255,0.95); padding: 25px; border-radius: 15px; box-shadow: 0 5px 20px rgba(0,0,0,0.1); margin-bottom: 20px; }
-        .form-group { margin-bottom: 15px; }
-        label { display: block; color: #333; font-weight: 600; margin-bottom: 5px; }
-        select, input { width: 100%; padding: 12px; border: 2px solid #e5e7eb; border-radius: 8px; font-size: 14px; }
-        select:focus, input:focus { outline: none; border-color: #667eea; }
-        button { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border: none; padding: 12px 30px; border-radius: 8px; cursor: pointer; font-weight: bold; font-size: 16px; width: 100%; transition: transform 0.2s; }
-        button:hover { transform: translateY(-2px); }
-        button:active { transform: translateY(0); }
-        .response-box { background: #1e293b; color: #e2e8f0; padding: 20px; border-radius: 8px; margin-top: 20px; max-height: 400px; overflow-y: auto; }
-        .response-box pre { color: #94a3b8; font-size: 13px; white-space: pre-wrap; word-wrap: break-word; }
-        .scope-item { background: #f3f4f6; padding: 15px; border-radius: 8px; margin-bottom: 10px; }
-        .scope-item strong { color: #667eea; }
-        .actions { display: flex; flex-wrap: wrap; gap: 8px; margin-top: 8px; }
-        .action-tag { background: #667eea; color: white; padding: 5px 12px; border-radius: 5px; font-size: 12px; }
-        .log-item { background: #f9fafb; padding: 12px; border-left: 4px solid #667eea; margin-bottom: 10px; border-radius: 5px; }
-        .log-item.success { border-left-color: #10b981; }
-        .log-item.error { border-left-color: #ef4444; }
-        .log-time { color: #6b7280; font-size: 12px; }
-        @keyframes pulse { 0%, 100% { opacity: 1; } 50% { opacity: 0.5; } }
-        .loading { animation: pulse 1.5s infinite; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🧠 RL Decision Brain</h1>
-            <div class="badges">
-                <span class="badge" id="statusBadge">● HEALTHY</span>
-                <span class="badge frozen">❄️ DEMO-FROZEN</span>
-                <span class="badge" style="background: #8b5cf6;">🔒 STATELESS</span>
-            </div>
-        </div>
-
-        <div class="grid">
-            <div class="card">
-                <h3>📊 Total Requests</h3>
-                <div class="metric" id="totalRequests">0</div>
-                <div class="label">Since page load</div>
-            </div>
-            <div class="card">
-                <h3>⚡ Last Action</h3>
-                <div class="metric" id="lastAction">-</div>
-                <div class="label">Most recent decision</div>
-            </div>
-            <div class="card">
-                <h3>🎯 Success Rate</h3>
-                <div class="metric" id="successRate">100%</div>
-                <div class="label">API response rate</div>
-            </div>
-        </div>
-
-        <div class="test-panel">
-            <h3 style="color: #667eea; margin-bottom: 20px;">🧪 Test Decision Maker</h3>
-            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px;">
-                <div class="form-group">
-                    <label>Environment</label>
-                    <select id="environment">
-                        <option value="dev">DEV</option>
-                        <option value="stage">STAGE</option>
-                        <option value="prod">PROD</option>
-                    </select>
-                </div>
-                <div class="form-group">
-                    <label>Event Type</label>
-                    <select id="eventType">
-                        <option value="high_cpu">High CPU</option>
-                        <option value="high_memory">High Memory</option>
-                        <option value="crash">Crash</option>
-                        <option value="low_load">Low Load</option>
-                    </select>
-                </div>
-                <div class="form-group">
-                    <label>CPU %</label>
-                    <input type="number" id="cpu" value="85" min="0" max="100">
-                </div>
-                <div class="form-group">
-                    <label>Memory %</label>
-                    <input type="number" id="memory" value="50" min="0" max="100">
-                </div>
-            </div>
-            <button onclick="makeDecision()" id="testBtn">🚀 Get Decision</button>
-            <div class="response-box" id="responseBox" style="display: none;">
-                <pre id="response"></pre>
-            </div>
-        </div>
-
-        <div class="grid">
-            <div class="card">
-                <h3>🎯 Action Scope</h3>
-                <div class="scope-item">
-                    <strong>DEV</strong>
-                    <div class="actions">
-                        <span class="action-tag">noop</span>
-                        <span class="action-tag">scale_up</span>
-                        <span class="action-tag">scale_down</span>
-                        <span class="action-tag">restart</span>
-                    </div>
-                </div>
-                <div class="scope-item">
-                    <strong>STAGE</strong>
-                    <div class="actions">
-                        <span class="action-tag">noop</span>
-                        <span class="action-tag">scale_up</span>
-                        <span class="action-tag">scale_down</span>
-                    </div>
-                </div>
-                <div class="scope-item">
-                    <strong>PROD</strong>
-                    <div class="actions">
-                        <span class="action-tag">noop</span>
-                        <span class="action-tag">restart</span>
-                    </div>
-                </div>
-            </div>
-
-            <div class="card">
-                <h3>📝 Recent Activity</h3>
-                <div id="activityLog"></div>
-            </div>
-        </div>
-
-        <div style="text-align: center; margin-top: 30px; color: white;">
-            <a href="https://github.com/rityadani/rl-autonomous-decision-brain.py" style="color: white; text-decoration: none; font-weight: bold;">📦 View on GitHub</a>
-        </div>
-    </div>
-
-    <script>
-        let requestCount = 0;
-        let successCount = 0;
-
-        async function checkHealth() {
-            try {
-                const res = await fetch('/health');
-                const data = await res.json();
-                document.getElementById('statusBadge').textContent = data.status === 'healthy' ? '● HEALTHY' : '● ERROR';
-                document.getElementById('statusBadge').style.background = data.status === 'healthy' ? '#10b981' : '#ef4444';
-            } catch(e) {
-                document.getElementById('statusBadge').textContent = '● OFFLINE';
-                document.getElementById('statusBadge').style.background = '#ef4444';
-            }
-        }
-
-        async function makeDecision() {
-            const btn = document.getElementById('testBtn');
-            btn.textContent = '⏳ Processing...';
-            btn.classList.add('loading');
-            btn.disabled = true;
-
-            const payload = {
-                environment: document.getElementById('environment').value,
-                event_type: document.getElementById('eventType').value,
-                metrics: {
-                    cpu_percent: parseFloat(document.getElementById('cpu').value),
-                    memory_percent: parseFloat(document.getElementById('memory').value),
-                    error_rate: 0.01
-                }
-            };
-
-            try {
-                requestCount++;
-                const res = await fetch('/decide', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify(payload)
-                });
-                const data = await res.json();
-                
-                successCount++;
-                document.getElementById('responseBox').style.display = 'block';
-                document.getElementById('response').textContent = JSON.stringify(data, null, 2);
-                document.getElementById('totalRequests').textContent = requestCount;
-                document.getElementById('lastAction').textContent = data.action.toUpperCase();
-                document.getElementById('successRate').textContent = Math.round((successCount/requestCount)*100) + '%';
-                
-                addLog(data.action, data.reason, true);
-            } catch(e) {
-                requestCount++;
-                document.getElementById('responseBox').style.display = 'block';
-                document.getElementById('response').textContent = 'Error: ' + e.message;
-                document.getElementById('totalRequests').textContent = requestCount;
-                document.getElementById('successRate').textContent = Math.round((successCount/requestCount)*100) + '%';
-                
-                addLog('error', e.message, false);
-            } finally {
-                btn.textContent = '🚀 Get Decision';
-                btn.classList.remove('loading');
-                btn.disabled = false;
-            }
-        }
-
-        function addLog(action, reason, success) {
-            const log = document.getElementById('activityLog');
-            const time = new Date().toLocaleTimeString();
-            const item = document.createElement('div');
-            item.className = 'log-item ' + (success ? 'success' : 'error');
-            item.innerHTML = `
-                <div style="font-weight: bold; color: #333;">${action.toUpperCase()}</div>
-                <div style="font-size: 13px; color: #666; margin-top: 5px;">${reason}</div>
-                <div class="log-time">${time}</div>
-            `;
-            log.insertBefore(item, log.firstChild);
-            if(log.children.length > 5) log.removeChild(log.lastChild);
-        }
-
-        checkHealth();
-        setInterval(checkHealth, 5000);
-    </script>
-</body>
-</html>
-    '''
-    return html
+    return dashboard.serve(request)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
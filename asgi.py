@@ -0,0 +1,137 @@
+"""
+ASGI Service Wrapper for RL Decision Brain
+Asyncio alternative to app.py exposing the /decide, /health and /scope contract
+
+The agent is configured from the environment exactly as in app.py
+(RL_BRAIN_POLICY / RL_BRAIN_RULES / RL_BRAIN_VALIDATION, see bootstrap.py).
+
+Run (requires an ASGI server, e.g. `pip install uvicorn`):
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+or under gunicorn process management:
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+"""
+
+import json
+import logging
+import os
+import time
+
+from bootstrap import create_agent
+from response_cache import ResponseEncoder, dumps
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stateless agent instance (no state mutation), with the policy file polled when set
+agent, policy_watcher = create_agent()
+
+# Pre-encoded JSON templates for compiled decisions (only the timestamp varies)
+encoder = ResponseEncoder()
+
+# Upper bound on a /decide request body (bytes)
+MAX_BODY_SIZE = int(os.environ.get('MAX_BODY_SIZE', 1048576))
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+class BodyTooLarge(ValueError):
+    """Raised when a request body exceeds MAX_BODY_SIZE"""
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    path, method = scope["path"], scope["method"]
+    if path == "/decide":
+        if method != "POST":
+            await _send(send, 405, dumps({"error": "Method not allowed"}).encode())
+            return
+        result = await _decide(receive)
+        if result is None:
+            return   # client disconnected mid-body: nobody to answer
+        status, body = result
+    elif path == "/health" and method in ("GET", "HEAD"):
+        status, body = 200, dumps(agent.health_check()).encode()
+    elif path == "/scope" and method in ("GET", "HEAD"):
+        status, body = 200, dumps(agent.scope_listing()).encode()
+    else:
+        status, body = 404, dumps({"error": "Not found"}).encode()
+
+    await _send(send, status, body)
+
+async def _decide(receive):
+    """
+    Main decision endpoint: same request/response contract as app.py;
+    returns (status, body), or None if the client disconnected
+    """
+    try:
+        try:
+            raw = await _read_body(receive)
+        except BodyTooLarge as e:
+            return 413, dumps(agent._noop_response(str(e), "unknown")).encode()
+        except ConnectionError:
+            return None
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            payload = None   # answered like any other invalid request
+        response, shared = agent.resolve(payload)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Decision request: %s - %s", response['environment'],
+                        payload.get('event_type', 'unknown') if isinstance(payload, dict) else 'unknown')
+            logger.info("Decision response: %s - %s", response['action'], response['reason'])
+
+        return 200, encoder.encode(response, shared, time.time())
+
+    except Exception as e:
+        logger.error(f"Error processing request: {str(e)}")
+        return 500, dumps({
+            "action": "noop",
+            "reason": f"Internal error: {str(e)}",
+            "demo_frozen": True,
+            "timestamp": 0,
+            "environment": "unknown",
+            "safety_filtered": False,
+            "policy_version": agent.policy_info()["version"]
+        }).encode()
+
+async def _read_body(receive) -> bytes:
+    """Collect the request body, refusing anything over MAX_BODY_SIZE"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("Client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            raise BodyTooLarge(f"Request body exceeds {MAX_BODY_SIZE} bytes")
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+async def _send(send, status: int, body: bytes):
+    """Send a complete JSON response"""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": JSON_HEADERS + [(b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _lifespan(receive, send):
+    """Acknowledge server startup and shutdown"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            logger.info("RL Decision Brain (ASGI) started")
+            logger.info("Demo-frozen mode: Learning DISABLED, Exploration DISABLED")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
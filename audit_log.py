@@ -0,0 +1,335 @@
+"""
+Decision Audit Log for RL Decision Brain
+Append-only fixed-width binary records with rotation and indexed queries
+
+Record layout (28 bytes, little-endian, RECORD_DTYPE):
+    timestamp float64 | env_id uint8 | action_id uint8 | event_id uint16 |
+    flags uint8 | 3 pad bytes | cpu_percent float32 | memory_percent float32 |
+    error_rate float32
+
+Environment and action ids follow Environment / Action declaration order
+(255 = unknown environment). Event ids are per process and listed in each
+segment's .json sidecar (65535 = other). Missing metrics are NaN.
+
+Each worker process appends to its own segments (audit-<start>-<pid>-<n>.bin)
+and rotates them at segment_bytes. Every BLOCK_RECORDS records, the
+(min, max) timestamp of the block is appended to the segment's .idx file.
+Queries memory-map the segments read-only and only scan blocks whose range
+overlaps the requested time window.
+
+The request thread only appends a tuple to a bounded queue; a background
+thread packs and writes records, so the newest ~flush_interval seconds may
+not be visible to queries yet.
+"""
+
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from rl_decision_brain import Action, Environment
+
+RECORD = struct.Struct("<dBBHB3xfff")
+RECORD_DTYPE = np.dtype({
+    "names": ["timestamp", "env_id", "action_id", "event_id", "flags",
+              "cpu_percent", "memory_percent", "error_rate"],
+    "formats": ["<f8", "u1", "u1", "<u2", "u1", "<f4", "<f4", "<f4"],
+    "offsets": [0, 8, 9, 10, 12, 16, 20, 24],
+    "itemsize": RECORD.size,
+})
+INDEX_ENTRY = struct.Struct("<dd")
+BLOCK_RECORDS = 1024
+# Contiguous candidate blocks are scanned together, up to this many at a time
+SCAN_BLOCKS = 64
+
+ENVIRONMENTS = [environment.value for environment in Environment]
+ACTIONS = [action.value for action in Action]
+UNKNOWN_ENVIRONMENT = 255
+OTHER_EVENT = 0xFFFF
+
+FLAG_SAFETY_FILTERED = 1
+FLAG_INVALID = 2
+
+def _metric(metrics: Any, name: str) -> float:
+    value = metrics.get(name) if isinstance(metrics, dict) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+class AuditLog:
+    """Per-process writer and cross-process reader of decision audit segments"""
+
+    def __init__(self, directory: str, segment_bytes: int = 64 << 20, flush_interval: float = 0.2,
+                 max_pending: int = 100000, max_event_types: int = 4096, retain_segments: int = 0,
+                 on_drop: Optional[Callable[[], None]] = None):
+        """
+        retain_segments: keep at most this many of this process's segments (0 keeps all)
+        on_drop: called on the request thread when a record is dropped because the queue is full
+        """
+        self.directory = directory
+        self.segment_records = max(BLOCK_RECORDS, segment_bytes // RECORD.size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_event_types = max_event_types
+        self.retain_segments = retain_segments
+        self.on_drop = on_drop
+        self._env_ids = {env_str: env_id for env_id, env_str in enumerate(ENVIRONMENTS)}
+        self._action_ids = {action: action_id for action_id, action in enumerate(ACTIONS)}
+        os.makedirs(directory, exist_ok=True)
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Fresh queue, segments and writer (at construction and in a forked worker)"""
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._file = None
+        self._index = None
+        self._path: Optional[str] = None
+        self._segments: List[str] = []
+        self._segment_number = 0
+        self._started = int(time.time())
+        self._records = 0
+        self._block_min = self._block_max = 0.0
+        self._event_ids: Dict[str, int] = {}
+        self._event_names: List[str] = []
+        self._vocabulary_written = -1
+        self.dropped = 0
+
+    def record(self, timestamp: float, event_type: Optional[str], response: Mapping[str, Any],
+               metrics: Any, valid: bool = True) -> bool:
+        """Queue one decision for the audit log (request thread); False if dropped"""
+        if len(self._pending) >= self.max_pending:
+            with self._lock:
+                self.dropped += 1
+            if self.on_drop:
+                self.on_drop()
+            return False
+        self._pending.append((timestamp, response["environment"], event_type, response["action"],
+                              response["safety_filtered"], valid, metrics))
+        if self._writer is None:
+            self._start_writer()
+        return True
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="audit-log", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        stop = self._stop
+        while not stop.is_set():
+            if not self.flush():
+                stop.wait(self.flush_interval)
+
+    def _event_id(self, event_type: Optional[str]) -> int:
+        if event_type is None:
+            return OTHER_EVENT
+        event_id = self._event_ids.get(event_type)
+        if event_id is None:
+            if len(self._event_names) >= self.max_event_types:
+                return OTHER_EVENT
+            event_id = self._event_ids[event_type] = len(self._event_names)
+            self._event_names.append(event_type)
+        return event_id
+
+    def flush(self, max_records: int = 65536) -> int:
+        """Pack and write queued records (writer thread); returns how many were written"""
+        pending = self._pending
+        out = bytearray()
+        index = bytearray()
+        written = 0
+        while pending and written < max_records:
+            timestamp, env_str, event_type, action, filtered, valid, metrics = pending.popleft()
+            if self._file is None or self._records >= self.segment_records:
+                self._write(out, index)
+                out, index = bytearray(), bytearray()
+                self._rotate()
+
+            flags = (FLAG_SAFETY_FILTERED if filtered else 0) | (0 if valid else FLAG_INVALID)
+            out += RECORD.pack(timestamp, self._env_ids.get(env_str, UNKNOWN_ENVIRONMENT),
+                               self._action_ids[action], self._event_id(event_type), flags,
+                               _metric(metrics, "cpu_percent"), _metric(metrics, "memory_percent"),
+                               _metric(metrics, "error_rate"))
+
+            if self._records % BLOCK_RECORDS == 0:
+                self._block_min = self._block_max = timestamp
+            else:
+                self._block_min = min(self._block_min, timestamp)
+                self._block_max = max(self._block_max, timestamp)
+            self._records += 1
+            if self._records % BLOCK_RECORDS == 0:
+                index += INDEX_ENTRY.pack(self._block_min, self._block_max)
+            written += 1
+        self._write(out, index)
+        return written
+
+    def _write(self, out: bytearray, index: bytearray):
+        """Data first, then index entries, then the event vocabulary if it grew"""
+        if self._file is None:
+            return
+        if out:
+            self._file.write(out)
+            self._file.flush()
+        if index:
+            self._index.write(index)
+            self._index.flush()
+        if len(self._event_names) != self._vocabulary_written:
+            vocabulary_path = os.path.splitext(self._path)[0] + ".json"
+            with open(vocabulary_path + ".tmp", "w") as f:
+                json.dump({"event_types": self._event_names}, f)
+            os.replace(vocabulary_path + ".tmp", vocabulary_path)
+            self._vocabulary_written = len(self._event_names)
+
+    def _rotate(self):
+        """Close the current segment and start the next one"""
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+        base = os.path.join(self.directory, f"audit-{self._started}-{os.getpid()}-{self._segment_number:06d}")
+        self._path = base + ".bin"
+        self._file = open(self._path, "ab")
+        self._index = open(base + ".idx", "ab")
+        self._segments.append(base)
+        self._segment_number += 1
+        self._records = 0
+        self._vocabulary_written = -1
+
+        while self.retain_segments and len(self._segments) > self.retain_segments:
+            expired = self._segments.pop(0)
+            for suffix in (".bin", ".idx", ".json"):
+                try:
+                    os.remove(expired + suffix)
+                except OSError:
+                    pass
+
+    def close(self):
+        """Stop the writer thread and write everything still queued"""
+        self._stop.set()
+        writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join()
+        while self.flush():
+            pass
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+
+    def segments(self) -> List[str]:
+        """Segment data files of every process, oldest first"""
+        return sorted(glob.glob(os.path.join(self.directory, "audit-*.bin")))
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              environment: Optional[str] = None, action: Optional[str] = None,
+              limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Records with start <= timestamp <= end matching environment and action,
+        oldest first, at most limit of them
+        """
+        env_id = action_id = None
+        if environment is not None:
+            env_id = self._env_ids.get(environment, UNKNOWN_ENVIRONMENT)
+        if action is not None:
+            if action not in self._action_ids:
+                return []
+            action_id = self._action_ids[action]
+        low = -math.inf if start is None else start
+        high = math.inf if end is None else end
+
+        results = []
+        for path in self.segments():
+            matches = _scan_segment(path, low, high, env_id, action_id, limit)
+            if matches is not None:
+                results.append(matches)
+        if not results:
+            return []
+
+        rows = np.concatenate([matches for matches, _ in results])
+        names = np.concatenate([np.full(len(matches), i) for i, (matches, _) in enumerate(results)])
+        order = np.argsort(rows["timestamp"], kind="stable")[:limit]
+        return [_to_dict(rows[i], results[names[i]][1]) for i in order]
+
+def _scan_segment(path: str, low: float, high: float, env_id: Optional[int],
+                  action_id: Optional[int], limit: int):
+    """(matching rows, event names) for one segment, or None if nothing matches"""
+    try:
+        count = os.path.getsize(path) // RECORD.size
+    except OSError:
+        return None
+    if count == 0:
+        return None
+
+    base = os.path.splitext(path)[0]
+    try:
+        with open(base + ".idx", "rb") as f:
+            index = np.frombuffer(f.read(), dtype="<f8").reshape(-1, 2)
+    except OSError:
+        index = np.empty((0, 2))
+    # Indexed blocks overlapping the window, then the unindexed tail
+    blocks = np.nonzero((index[:, 1] >= low) & (index[:, 0] <= high))[0].tolist()
+    blocks += list(range(len(index), (count + BLOCK_RECORDS - 1) // BLOCK_RECORDS))
+    if not blocks:
+        return None
+
+    # Group candidate blocks into contiguous runs of at most SCAN_BLOCKS
+    runs = []
+    for block in blocks:
+        if runs and runs[-1][1] == block and runs[-1][1] - runs[-1][0] < SCAN_BLOCKS:
+            runs[-1][1] = block + 1
+        else:
+            runs.append([block, block + 1])
+
+    matches = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), count * RECORD.size, access=mmap.ACCESS_READ) as mm:
+        for first_block, end_block in runs:
+            first = first_block * BLOCK_RECORDS
+            rows = np.frombuffer(mm, dtype=RECORD_DTYPE, count=min(end_block * BLOCK_RECORDS, count) - first,
+                                 offset=first * RECORD.size)
+            mask = (rows["timestamp"] >= low) & (rows["timestamp"] <= high)
+            if env_id is not None:
+                mask &= rows["env_id"] == env_id
+            if action_id is not None:
+                mask &= rows["action_id"] == action_id
+            if mask.any():
+                matches.append(rows[mask])   # a copy: nothing keeps the mapping alive
+            del rows
+    if not matches:
+        return None
+
+    matches = np.concatenate(matches)
+    if len(matches) > limit:
+        matches = matches[np.argsort(matches["timestamp"], kind="stable")[:limit]]
+    try:
+        with open(base + ".json") as f:
+            event_names = json.load(f)["event_types"]
+    except (OSError, ValueError, KeyError):
+        event_names = []
+    return matches, event_names
+
+def _to_dict(row, event_names: List[str]) -> Dict[str, Any]:
+    env_id, action_id, event_id, flags = int(row["env_id"]), int(row["action_id"]), int(row["event_id"]), int(row["flags"])
+    return {
+        "timestamp": float(row["timestamp"]),
+        "environment": ENVIRONMENTS[env_id] if env_id < len(ENVIRONMENTS) else "unknown",
+        "event_type": event_names[event_id] if event_id < len(event_names) else "other",
+        "action": ACTIONS[action_id],
+        "safety_filtered": bool(flags & FLAG_SAFETY_FILTERED),
+        "valid": not flags & FLAG_INVALID,
+        "metrics": {
+            name: None if math.isnan(float(row[name])) else round(float(row[name]), 6)
+            for name in ("cpu_percent", "memory_percent", "error_rate")
+        },
+    }
@@ -0,0 +1,792 @@
+"""
+Performance Benchmarks for RL Decision Brain
+
+Comparisons:  python benchmark.py [name ...]
+Suite:        python benchmark.py --suite [--parts micro,routes,http] [--save FILE]
+              python benchmark.py --suite --compare FILE [--threshold 0.2]
+
+The suite measures engine calls, every Flask route through the test client
+and a local HTTP load run, reporting ops/s and p50/p95/p99 latency. --save
+writes the results as a JSON baseline; --compare exits non-zero when any
+gated metric regresses by more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from rl_decision_brain import Action, Environment, RLDecisionBrain
+
+SAMPLE_REQUESTS = [
+    {"environment": "dev", "event_type": "high_cpu",
+     "metrics": {"cpu_percent": 85.0, "memory_percent": 50.0, "error_rate": 0.01}},
+    {"environment": "prod", "event_type": "crash",
+     "metrics": {"cpu_percent": 10.0, "memory_percent": 20.0, "error_rate": 0.95}},
+    {"environment": "stage", "event_type": "high_memory",
+     "metrics": {"cpu_percent": 50.0, "memory_percent": 90.0, "error_rate": 0.02}},
+    {"environment": "prod", "event_type": "high_cpu",
+     "metrics": {"cpu_percent": 95.0, "memory_percent": 60.0, "error_rate": 0.01}},
+]
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(func: Callable[[], None]) -> Callable[[], None]:
+    """Register a benchmark under its function name"""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def make_batch(size: int) -> list:
+    """Build a batch cycling through the sample requests"""
+    return [SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)] for i in range(size)]
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> float:
+    """Return the best wall-clock time of several runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, seconds: float, items: int) -> None:
+    """Print throughput for one measurement"""
+    print(f"  {label:<32} {items / seconds:>12,.0f} decisions/s  ({seconds * 1e6 / items:.2f} us/decision)")
+
+
+@benchmark
+def batch():
+    """decide_batch vs N single decide() calls, in-process and over the Flask test client"""
+    from app import app
+
+    agent = RLDecisionBrain()
+    client = app.test_client()
+
+    for size in (10, 100, 1000):
+        requests = make_batch(size)
+        print(f"\nBatch size {size}")
+
+        report("engine: N x decide()", measure(lambda: [agent.decide(r) for r in requests]), size)
+        report("engine: decide_batch()", measure(lambda: agent.decide_batch(requests)), size)
+
+        report("http: N x POST /decide",
+               measure(lambda: [client.post('/decide', json=r) for r in requests], repeat=3), size)
+        report("http: POST /decide/batch",
+               measure(lambda: client.post('/decide/batch', json=requests), repeat=3), size)
+
+
+def legacy_decide(agent: RLDecisionBrain, request: dict) -> dict:
+    """Per-call decide() path before the compiled table: enum parse, map lookup, scope check, f-strings"""
+    validation_error = agent._validate_request(request)
+    if validation_error:
+        return agent._noop_response(validation_error, request.get("environment", "unknown"))
+
+    env_str = request["environment"].lower()
+    event_type = request["event_type"].lower()
+    try:
+        environment = Environment(env_str)
+    except ValueError:
+        return agent._noop_response(f"Invalid environment: {env_str}", env_str)
+
+    proposed_action = agent.DECISION_MAP.get((env_str, event_type), Action.NOOP)
+    if proposed_action not in agent.ACTION_SCOPE[environment]:
+        return {
+            "action": Action.NOOP.value,
+            "reason": f"Action {proposed_action.value} not allowed in {env_str}, downgraded to NOOP",
+            "demo_frozen": True,
+            "timestamp": time.time(),
+            "environment": env_str,
+            "safety_filtered": True,
+            "proposed_action": proposed_action.value
+        }
+    return {
+        "action": proposed_action.value,
+        "reason": f"Deterministic decision for {event_type} in {env_str}",
+        "demo_frozen": True,
+        "timestamp": time.time(),
+        "environment": env_str,
+        "safety_filtered": False
+    }
+
+
+@benchmark
+def table():
+    """Compiled decision table vs per-call enum parsing and reason formatting"""
+    agent = RLDecisionBrain()
+    requests = make_batch(10000)
+
+    report("legacy decide()", measure(lambda: [legacy_decide(agent, r) for r in requests]), len(requests))
+    report("compiled decide()", measure(lambda: [agent.decide(r) for r in requests]), len(requests))
+
+
+
+@benchmark
+def encode():
+    """Pre-encoded byte templates vs jsonify, serializer only and full /decide route"""
+    from flask import jsonify
+    from app import app
+    from response_cache import ResponseEncoder
+
+    agent = RLDecisionBrain()
+    encoder = ResponseEncoder()
+    requests = make_batch(10000)
+
+    def with_jsonify():
+        for r in requests:
+            jsonify(agent.decide(r)).get_data()
+
+    def with_templates():
+        for r in requests:
+            response, shared = agent.resolve(r)
+            encoder.encode(response, shared, time.time())
+
+    with app.app_context():
+        report("serialize: jsonify(decide())", measure(with_jsonify), len(requests))
+    report("serialize: encoder.encode()", measure(with_templates), len(requests))
+
+    client = app.test_client()
+    route_requests = requests[:2000]
+    report("route: POST /decide", measure(lambda: [client.post('/decide', json=r) for r in route_requests], repeat=3),
+           len(route_requests))
+
+
+
+@benchmark
+def concurrency():
+    """Flask under gunicorn sync and gthread workers vs asgi.py under uvicorn workers, local load generator"""
+    import importlib.util
+    from loadgen import free_port, run_load, serve
+
+    for module in ("gunicorn", "uvicorn"):
+        if importlib.util.find_spec(module) is None:
+            print(f"  skipped: {module} is not installed")
+            return
+
+    workers = "2"
+    servers = {
+        # gunicorn.conf.py makes workers gthread; a single thread is needed for real sync workers
+        "flask/gunicorn sync": ["gunicorn", "app:app", "-w", workers, "-k", "sync", "--threads", "1"],
+        "flask/gunicorn gthread": ["gunicorn", "app:app", "-w", workers],
+        "asgi/gunicorn uvicorn": ["gunicorn", "asgi:app", "-w", workers, "-k", "uvicorn.workers.UvicornWorker"],
+    }
+    scenarios = [
+        ("16 clients", 16, 0.0),
+        ("128 clients", 128, 0.0),
+        ("128 slow-body clients (50ms)", 128, 0.05),
+    ]
+
+    for label, command in servers.items():
+        port = free_port()
+        with serve(command + ["--bind", f"127.0.0.1:{port}"], port):
+            print(f"\n{label} ({workers} workers)")
+            for scenario, clients, slow_body in scenarios:
+                result = run_load(f"http://127.0.0.1:{port}/decide", concurrency=clients,
+                                  duration=3.0, slow_body=slow_body)
+                print(f"  {scenario:<36} {result['rps']:>9,.0f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+                      f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}")
+
+
+@benchmark
+def rules():
+    """Metric-aware rule policy: per-call evaluation vs vectorized batches"""
+    import numpy as np
+    from policy_rules import RulePolicy, rules_from_decision_map
+
+    rule_set = [
+        {"environment": "dev", "event_type": "high_cpu", "when": {"cpu_percent": [">", 80]}, "action": "scale_up"},
+        {"environment": "stage", "event_type": "high_cpu",
+         "when": {"cpu_percent": [">", 90], "error_rate": ["<", 0.5]}, "action": "scale_up"},
+    ] + rules_from_decision_map(RLDecisionBrain.DECISION_MAP)
+    policy = RulePolicy(rule_set)
+    agent = RLDecisionBrain(policy=policy)
+
+    requests = [dict(r, event_type="high_cpu", environment=r["environment"].replace("prod", "stage"))
+                for r in make_batch(10000)]
+    report("decide() per request", measure(lambda: [agent.decide(r) for r in requests]), len(requests))
+    report("decide_batch() vectorized", measure(lambda: agent.decide_batch(requests)), len(requests))
+
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    slots = np.zeros(n, dtype=np.intp)
+    values = np.column_stack([rng.uniform(0, 100, n), rng.uniform(0, 100, n), rng.random(n)])
+    report("evaluate_batch() on 1M-row matrix", measure(lambda: policy.evaluate_batch(slots, values), repeat=3), n)
+
+
+
+@benchmark
+def request_logging():
+    """Request-thread cost of synchronous logger.info vs the async sampled decision log"""
+    import logging
+    import os
+    import tempfile
+    from decision_log import DecisionLogger
+
+    agent = RLDecisionBrain()
+    requests = make_batch(20000)
+    resolved = [(r, agent.resolve(r)[0]) for r in requests]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_logger = logging.getLogger("benchmark.sync")
+        sync_logger.propagate = False
+        sync_logger.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+        sync_logger.addHandler(handler)
+        logging.disable(logging.NOTSET)
+
+        def sync_log():
+            for payload, response in resolved:
+                sync_logger.info("Decision request: %s - %s", payload["environment"], payload["event_type"])
+                sync_logger.info("Decision response: %s - %s", response["action"], response["reason"])
+
+        report("sync logger.info x2", measure(sync_log, repeat=3), len(resolved))
+        logging.disable(logging.INFO)
+        sync_logger.removeHandler(handler)
+        handler.close()
+
+        for rate in (1.0, 0.01):
+            with open(os.path.join(tmp, f"async-{rate}.log"), "w") as stream:
+                decision_log = DecisionLogger(stream=stream, sample_rates={"*": rate}, queue_size=100000)
+
+                def async_log():
+                    now = time.time()
+                    for payload, response in resolved:
+                        decision_log.decision(payload["event_type"], response, now)
+
+                report(f"async decision log (rate {rate})", measure(async_log, repeat=3), len(resolved))
+                decision_log.close()
+
+
+
+@benchmark
+def audit():
+    """Audit log: request-thread record() cost, then an indexed time-window query vs a full scan"""
+    import tempfile
+    from audit_log import AuditLog
+
+    agent = RLDecisionBrain()
+    resolved = [(r, agent.resolve(r)[0]) for r in make_batch(20000)]
+    n = 2_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp, max_pending=n)
+        start = time.perf_counter()
+        for i in range(n // len(resolved)):
+            now = 1e9 + i
+            for payload, response in resolved:
+                log.record(now, payload["event_type"], response, payload["metrics"])
+        report("record() on request thread", time.perf_counter() - start, n)
+
+        start = time.perf_counter()
+        log.close()
+        report("background pack + write", time.perf_counter() - start, n)
+
+        queries = [
+            ("query 1s window (indexed)", dict(start=1e9 + 50, end=1e9 + 50)),
+            ("query without window (full scan)", dict()),
+        ]
+        for label, window in queries:
+            seconds = measure(lambda: log.query(environment="prod", action="restart", limit=100, **window), repeat=3)
+            print(f"  {label:<32} {seconds * 1000:>12.2f} ms")
+
+
+def legacy_validate(request: dict):
+    """_validate_request before the compiled schema: presence and metrics-is-a-dict only"""
+    if not isinstance(request, dict):
+        return "Request must be a JSON object"
+    if "environment" not in request:
+        return "Missing required field: environment"
+    if "event_type" not in request:
+        return "Missing required field: event_type"
+    if "metrics" not in request:
+        return "Missing required field: metrics"
+    if not isinstance(request["metrics"], dict):
+        return "Field 'metrics' must be an object"
+    return None
+
+
+@benchmark
+def validation():
+    """Compiled request schema (typed, ranged) vs the presence-only validator it replaced"""
+    from request_schema import REQUEST_VALIDATOR
+
+    n = 200000
+    requests = make_batch(n)
+    invalid = [dict(r, metrics=dict(r["metrics"], cpu_percent="high", error_rate=2)) for r in requests]
+    report("legacy: presence checks", measure(lambda: [legacy_validate(r) for r in requests]), n)
+    report("compiled: validate()", measure(lambda: [REQUEST_VALIDATOR.validate(r) for r in requests]), n)
+    report("compiled: validate_batch()", measure(lambda: REQUEST_VALIDATOR.validate_batch(requests)), n)
+    report("compiled: validate() invalid", measure(lambda: [REQUEST_VALIDATOR.validate(r) for r in invalid]), n)
+    report("compiled: validate_all() invalid",
+           measure(lambda: [REQUEST_VALIDATOR.validate_all(r) for r in invalid]), n)
+
+
+@benchmark
+def sweep():
+    """What-if sweep of a rule policy: vectorized decision surface vs a decide() loop over the grid"""
+    import itertools
+    import numpy as np
+    from policy_rules import RulePolicy, rules_from_decision_map
+    from sweep import AXES, sweep as sweep_surface
+
+    rule_set = [
+        {"environment": "dev", "event_type": "high_cpu", "when": {"cpu_percent": [">", 80]}, "action": "scale_up"},
+        {"environment": "prod", "event_type": "crash", "when": {"error_rate": [">", 0.5]}, "action": "restart"},
+        {"environment": "prod", "event_type": "crash", "action": "noop"},
+    ] + rules_from_decision_map(RLDecisionBrain.DECISION_MAP)
+    agent = RLDecisionBrain(RulePolicy(rule_set))
+
+    axes = {axis: np.linspace(0, 1 if axis == "error_rate" else 100, 21) for axis in AXES}
+    points = [(env.value, event, dict(zip(AXES, values)))
+              for env in Environment for event in agent.event_types()
+              for values in itertools.product(*(axes[axis].tolist() for axis in AXES))]
+    report("decide() loop", measure(lambda: [agent.decide({"environment": env, "event_type": event, "metrics": m})
+                                             for env, event, m in points], repeat=1), len(points))
+    report("sweep() surface", measure(lambda: sweep_surface(agent._table, axes)), len(points))
+
+    axes = {axis: np.linspace(0, 1 if axis == "error_rate" else 100, 101) for axis in AXES}
+    n = len(Environment) * len(agent.event_types()) * 101 ** 3
+    report("sweep() surface, 101^3 grid", measure(lambda: sweep_surface(agent._table, axes), repeat=1), n)
+
+
+@benchmark
+def shadow():
+    """POST /decide latency with and without two shadow candidates evaluated on a background thread"""
+    import app as app_module
+    from policy_rules import RulePolicy, rules_from_decision_map
+    from shadow import ShadowEvaluator
+
+    client = app_module.app.test_client()
+    requests = make_batch(5000)
+    rule_set = [{"environment": "prod", "event_type": "crash", "when": {"error_rate": [">", 0.5]},
+                 "action": "restart"}] + rules_from_decision_map(RLDecisionBrain.DECISION_MAP)
+    candidates = {"builtin": RLDecisionBrain(), "rules": RLDecisionBrain(RulePolicy(rule_set))}
+
+    def line(label, stats):
+        print(f"  {label:<32} p50 {stats['p50_us']:8.1f} us  p99 {stats['p99_us']:8.1f} us")
+
+    line("no shadow", time_calls(lambda r: client.post('/decide', json=r), requests, warmup=500))
+    for label, queue_size in (("shadow, 1 pool thread", 10000), ("shadow, saturated queue", 0)):
+        app_module.shadow = ShadowEvaluator(app_module.agent, candidates, workers=1, queue_size=queue_size)
+        try:
+            line(label, time_calls(lambda r: client.post('/decide', json=r), requests, warmup=500))
+            stats = app_module.shadow.stats()
+            print(f"  {'':<32} evaluated {stats['candidates']['rules']['evaluated']}, "
+                  f"dropped {stats['queue']['dropped']}")
+        finally:
+            app_module.shadow.close()
+            app_module.shadow = None
+
+    evaluator = ShadowEvaluator(RLDecisionBrain(), candidates, workers=0, queue_size=len(requests))
+    resolved = [(r, evaluator.primary.decide(r)) for r in requests]
+    report("submit() on request thread", measure(lambda: [evaluator.submit(r, response) for r, response in resolved]
+                                                 and evaluator._queue.clear()), len(resolved))
+
+
+@benchmark
+def admission():
+    """Alert flood: cost of admit(), shed vs decided /decide, and prod crash outcomes under a dev flood"""
+    import app as app_module
+    from admission import AdmissionController, parse_budgets
+
+    n = 200000
+    requests = make_batch(n)
+    controller = AdmissionController(parse_budgets("dev=1e9:1e9,stage=1e9:1e9,prod=1e9:1e9"), max_in_flight=64)
+    report("admit() with tokens", measure(lambda: [controller.admit(r) for r in requests]), n)
+    controller = AdmissionController(parse_budgets("dev=0:1,stage=0:1,prod=0:1"))
+    report("admit() shedding", measure(lambda: [controller.admit(r) for r in requests]), n)
+
+    client = app_module.app.test_client()
+    dev = {"environment": "dev", "event_type": "high_cpu",
+           "metrics": {"cpu_percent": 85.0, "memory_percent": 50.0, "error_rate": 0.01}}
+    crash = SAMPLE_REQUESTS[1]
+    flood = [dev] * 19 + [crash]
+    report("POST /decide, no admission", measure(lambda: [client.post('/decide', json=r) for r in flood * 100],
+                                                 repeat=3), len(flood) * 100)
+    app_module.admission = AdmissionController(parse_budgets("dev=50:50,stage=50:50,prod=100:100"))
+    try:
+        outcomes = {}
+        start = time.perf_counter()
+        for r in flood * 100:
+            body = client.post('/decide', json=r).get_json()
+            key = f"{r['environment']}/{r['event_type']} {'shed' if body.get('shed') else body['action']}"
+            outcomes[key] = outcomes.get(key, 0) + 1
+        report("POST /decide, dev over budget", time.perf_counter() - start, len(flood) * 100)
+        print(f"  {'outcomes':<32} {outcomes}")
+    finally:
+        app_module.admission = None
+
+
+@benchmark
+def stage_timing():
+    """Per-stage /decide timing: lap() cost, and the route disabled vs enabled, with the breakdown"""
+    import app as app_module
+    from profiling import StageTimer
+
+    n = 200000
+    timer = StageTimer()
+
+    def laps():
+        for _ in range(n // 8):
+            stages = timer.begin()
+            for stage in ("parse", "validate", "decide", "record", "log", "encode", "admission"):
+                stages.lap(stage)
+            stages.end()
+    report("begin() + 7 x lap() + end()", measure(laps), n // 8)
+
+    client = app_module.app.test_client()
+    requests = make_batch(2000)
+    route = lambda: [client.post('/decide', json=r) for r in requests]
+    report("POST /decide, timing disabled", measure(route, repeat=3), len(requests))
+    app_module.stage_timer = StageTimer()
+    try:
+        report("POST /decide, timing enabled", measure(route, repeat=3), len(requests))
+        for stage, stats in app_module.stage_timer.snapshot()["stages"].items():
+            print(f"  {'  ' + stage:<32} mean {stats['mean_us']:8.2f} us  p99 <= {stats['p99_us']:8.2f} us")
+    finally:
+        app_module.stage_timer = None
+
+
+@benchmark
+def features():
+    """Feature store: smooth() per request by statistic, over 1k targets, and its /decide overhead"""
+    import app as app_module
+    from feature_store import FeatureStore, parse_feature_spec
+
+    n = 100000
+    requests = [dict(r, target=f"svc-{i % 1000}") for i, r in enumerate(make_batch(n))]
+    for spec in ("ewma", "max", "p90", "cpu_percent=ewma,memory_percent=p90,error_rate=max"):
+        store, spec_features = FeatureStore(), parse_feature_spec(spec)
+        report(f"smooth() {spec[:22]}", measure(lambda: [store.smooth(r, spec_features) for r in requests]), n)
+
+    client = app_module.app.test_client()
+    requests = requests[:2000]
+    route = lambda: [client.post('/decide', json=r) for r in requests]
+    report("POST /decide, store disabled", measure(route, repeat=3), len(requests))
+    app_module.feature_store, app_module.FEATURES = FeatureStore(), parse_feature_spec("ewma")
+    try:
+        report("POST /decide, ewma features", measure(route, repeat=3), len(requests))
+    finally:
+        app_module.feature_store, app_module.FEATURES = None, {}
+
+
+@benchmark
+def cooldown():
+    """Cooldown gate cost per decision: in-memory vs SQLite (WAL, batched writes) store, and via /decide"""
+    import os
+    import tempfile
+    import app as app_module
+    from cooldown import CooldownGate, MemoryCooldownStore, SQLiteCooldownStore
+
+    n = 50000
+    requests = [dict(r, target=f"svc-{i % 5000}") for i, r in enumerate(make_batch(n))]
+    decided = [app_module.agent.resolve(r) for r in requests]
+    client = app_module.app.test_client()
+    route = lambda: [client.post('/decide', json=r) for r in requests[:2000]]
+    report("POST /decide, cooldowns disabled", measure(route, repeat=3), 2000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [("memory", lambda: MemoryCooldownStore()),
+                  ("sqlite", lambda: SQLiteCooldownStore(os.path.join(tmp, f"cooldowns-{time.time_ns()}.db")))]
+        for name, make_store in stores:
+            # A fresh store per run: the first run of each target passes, the 10 s cooldown blocks repeats
+            gates = []
+
+            def gated():
+                gate = CooldownGate({"restart": 10.0, "scale_up": 10.0}, flip_interval=10.0, store=make_store())
+                gates.append(gate)
+                for request, (response, shared) in zip(requests, decided):
+                    gate.apply(request, response, shared)
+            report(f"apply() {name}", measure(gated, repeat=3), n)
+
+            app_module.cooldown = CooldownGate({"restart": 10.0, "scale_up": 10.0}, flip_interval=10.0,
+                                               store=make_store())
+            gates.append(app_module.cooldown)
+            try:
+                report(f"POST /decide, {name} store", measure(route, repeat=3), 2000)
+            finally:
+                app_module.cooldown = None
+            for gate in gates:
+                close = getattr(gate.store, "close", None)
+                if close:
+                    close()
+
+
+@benchmark
+def training():
+    """Offline training: transitions/s for JSONL parsing, tabular and linear fitted Q, one parser process"""
+    import json
+    import os
+    import random
+    import tempfile
+    from train_policy import read_transitions, train
+
+    n = 200000
+    rng = random.Random(0)
+    actions = {"dev": ["noop", "scale_up", "scale_down", "restart"], "stage": ["noop", "scale_up", "scale_down"],
+               "prod": ["noop", "restart"]}
+
+    def state():
+        request = dict(SAMPLE_REQUESTS[rng.randrange(len(SAMPLE_REQUESTS))])
+        request["metrics"] = {"cpu_percent": round(rng.uniform(0, 100), 2),
+                              "memory_percent": round(rng.uniform(0, 100), 2), "error_rate": round(rng.random(), 4)}
+        return request
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "transitions.jsonl")
+        with open(path, "w") as f:
+            for _ in range(n):
+                current = state()
+                f.write(json.dumps({"state": current, "action": rng.choice(actions[current["environment"]]),
+                                    "reward": round(rng.gauss(0, 1), 3), "next_state": state()}) + "\n")
+        print(f"  {n:,} transitions, {os.path.getsize(path) / n:.0f} bytes each")
+        report("parse (read_transitions)", measure(lambda: list(read_transitions([path], jobs=1)), repeat=1), n)
+        for kind in ("q_table", "linear"):
+            seconds = measure(lambda: train([path], os.path.join(tmp, f"{kind}.npy"), kind, jobs=1), repeat=1)
+            report(f"parse + train {kind}", seconds, n)
+
+
+@benchmark
+def uds():
+    """Unix socket binary protocol vs HTTP/JSON /decide on loopback, one caller, 1 server process each"""
+    import http.client
+    import importlib.util
+    import os
+    import subprocess
+    import tempfile
+    from loadgen import free_port, serve
+    from uds_server import DecisionSocketClient
+
+    n = 5000
+    requests = make_batch(n)
+    port = free_port()
+    if importlib.util.find_spec("gunicorn") is not None:
+        command = ["gunicorn", "app:app", "-w", "1", "--bind", f"127.0.0.1:{port}"]
+    else:
+        command = [sys.executable, "app.py"]
+
+    with serve(command, port, env={"PORT": str(port)}):
+        def http_calls():
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            for r in requests:
+                connection.request("POST", "/decide", json.dumps(r), {"Content-Type": "application/json"})
+                connection.getresponse().read()
+            connection.close()
+        report("http/json: POST /decide", measure(http_calls, repeat=3), n)
+
+    path = os.path.join(tempfile.mkdtemp(), "brain.sock")
+    server = subprocess.Popen([sys.executable, "uds_server.py", path],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 15
+        while not os.path.exists(path):
+            if server.poll() is not None or time.time() > deadline:
+                raise RuntimeError("uds_server.py did not start")
+            time.sleep(0.05)
+        items = [(r["environment"], r["event_type"], r["metrics"]) for r in requests]
+        with DecisionSocketClient(path) as client:
+            report("uds/binary: one at a time", measure(lambda: [client.decide(*item) for item in items], repeat=3), n)
+            for depth in (16, 256):
+                report(f"uds/binary: pipelined x{depth}",
+                       measure(lambda: client.decide_many(items, depth=depth), repeat=3), n)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# ---------------------------------------------------------------------------
+# Suite: latency percentiles, JSON baselines and regression gating
+# ---------------------------------------------------------------------------
+
+SUITE_PARTS: Dict[str, Callable[[], Dict[str, Dict[str, float]]]] = {}
+
+# Metrics compared by --compare: higher is better for ops_per_sec, lower for latencies
+GATED_METRICS = ("ops_per_sec", "p95_us")
+
+
+def suite_part(func: Callable[[], Dict[str, Dict[str, float]]]):
+    """Register a suite part under its function name without the suite_ prefix"""
+    SUITE_PARTS[func.__name__[len("suite_"):]] = func
+    return func
+
+
+def latency_stats(latencies_ns: List[int]) -> Dict[str, float]:
+    """ops/s and p50/p95/p99 (microseconds) from per-call durations"""
+    from loadgen import percentile
+
+    latencies = sorted(latencies_ns)
+    total = sum(latencies)
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": len(latencies) / (total / 1e9) if total else 0.0,
+        "p50_us": percentile(latencies, 50) / 1e3,
+        "p95_us": percentile(latencies, 95) / 1e3,
+        "p99_us": percentile(latencies, 99) / 1e3,
+    }
+
+
+def time_calls(func: Callable[[Any], object], args: List[Any], warmup: int = 1000) -> Dict[str, float]:
+    """Time func(arg) for every arg individually"""
+    for arg in args[:warmup]:
+        func(arg)
+    clock = time.perf_counter_ns
+    latencies = []
+    for arg in args:
+        start = clock()
+        func(arg)
+        latencies.append(clock() - start)
+    return latency_stats(latencies)
+
+
+@suite_part
+def suite_micro() -> Dict[str, Dict[str, float]]:
+    """Engine calls"""
+    agent = RLDecisionBrain()
+    requests = make_batch(50000)
+    batches = [make_batch(100)] * 500
+    return {
+        "micro.decide": time_calls(agent.decide, requests),
+        "micro.resolve": time_calls(agent.resolve, requests),
+        "micro.validate_request": time_calls(agent._validate_request, requests),
+        "micro.decide_batch_100": time_calls(agent.decide_batch, batches, warmup=50),
+    }
+
+
+@suite_part
+def suite_routes() -> Dict[str, Dict[str, float]]:
+    """Every Flask route through the in-process test client"""
+    from app import app
+
+    client = app.test_client()
+    batch_body = make_batch(100)
+    stream_body = "\n".join(json.dumps(r) for r in make_batch(100)) + "\n"
+    routes = {
+        "route.GET /": lambda _: client.get('/'),
+        "route.GET /health": lambda _: client.get('/health'),
+        "route.GET /scope": lambda _: client.get('/scope'),
+        "route.POST /decide": lambda r: client.post('/decide', json=r),
+        "route.POST /decide/batch": lambda _: client.post('/decide/batch', json=batch_body),
+        "route.POST /decide/stream": lambda _: client.post('/decide/stream', data=stream_body),
+    }
+    requests = make_batch(2000)
+    return {name: time_calls(call, requests, warmup=100) for name, call in routes.items()}
+
+
+@suite_part
+def suite_http() -> Dict[str, Dict[str, float]]:
+    """Local HTTP load run against app.py (gunicorn if installed, else the Flask dev server)"""
+    import importlib.util
+    from loadgen import free_port, run_load, serve
+
+    port = free_port()
+    if importlib.util.find_spec("gunicorn") is not None:
+        command = ["gunicorn", "app:app", "-w", "2", "--bind", f"127.0.0.1:{port}"]
+    else:
+        command = [sys.executable, "app.py"]
+
+    with serve(command, port, env={"PORT": str(port)}):
+        result = run_load(f"http://127.0.0.1:{port}/decide", concurrency=32, duration=5.0)
+    return {
+        "http.POST /decide": {
+            "calls": result["requests"],
+            "errors": result["errors"],
+            "ops_per_sec": result["rps"],
+            "p50_us": result["p50_ms"] * 1e3,
+            "p95_us": result["p95_ms"] * 1e3,
+            "p99_us": result["p99_ms"] * 1e3,
+        }
+    }
+
+
+def run_suite(parts: List[str]) -> Dict[str, Any]:
+    """Run the selected suite parts and return a baseline document"""
+    results: Dict[str, Dict[str, float]] = {}
+    for part in parts:
+        print(f"\n[{part}] {SUITE_PARTS[part].__doc__}")
+        part_results = SUITE_PARTS[part]()
+        for name, stats in part_results.items():
+            print(f"  {name:<28} {stats['ops_per_sec']:>12,.0f} ops/s  p50 {stats['p50_us']:9.2f} us  "
+                  f"p95 {stats['p95_us']:9.2f} us  p99 {stats['p99_us']:9.2f} us")
+        results.update(part_results)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.time(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a description of every gated metric that regressed beyond threshold"""
+    regressions = []
+    for name, base in baseline["results"].items():
+        stats = current["results"].get(name)
+        if stats is None:
+            continue
+        for metric in GATED_METRICS:
+            old, new = base[metric], stats[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if metric == "ops_per_sec" else change
+            if worse > threshold:
+                regressions.append(f"{name} {metric}: {old:,.2f} -> {new:,.2f} ({change:+.1%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description="RL Decision Brain benchmarks")
+    parser.add_argument("names", nargs="*", help=f"comparison benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--suite", action="store_true", help="run the percentile suite instead")
+    parser.add_argument("--parts", default=",".join(SUITE_PARTS), help="comma-separated suite parts")
+    parser.add_argument("--save", help="write suite results to this JSON baseline")
+    parser.add_argument("--compare", help="fail if results regress against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression for --compare (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RL Decision Brain - Benchmarks")
+    print("=" * 60)
+
+    if args.suite or args.save or args.compare:
+        parts = [part for part in args.parts.split(",") if part]
+        unknown = [part for part in parts if part not in SUITE_PARTS]
+        if unknown:
+            parser.error(f"unknown suite part(s): {', '.join(unknown)} (available: {', '.join(SUITE_PARTS)})")
+
+        current = run_suite(parts)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(current, f, indent=2)
+            print(f"\nSaved baseline to {args.save}")
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            regressions = compare(current, baseline, args.threshold)
+            if regressions:
+                print(f"\n[FAIL] {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+                for regression in regressions:
+                    print(f"  {regression}")
+                sys.exit(1)
+            print(f"\n[PASS] No regressions beyond {args.threshold:.0%} against {args.compare}")
+        sys.exit(0)
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+    for name in names:
+        print(f"\n[{name}] {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
@@ -0,0 +1,51 @@
+"""
+Agent Bootstrap for RL Decision Brain
+The environment-driven agent setup shared by app.py, asgi.py and uds_server.py
+
+    RL_BRAIN_VALIDATION=collect      list every schema violation of an invalid
+                                     request under "validation_errors"
+                                     (default fail_fast: the first only)
+    RL_BRAIN_POLICY                  versioned decision map or rule set (.json),
+                                     or frozen learned weights (.npy), replacing
+                                     DECISION_MAP (formats in policy_reload.py)
+    RL_BRAIN_RULES                   rule set (.json); set at most one of the two
+    RL_BRAIN_POLICY_RELOAD_INTERVAL  seconds between polls of the policy file
+                                     (default 2, 0 disables)
+
+Policy files are swapped in without blocking requests; an invalid file at
+startup is fatal (PolicyFileError).
+"""
+
+import os
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from rl_decision_brain import RLDecisionBrain
+
+if TYPE_CHECKING:
+    from policy_reload import PolicyWatcher
+
+def policy_path() -> Optional[str]:
+    """The policy file named by RL_BRAIN_RULES or RL_BRAIN_POLICY, if any"""
+    rules_path = os.environ.get('RL_BRAIN_RULES')
+    policy_path = os.environ.get('RL_BRAIN_POLICY')
+    if rules_path and policy_path:
+        raise RuntimeError("Set at most one of RL_BRAIN_RULES and RL_BRAIN_POLICY")
+    return rules_path or policy_path
+
+def create_agent(on_install: Optional[Callable] = None) -> Tuple[RLDecisionBrain, Optional["PolicyWatcher"]]:
+    """
+    The agent configured from the environment, with its policy file loaded
+    and polled; returns (agent, watcher), watcher None without a policy file
+    """
+    agent = RLDecisionBrain(collect_errors=os.environ.get('RL_BRAIN_VALIDATION', 'fail_fast') == 'collect')
+    path = policy_path()
+    if not path:
+        return agent, None
+
+    from policy_reload import PolicyWatcher
+    watcher = PolicyWatcher(agent, path, float(os.environ.get('RL_BRAIN_POLICY_RELOAD_INTERVAL', 2.0)),
+                            on_install=on_install)
+    watcher.reload()
+    if watcher.interval > 0:
+        watcher.start()
+    return agent, watcher
@@ -0,0 +1,100 @@
+"""
+Incident Storm Coalescing for RL Decision Brain
+Folds duplicate events within a time window into the first decision
+
+Events are keyed on (environment, event_type, target), where target is the
+optional "target" field of the request (e.g. a service id). The first event
+of a window is decided normally. Later events with the same key, until the
+window closes, get a copy of that decision with
+
+    "coalesced": true,
+    "coalesced_count": <events folded into this window so far>
+
+so an executor can act once per incident. Windows start at the first event
+and are not extended by later ones. With a metric-aware policy, folded
+events reuse the first event's decision regardless of their own metrics.
+
+State is split over lock-striped shards, each an insertion-ordered dict
+bounded to max_keys / shards entries; expired and oldest windows are
+evicted on insert.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from rl_decision_brain import Environment
+
+Key = Tuple[str, str, Optional[str]]
+Resolve = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], bool]]
+
+ENVIRONMENTS = frozenset(environment.value for environment in Environment)
+
+class _Shard:
+    __slots__ = ("lock", "windows")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [window start, first response, folded count]
+        self.windows: "OrderedDict[Key, list]" = OrderedDict()
+
+class Coalescer:
+    """Windowed de-duplication of identical events in front of RLDecisionBrain.resolve()"""
+
+    def __init__(self, window: float, max_keys: int = 10000, shards: int = 16):
+        self.window = window
+        self.shard_capacity = max(1, max_keys // shards)
+        self._shards = [_Shard() for _ in range(shards)]
+
+    @staticmethod
+    def key(payload: Any) -> Optional[Key]:
+        """Coalescing key of a well-formed request, or None if it is not coalesced"""
+        if not isinstance(payload, dict) or not isinstance(payload.get("metrics"), dict):
+            return None
+        environment, event_type = payload.get("environment"), payload.get("event_type")
+        if not isinstance(environment, str) or not isinstance(event_type, str):
+            return None
+        environment = environment.lower()
+        if environment not in ENVIRONMENTS:
+            return None
+        target = payload.get("target")
+        if isinstance(target, bool) or not isinstance(target, (str, int)):
+            target = None
+        return environment, event_type.lower(), None if target is None else str(target)
+
+    def resolve(self, payload: Any, resolve: Resolve,
+                now: Optional[float] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        (response, shared) for payload: resolve(payload) for the first event
+        of a window, a coalesced copy of that response afterwards
+        """
+        key = self.key(payload)
+        if key is None:
+            return resolve(payload)
+        now = time.monotonic() if now is None else now
+
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            windows = shard.windows
+            entry = windows.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[2] += 1
+                response = entry[1].copy()
+                response["coalesced"] = True
+                response["coalesced_count"] = entry[2]
+                return response, False
+
+            # Decided under the shard lock so each window has exactly one real decision
+            response, shared = resolve(payload)
+            windows[key] = [now, response if shared else response.copy(), 0]
+            windows.move_to_end(key)
+            while windows:
+                oldest = next(iter(windows.values()))
+                if len(windows) <= self.shard_capacity and now - oldest[0] < self.window:
+                    break
+                windows.popitem(last=False)
+            return response, shared
+
+    def __len__(self) -> int:
+        return sum(len(shard.windows) for shard in self._shards)
@@ -0,0 +1,136 @@
+"""
+Cold Start Measurement for RL Decision Brain
+Time from process start to the first /decide response, and worker memory sharing
+
+Run: python coldstart.py [--runs 5] [--workers 2]
+
+in-process: a fresh interpreter imports app.py and answers /decide through
+            the Flask test client (import time, then first response)
+gunicorn:   spawn-to-first-response over HTTP, with every worker importing
+            the app itself vs gunicorn.conf.py (preload + gc.freeze), plus the
+            proportional set size (PSS) of master and workers on Linux
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+from loadgen import free_port
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+REQUEST = {"environment": "prod", "event_type": "crash",
+           "metrics": {"cpu_percent": 10.0, "memory_percent": 20.0, "error_rate": 0.95}}
+
+IN_PROCESS = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.post('/decide', json=%r)
+decided = time.perf_counter()
+client.get('/')
+print(json.dumps({"import_ms": (imported - start) * 1e3, "first_decide_ms": (decided - start) * 1e3,
+                  "first_dashboard_ms": (time.perf_counter() - start) * 1e3}))
+""" % (REQUEST,)
+
+def in_process(runs: int) -> Dict[str, float]:
+    """Median import and first-response times in fresh interpreters"""
+    samples: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        # Request logging goes to stderr, the timings to stdout
+        output = subprocess.run([sys.executable, "-c", IN_PROCESS], cwd=HERE, check=True,
+                                capture_output=True, text=True).stdout
+        for name, value in json.loads(output).items():
+            samples.setdefault(name, []).append(value)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+def pss_kb(pid: int) -> Optional[int]:
+    """Proportional set size of one process (Linux), counting shared pages once across sharers"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+def children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+def gunicorn_start(config: str, workers: int, runs: int) -> Dict[str, float]:
+    """Median spawn-to-first-/decide time and total PSS once every worker has answered"""
+    body = json.dumps(REQUEST).encode()
+    first, total_pss = [], []
+    for _ in range(runs):
+        port = free_port()
+        start = time.perf_counter()
+        process = subprocess.Popen(["gunicorn", "-c", config, "-w", str(workers),
+                                    "--bind", f"127.0.0.1:{port}", "app:app"],
+                                   cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   env=dict(os.environ, RL_BRAIN_LOG_MODE="async"))
+        try:
+            deadline = start + 30
+            while True:
+                try:
+                    request = urllib.request.Request(f"http://127.0.0.1:{port}/decide", data=body,
+                                                     headers={"Content-Type": "application/json"})
+                    urllib.request.urlopen(request, timeout=2).read()
+                    break
+                except OSError:
+                    if process.poll() is not None or time.perf_counter() > deadline:
+                        raise RuntimeError(f"gunicorn did not start with {config}")
+                    time.sleep(0.005)
+            first.append((time.perf_counter() - start) * 1e3)
+
+            # Let every worker finish booting and serve a few requests before sampling memory
+            time.sleep(1.0)
+            for _ in range(50):
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2).read()
+            sizes = [pss_kb(pid) for pid in [process.pid] + children(process.pid)]
+            if None not in sizes:
+                total_pss.append(sum(sizes) / 1024)
+        finally:
+            process.terminate()
+            process.wait()
+    result = {"first_decide_ms": statistics.median(first)}
+    if total_pss:
+        result["total_pss_mb"] = statistics.median(total_pss)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import-to-first-response time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    print("in-process (median of %d)" % args.runs)
+    for name, value in in_process(args.runs).items():
+        print(f"  {name:<24} {value:8.1f} ms")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write("# per-worker import, default gc\n")
+        plain_config = f.name
+    try:
+        for label, config in (("gunicorn, no preload", plain_config),
+                              ("gunicorn.conf.py", os.path.join(HERE, "gunicorn.conf.py"))):
+            result = gunicorn_start(config, args.workers, args.runs)
+            line = f"  {label:<24} first /decide {result['first_decide_ms']:8.1f} ms"
+            if "total_pss_mb" in result:
+                line += f"   PSS master+{args.workers} workers {result['total_pss_mb']:6.1f} MB"
+            print(line)
+    finally:
+        os.unlink(plain_config)
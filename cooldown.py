@@ -0,0 +1,323 @@
+"""
+Action Cooldowns for RL Decision Brain
+Per-target anti-flapping applied after the ACTION_SCOPE safety filter
+
+A decided action is checked against the actions recently taken on the same
+(environment, target) - target is the optional "target" field of a request,
+e.g. a service id; requests without one share the environment-wide target
+"*". An action is blocked, and the decision downgraded to NOOP with
+"cooldown": true, "proposed_action" and a reason starting with "Cooldown",
+while either
+
+    the same action was taken less than its cooldown ago
+    (RL_BRAIN_COOLDOWNS="restart=300,scale_up=60,scale_down=120"), or
+    the opposite action (scale_up <-> scale_down) was taken less than
+    flip_interval ago (RL_BRAIN_FLIP_INTERVAL=300).
+
+Only actions that pass are recorded, so a blocked action does not extend
+its own cooldown. NOOP is never blocked.
+
+Two stores keep the last time of each action per target:
+
+    MemoryCooldownStore  lock-striped LRU dicts, per process
+    SQLiteCooldownStore  one SQLite file in WAL mode shared by every worker;
+                         reads go to the database, writes are batched by a
+                         background thread every flush_interval seconds
+
+With SQLite, two workers deciding the same action for the same target within
+one flush interval may both let it through.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from rl_decision_brain import Action
+
+# Actions that undo each other, held apart by flip_interval
+OPPOSITES = {Action.SCALE_UP.value: Action.SCALE_DOWN.value, Action.SCALE_DOWN.value: Action.SCALE_UP.value}
+
+# Target of requests without a "target" field
+ANY_TARGET = "*"
+
+Key = Tuple[str, str]
+# (earlier action that blocks, minimum seconds since it) pairs checked for an action
+Rules = Tuple[Tuple[str, float], ...]
+# (blocking action, minimum seconds, seconds since it was taken)
+Blocked = Tuple[str, float, float]
+
+def parse_cooldowns(spec: str) -> Dict[str, float]:
+    """Parse "action=seconds,..." into {action: seconds}; raises ValueError"""
+    actions = {action.value for action in Action if action is not Action.NOOP}
+    cooldowns = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        action, _, seconds = item.partition("=")
+        action = action.strip().lower()
+        if action not in actions:
+            raise ValueError(f"Unknown action in cooldowns: {action!r} (expected one of {', '.join(sorted(actions))})")
+        seconds = float(seconds)
+        if seconds < 0:
+            raise ValueError(f"Cooldown for {action} must not be negative")
+        cooldowns[action] = seconds
+    return cooldowns
+
+def _blocked(times: Dict[str, float], rules: Rules, now: float) -> Optional[Blocked]:
+    for other, seconds in rules:
+        last = times.get(other)
+        if last is not None and now - last < seconds:
+            return other, seconds, now - last
+    return None
+
+class _Shard:
+    __slots__ = ("lock", "targets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> {action: last time taken}
+        self.targets: "OrderedDict[Key, Dict[str, float]]" = OrderedDict()
+
+class MemoryCooldownStore:
+    """Per-process cooldown state in lock-striped shards, each an LRU of max_keys / shards targets"""
+
+    def __init__(self, max_keys: int = 100000, shards: int = 16):
+        self.shard_capacity = max(1, max_keys // shards)
+        self.horizon = 0.0
+        self._shards = [_Shard() for _ in range(shards)]
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A lock held by another thread of the parent at fork time would never be released
+        for shard in self._shards:
+            shard.lock = threading.Lock()
+
+    def retain(self, seconds: float):
+        """Keep a target's state for at least seconds after its last action"""
+        self.horizon = max(self.horizon, seconds)
+
+    def take(self, key: Key, action: str, rules: Rules, now: float) -> Optional[Blocked]:
+        """Record action for key at now unless rules block it; returns what blocked it"""
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            targets = shard.targets
+            times = targets.get(key)
+            if times is not None:
+                blocked = _blocked(times, rules, now)
+                if blocked is not None:
+                    return blocked
+                times[action] = now
+                targets.move_to_end(key)
+                return None
+
+            targets[key] = {action: now}
+            while targets:
+                oldest_key, oldest = next(iter(targets.items()))
+                if oldest_key == key or (len(targets) <= self.shard_capacity
+                                         and now - max(oldest.values()) < self.horizon):
+                    break
+                targets.popitem(last=False)
+            return None
+
+    def last(self, key: Key) -> Dict[str, float]:
+        """{action: last time taken} for key"""
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            return dict(shard.targets.get(key, {}))
+
+    def __len__(self) -> int:
+        return sum(len(shard.targets) for shard in self._shards)
+
+class SQLiteCooldownStore:
+    """Cooldown state shared by the worker processes of one host through a SQLite file"""
+
+    def __init__(self, path: str, flush_interval: float = 0.05, batch_size: int = 256,
+                 prune_interval: float = 60.0, timeout: float = 5.0, stripes: int = 16):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.prune_interval = prune_interval
+        self.timeout = timeout
+        self.stripes = stripes
+        self.horizon = 0.0
+        connection = sqlite3.connect(path, timeout=timeout)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS cooldowns (environment TEXT NOT NULL, "
+                               "target TEXT NOT NULL, action TEXT NOT NULL, at REAL NOT NULL, "
+                               "PRIMARY KEY (environment, target, action)) WITHOUT ROWID")
+            connection.commit()
+        finally:
+            connection.close()
+        self._reset()
+        atexit.register(self.close)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Fresh connections, pending writes and writer (at construction and in a forked worker)"""
+        self._local = threading.local()
+        self._stripe_locks = [threading.Lock() for _ in range(self.stripes)]
+        self._lock = threading.Lock()
+        # Taken but not yet committed: key -> {action: time}
+        self._pending: Dict[Key, Dict[str, float]] = {}
+        self._flushing: Dict[Key, Dict[str, float]] = {}
+        self._writer: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pruned = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def retain(self, seconds: float):
+        """Keep a target's state for at least seconds after its last action"""
+        self.horizon = max(self.horizon, seconds)
+
+    def _times(self, key: Key) -> Dict[str, float]:
+        times = dict(self._connection().execute(
+            "SELECT action, at FROM cooldowns WHERE environment = ? AND target = ?", key).fetchall())
+        with self._lock:
+            for source in (self._flushing, self._pending):
+                for action, at in source.get(key, {}).items():
+                    if at > times.get(action, at - 1.0):
+                        times[action] = at
+        return times
+
+    def take(self, key: Key, action: str, rules: Rules, now: float) -> Optional[Blocked]:
+        """Record action for key at now unless rules block it; returns what blocked it"""
+        with self._stripe_locks[hash(key) % self.stripes]:
+            blocked = _blocked(self._times(key), rules, now)
+            if blocked is not None:
+                return blocked
+            with self._lock:
+                self._pending.setdefault(key, {})[action] = now
+                pending = len(self._pending)
+        if self._writer is None:
+            self._start_writer()
+        if pending >= self.batch_size:
+            self._wake.set()
+        return None
+
+    def last(self, key: Key) -> Dict[str, float]:
+        """{action: last time taken} for key, committed or pending"""
+        return self._times(key)
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="cooldown-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        stop, wake = self._stop, self._wake
+        while not stop.is_set():
+            wake.wait(self.flush_interval)
+            wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Locked or unavailable: the batch is retried on the next pass
+                pass
+
+    def flush(self) -> int:
+        """Commit pending actions in one transaction; returns how many were written"""
+        with self._lock:
+            if self._flushing:
+                batch = self._flushing   # a failed previous flush
+                for key, times in self._pending.items():
+                    batch.setdefault(key, {}).update(times)
+            else:
+                batch = self._pending
+            self._flushing, self._pending = batch, {}
+        rows = [(environment, target, action, at)
+                for (environment, target), times in batch.items() for action, at in times.items()]
+        now = time.time()
+        prune = self.horizon > 0 and now - self._pruned >= self.prune_interval
+        if not rows and not prune:
+            return 0
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO cooldowns VALUES (?, ?, ?, ?) ON CONFLICT (environment, target, action) "
+                "DO UPDATE SET at = max(at, excluded.at)", rows)
+            if prune:
+                connection.execute("DELETE FROM cooldowns WHERE at < ?", (now - self.horizon,))
+                self._pruned = now
+        with self._lock:
+            self._flushing = {}
+        return len(rows)
+
+    def close(self):
+        """Stop the writer and commit what is still pending"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join()
+        self.flush()
+
+class CooldownGate:
+    """Downgrades actions taken again too soon on the same target to NOOP"""
+
+    def __init__(self, cooldowns: Dict[str, float], flip_interval: float = 0.0, store: Any = None,
+                 on_block: Optional[Callable[[str, str], None]] = None, clock: Callable[[], float] = time.time):
+        """
+        store: MemoryCooldownStore (default) or SQLiteCooldownStore
+        on_block(environment, action) is called for every blocked action
+        """
+        self.rules: Dict[str, Rules] = {}
+        for action in Action:
+            rules = []
+            if cooldowns.get(action.value, 0) > 0:
+                rules.append((action.value, cooldowns[action.value]))
+            if action.value in OPPOSITES and flip_interval > 0:
+                rules.append((OPPOSITES[action.value], flip_interval))
+            if rules:
+                self.rules[action.value] = tuple(rules)
+        self.store = MemoryCooldownStore() if store is None else store
+        self.store.retain(max((seconds for rules in self.rules.values() for _, seconds in rules), default=0.0))
+        self.on_block = on_block
+        self.clock = clock
+
+    @staticmethod
+    def target(payload: Any) -> str:
+        target = payload.get("target") if isinstance(payload, dict) else None
+        if isinstance(target, bool) or not isinstance(target, (str, int)):
+            return ANY_TARGET
+        return str(target)
+
+    def apply(self, payload: Any, response: Dict[str, Any], shared: bool) -> Tuple[Dict[str, Any], bool]:
+        """(response, shared) for a decided request: unchanged, or a cooldown NOOP"""
+        action = response["action"]
+        rules = self.rules.get(action)
+        if rules is None:
+            return response, shared
+        environment, target = response["environment"], self.target(payload)
+        blocked = self.store.take((environment, target), action, rules, self.clock())
+        if blocked is None:
+            return response, shared
+
+        other, seconds, elapsed = blocked
+        response = dict(response)
+        response["action"] = Action.NOOP.value
+        response["reason"] = (f"Cooldown: {action} blocked for {environment}/{target}, "
+                              f"{other} was decided {elapsed:.0f}s ago (minimum {seconds:g}s)")
+        response["proposed_action"] = action
+        response["cooldown"] = True
+        if self.on_block:
+            self.on_block(environment, action)
+        return response, False
@@ -0,0 +1,189 @@
+"""
+Structured Decision Logging for RL Decision Brain
+Sampled JSON-lines records written by a background thread
+
+The request thread only samples and appends a small tuple to a bounded
+deque; a writer thread formats records as JSON lines and writes them in
+batches. When the queue is full the record is dropped and counted instead
+of blocking the request.
+
+Errors, safety-filtered downgrades and NOOPs for requests that failed
+validation are never sampled out, and may use a reserved slice of the queue
+that ordinary decisions cannot fill.
+
+Sample rates are keyed by "environment:action", "environment",
+"*:action" or "*" (most specific first), e.g.
+    "*=0.01,prod=1,dev:noop=0"
+"""
+
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, IO, Optional, Tuple
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "key=rate,key=rate" into {key: rate}; raises ValueError"""
+    rates = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, _, value = item.partition("=")
+        rate = float(value)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Sample rate for {key!r} must be between 0 and 1")
+        rates[key.strip().lower()] = rate
+    return rates
+
+class DecisionLogger:
+    """Bounded, sampled, asynchronous JSON-lines logger"""
+
+    def __init__(self, stream: Optional[IO[str]] = None, sample_rates: Optional[Dict[str, float]] = None,
+                 queue_size: int = 10000, batch_size: int = 512, flush_interval: float = 0.25,
+                 reserved: float = 0.1, on_drop: Optional[Callable[[bool], None]] = None):
+        """on_drop(priority) is called on the request thread for every dropped record"""
+        self.stream = stream
+        self.sample_rates = dict(sample_rates or {})
+        self.sample_rates.setdefault("*", 1.0)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_drop = on_drop
+        # Ordinary records stop here; the rest of the queue is kept for errors and downgrades
+        self._soft_limit = int(queue_size * (1.0 - reserved))
+        self._rate_cache: Dict[Tuple[str, str], float] = {}
+        self._reset()
+        atexit.register(self.close)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Empty queue, counters and writer (at construction and in a forked worker)"""
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.dropped = 0
+        self.dropped_priority = 0
+        self.written = 0
+
+    def sample_rate(self, environment: str, action: str) -> float:
+        """Rate for (environment, action), most specific key first"""
+        key = (environment, action)
+        rate = self._rate_cache.get(key)
+        if rate is None:
+            rates = self.sample_rates
+            for candidate in (f"{environment}:{action}", environment, f"*:{action}", "*"):
+                if candidate in rates:
+                    rate = rates[candidate]
+                    break
+            # Bounded: environments are validated and actions come from the Action enum
+            if len(self._rate_cache) < 1024:
+                self._rate_cache[key] = rate
+        return rate
+
+    def decision(self, event_type: Optional[str], response: Dict[str, Any], timestamp: float,
+                 valid: bool = True) -> bool:
+        """
+        Queue one decision record if sampled; False if it was sampled out or
+        dropped. valid=False marks the NOOP answering an invalid request
+        """
+        priority = response["safety_filtered"] or not valid
+        rate = 1.0
+        if not priority:
+            rate = self.sample_rate(response["environment"], response["action"])
+            if rate < 1.0 and (rate <= 0.0 or random.random() >= rate):
+                return False
+        return self._put(("decision", timestamp, event_type, response, rate, valid), priority)
+
+    def error(self, route: str, message: str) -> bool:
+        """Queue one error record (never sampled)"""
+        return self._put(("error", time.time(), route, message, 1.0), True)
+
+    def _put(self, record: tuple, priority: bool) -> bool:
+        queue = self._queue
+        if len(queue) >= (self.queue_size if priority else self._soft_limit):
+            with self._lock:
+                if priority:
+                    self.dropped_priority += 1
+                else:
+                    self.dropped += 1
+            if self.on_drop:
+                self.on_drop(priority)
+            return False
+        queue.append(record)
+        if self._writer is None:
+            self._start_writer()
+        return True
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="decision-log", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        stop = self._stop
+        while not stop.is_set():
+            if not self.flush():
+                stop.wait(self.flush_interval)
+
+    def flush(self) -> int:
+        """Write up to batch_size queued records; returns how many were written"""
+        queue = self._queue
+        lines = []
+        while queue and len(lines) < self.batch_size:
+            lines.append(_format(queue.popleft()))
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write("".join(lines))
+            stream.flush()
+            self.written += len(lines)
+        return len(lines)
+
+    def drain(self):
+        """Write everything still queued"""
+        while self.flush():
+            pass
+
+    def close(self):
+        """Stop the writer thread, then write everything still queued"""
+        self._stop.set()
+        writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join()
+        self.drain()
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": len(self._queue), "written": self.written,
+                "dropped": self.dropped, "dropped_priority": self.dropped_priority}
+
+def _format(record: tuple) -> str:
+    kind, timestamp = record[0], record[1]
+    if kind == "error":
+        _, _, route, message, _ = record
+        document = {"ts": timestamp, "level": "error", "kind": "error", "route": route, "error": message}
+    else:
+        _, _, event_type, response, rate, valid = record
+        document = {
+            "ts": timestamp,
+            "level": "warning" if response["safety_filtered"] or not valid else "info",
+            "kind": "decision",
+            "environment": response["environment"],
+            "event_type": event_type,
+            "action": response["action"],
+            "reason": response["reason"],
+            "safety_filtered": response["safety_filtered"],
+            "policy_version": response.get("policy_version"),
+            "sample_rate": rate,
+        }
+        if "proposed_action" in response:
+            document["proposed_action"] = response["proposed_action"]
+        if not valid:
+            document["valid"] = False
+    return json.dumps(document, separators=(",", ":")) + "\n"
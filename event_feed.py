@@ -0,0 +1,167 @@
+"""
+Live Decision Feed for RL Decision Brain
+In-process broadcast ring buffer streamed to dashboards as Server-Sent Events
+
+Publishing claims a sequence number and writes one ring slot; it never waits
+on a subscriber. Each subscriber reads from its own cursor. A subscriber
+that falls a full ring behind has missed decisions and is dropped. When
+more decisions arrive in one tick than a subscriber may send, they are
+aggregated into a single summary event.
+
+The ring is per process: with several gunicorn workers, a stream carries
+the decisions of the worker serving it.
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# (sequence, event_type, response, timestamp)
+Entry = Tuple[int, str, Dict[str, Any], float]
+
+class DecisionFeed:
+    """Bounded broadcast buffer of recent decisions"""
+
+    def __init__(self, capacity: int = 4096, max_subscribers: int = 32):
+        self.capacity = capacity
+        self.max_subscribers = max_subscribers
+        self.subscribers = 0
+        self.dropped = 0
+        self._slots: List[Optional[Entry]] = [None] * capacity
+        self._sequence = itertools.count()
+        self._published = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, response: Dict[str, Any], timestamp: float):
+        """Record one decision (no-op while nobody is subscribed)"""
+        if not self.subscribers:
+            return
+        sequence = next(self._sequence)
+        self._slots[sequence % self.capacity] = (sequence, event_type, response, timestamp)
+        self._published = sequence + 1
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional["Subscription"]:
+        """
+        Start reading at the newest decision, or just after last_event_id
+        if it is still buffered; None when max_subscribers are connected
+        """
+        with self._lock:
+            if self.subscribers >= self.max_subscribers:
+                return None
+            self.subscribers += 1
+        cursor = self._published
+        if last_event_id is not None:
+            try:
+                resume = int(last_event_id) + 1
+            except ValueError:
+                resume = cursor
+            if cursor - self.capacity < resume <= cursor:
+                cursor = resume
+        return Subscription(self, cursor)
+
+    def _unsubscribe(self, lapped: bool):
+        with self._lock:
+            self.subscribers -= 1
+            if lapped:
+                self.dropped += 1
+
+class Subscription:
+    """One subscriber's cursor into a DecisionFeed"""
+
+    def __init__(self, feed: DecisionFeed, cursor: int):
+        self.feed = feed
+        self.cursor = cursor
+        self.lapped = False
+        self._closed = False
+
+    def poll(self, limit: int) -> List[Entry]:
+        """Entries published since the last poll, at most limit of them"""
+        slots, capacity = self.feed._slots, self.feed.capacity
+        entries = []
+        while len(entries) < limit:
+            entry = slots[self.cursor % capacity]
+            if entry is None or entry[0] < self.cursor:
+                break
+            if entry[0] > self.cursor:
+                # Overwritten before we read it: this subscriber is too slow
+                self.lapped = True
+                break
+            entries.append(entry)
+            self.cursor += 1
+        return entries
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.feed._unsubscribe(self.lapped)
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """One SSE message"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, sort_keys=True, separators=(',', ':'))}\n\n"
+
+def _decision(entry: Entry) -> Dict[str, Any]:
+    _, event_type, response, timestamp = entry
+    return {
+        "environment": response["environment"],
+        "event_type": event_type,
+        "action": response["action"],
+        "reason": response["reason"],
+        "safety_filtered": response["safety_filtered"],
+        "policy_version": response.get("policy_version"),
+        "timestamp": timestamp,
+    }
+
+def _summary(entries: List[Entry]) -> Dict[str, Any]:
+    counts = Counter((response["environment"], response["action"]) for _, _, response, _ in entries)
+    return {
+        "count": len(entries),
+        "safety_filtered": sum(1 for _, _, response, _ in entries if response["safety_filtered"]),
+        "decisions": [
+            {"environment": environment, "action": action, "count": count}
+            for (environment, action), count in sorted(counts.items())
+        ],
+        "from_timestamp": entries[0][3],
+        "to_timestamp": entries[-1][3],
+        "latest": _decision(entries[-1]),
+    }
+
+def sse_stream(subscription: Subscription, tick: float = 0.25, max_per_tick: int = 20,
+               max_duration: float = 25.0, keepalive: float = 15.0) -> Iterator[str]:
+    """
+    SSE messages for a subscription until max_duration elapses
+
+    Each tick sends up to max_per_tick decision events, or one summary event
+    covering everything pending. A lapped subscriber gets a final "dropped"
+    event. Streams end after max_duration so a sync worker is never held past
+    its timeout; the browser's EventSource reconnects with Last-Event-ID.
+    """
+    try:
+        yield "retry: 1000\n\n"
+        started = last_sent = time.monotonic()
+        while True:
+            # Read at most one ring per tick so a burst cannot stall the stream
+            entries = subscription.poll(subscription.feed.capacity)
+            if subscription.lapped:
+                yield format_event("dropped", {"reason": "Subscriber fell behind the decision feed"})
+                return
+            if len(entries) > max_per_tick:
+                yield format_event("summary", _summary(entries), entries[-1][0])
+            else:
+                for entry in entries:
+                    yield format_event("decision", _decision(entry), entry[0])
+
+            now = time.monotonic()
+            if entries:
+                last_sent = now
+            elif now - last_sent >= keepalive:
+                yield ": keepalive\n\n"
+                last_sent = now
+            if now - started >= max_duration:
+                return
+            time.sleep(tick)
+    finally:
+        subscription.close()
@@ -0,0 +1,372 @@
+"""
+Streaming Feature Store for RL Decision Brain
+Sliding-window statistics of each target's metrics, for decisions that do not flap
+
+Each (environment, target) - target is the optional "target" field of a
+request, e.g. a service id - keeps a ring buffer of its last `window`
+values of cpu_percent, memory_percent and error_rate. Every sample updates,
+in O(1) (amortized for min/max):
+
+    last, ewma (weight alpha), mean, min, max (monotonic deques),
+    p50, p90, p99 (a 100-bin histogram over the metric's schema range,
+                   so percentiles are within 1% of the range)
+
+smooth() records a request's metrics and returns a copy of the request
+whose metrics are replaced by the configured statistic of the window, e.g.
+"cpu_percent=ewma,memory_percent=p90,error_rate=max": a policy then sees a
+spike only once it persists. Requests without a target, and metrics that
+are missing or out of range, pass through unchanged.
+
+Targets live in lock-striped shards, each an LRU bounded to
+max_targets / shards entries; targets idle for idle_ttl seconds are
+evicted first. snapshot()/restore() (and save()/load() as JSON) carry the
+windows across restarts.
+"""
+
+import atexit
+import glob
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from request_schema import REQUEST_SCHEMA
+from rl_decision_brain import Environment
+
+METRIC_NAMES = ("cpu_percent", "memory_percent", "error_rate")
+METRIC_RANGES = {name: (float(spec["min"]), float(spec["max"]))
+                 for name, spec in REQUEST_SCHEMA["metrics"]["fields"].items()}
+STATISTICS = ("last", "ewma", "mean", "min", "max", "p50", "p90", "p99")
+ENVIRONMENTS = frozenset(environment.value for environment in Environment)
+
+# Histogram bins per metric for approximate percentiles
+BINS = 100
+
+Key = Tuple[str, str]
+
+def parse_feature_spec(spec: str) -> Dict[str, str]:
+    """Parse "metric=statistic,..." or a single statistic for every metric; raises ValueError"""
+    spec = spec.strip()
+    if spec in STATISTICS:
+        return {name: spec for name in METRIC_NAMES}
+    features = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        metric, _, statistic = item.partition("=")
+        metric, statistic = metric.strip(), statistic.strip()
+        if metric not in METRIC_NAMES:
+            raise ValueError(f"Unknown metric {metric!r} (expected one of {', '.join(METRIC_NAMES)})")
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown statistic {statistic!r} for {metric} (expected one of {', '.join(STATISTICS)})")
+        features[metric] = statistic
+    return features
+
+class _Window:
+    """Sliding window of one metric of one target"""
+
+    __slots__ = ("values", "size", "count", "seq", "total", "ewma", "minimum", "maximum", "bins", "low", "scale")
+
+    def __init__(self, size: int, low: float, high: float):
+        self.values = [0.0] * size
+        self.size = size
+        self.count = 0
+        self.seq = 0
+        self.total = 0.0
+        self.ewma = 0.0
+        # (sequence number, value), values increasing (minimum) or decreasing (maximum)
+        self.minimum: deque = deque()
+        self.maximum: deque = deque()
+        self.bins = [0] * BINS
+        self.low = low
+        self.scale = BINS / (high - low)
+
+    def _bin(self, value: float) -> int:
+        return min(BINS - 1, int((value - self.low) * self.scale))
+
+    def add(self, value: float, alpha: float):
+        seq, size = self.seq, self.size
+        position = seq % size
+        if self.count == size:
+            old = self.values[position]
+            self.total -= old
+            self.bins[self._bin(old)] -= 1
+        else:
+            self.count += 1
+        self.values[position] = value
+        self.bins[self._bin(value)] += 1
+        self.total += value
+        if position == size - 1:
+            self.total = math.fsum(self.values[:self.count])   # drop accumulated rounding once per lap
+        self.ewma = value if seq == 0 else self.ewma + alpha * (value - self.ewma)
+
+        expired = seq - size
+        minimum, maximum = self.minimum, self.maximum
+        while minimum and minimum[-1][1] >= value:
+            minimum.pop()
+        minimum.append((seq, value))
+        if minimum[0][0] <= expired:
+            minimum.popleft()
+        while maximum and maximum[-1][1] <= value:
+            maximum.pop()
+        maximum.append((seq, value))
+        if maximum[0][0] <= expired:
+            maximum.popleft()
+        self.seq = seq + 1
+
+    def percentile(self, q: float) -> float:
+        """Midpoint of the bin holding quantile q, clamped to the window's min and max"""
+        rank, seen = q * self.count, 0
+        for index, count in enumerate(self.bins):
+            seen += count
+            if count and seen >= rank:
+                value = self.low + (index + 0.5) / self.scale
+                return min(max(value, self.minimum[0][1]), self.maximum[0][1])
+        return self.maximum[0][1]
+
+    def statistic(self, name: str) -> float:
+        if name == "ewma":
+            return self.ewma
+        if name == "last":
+            return self.values[(self.seq - 1) % self.size]
+        if name == "mean":
+            return self.total / self.count
+        if name == "min":
+            return self.minimum[0][1]
+        if name == "max":
+            return self.maximum[0][1]
+        return self.percentile(int(name[1:]) / 100)
+
+    def ordered(self) -> List[float]:
+        """Window values, oldest first"""
+        start = self.seq - self.count
+        return [self.values[i % self.size] for i in range(start, self.seq)]
+
+class _Target:
+    __slots__ = ("windows", "updated")
+
+    def __init__(self):
+        self.windows: Dict[str, _Window] = {}
+        self.updated = 0.0
+
+class _Shard:
+    __slots__ = ("lock", "targets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.targets: "OrderedDict[Key, _Target]" = OrderedDict()
+
+class FeatureStore:
+    """Per-target sliding windows of request metrics"""
+
+    def __init__(self, window: int = 60, alpha: float = 0.3, max_targets: int = 10000,
+                 idle_ttl: float = 3600.0, shards: int = 16, clock: Callable[[], float] = time.time):
+        if window < 1 or not 0.0 < alpha <= 1.0:
+            raise ValueError("window must be at least 1 and alpha in (0, 1]")
+        self.window = window
+        self.alpha = alpha
+        self.idle_ttl = idle_ttl
+        self.shard_capacity = max(1, max_targets // shards)
+        self.clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A lock held by another thread of the parent at fork time would never be released
+        for shard in self._shards:
+            shard.lock = threading.Lock()
+
+    @staticmethod
+    def key(payload: Any) -> Optional[Key]:
+        """(environment, target) of a request with a target, else None"""
+        if not isinstance(payload, dict) or not isinstance(payload.get("metrics"), dict):
+            return None
+        environment, target = payload.get("environment"), payload.get("target")
+        if not isinstance(environment, str) or isinstance(target, bool) or not isinstance(target, (str, int)):
+            return None
+        environment = environment.lower()
+        return (environment, str(target)) if environment in ENVIRONMENTS else None
+
+    def _shard(self, key: Key) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _update(self, key: Key, metrics: Dict[str, Any],
+                now: Optional[float] = None) -> List[Optional[_Window]]:
+        """
+        Add the in-range metric values of one request to key's windows and
+        return those windows, None for other metrics (caller holds the shard lock)
+        """
+        now = self.clock() if now is None else now
+        shard = self._shard(key)
+        targets = shard.targets
+        target = targets.get(key)
+        if target is None:
+            target = targets[key] = _Target()
+            while targets:
+                oldest_key, oldest = next(iter(targets.items()))
+                if oldest_key == key or (len(targets) <= self.shard_capacity
+                                         and now - oldest.updated < self.idle_ttl):
+                    break
+                targets.popitem(last=False)
+        else:
+            targets.move_to_end(key)
+        target.updated = now
+
+        updated: List[Optional[_Window]] = []
+        for name in METRIC_NAMES:
+            value = metrics.get(name)
+            low, high = METRIC_RANGES[name]
+            if type(value) is bool or not isinstance(value, (int, float)) or not low <= value <= high:
+                updated.append(None)
+                continue
+            window = target.windows.get(name)
+            if window is None:
+                window = target.windows[name] = _Window(self.window, low, high)
+            window.add(float(value), self.alpha)
+            updated.append(window)
+        return updated
+
+    def smooth(self, payload: Any, features: Dict[str, str]) -> Any:
+        """Record payload's metrics; return it with metrics replaced by features of its window"""
+        key = self.key(payload)
+        if key is None:
+            return payload
+        metrics = payload["metrics"]
+        shard = self._shard(key)
+        with shard.lock:
+            smoothed = dict(metrics)
+            for name, window in zip(METRIC_NAMES, self._update(key, metrics)):
+                statistic = features.get(name)
+                if window is not None and statistic is not None:
+                    smoothed[name] = window.statistic(statistic)
+        payload = dict(payload)
+        payload["metrics"] = smoothed
+        return payload
+
+    def features(self, environment: str, target: Any) -> Optional[Dict[str, Dict[str, float]]]:
+        """Every statistic of every metric window of one target, or None if unknown"""
+        key = (environment.lower(), str(target))
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.targets.get(key)
+            if entry is None:
+                return None
+            return {name: dict({statistic: window.statistic(statistic) for statistic in STATISTICS},
+                               samples=window.count)
+                    for name, window in entry.windows.items()}
+
+    def __len__(self) -> int:
+        return sum(len(shard.targets) for shard in self._shards)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state: every target's window values (oldest first) and EWMA"""
+        targets = []
+        for shard in self._shards:
+            with shard.lock:
+                for (environment, target), entry in shard.targets.items():
+                    targets.append({
+                        "environment": environment, "target": target, "updated": entry.updated,
+                        "metrics": {name: {"values": window.ordered(), "ewma": window.ewma}
+                                    for name, window in entry.windows.items()},
+                    })
+        return {"window": self.window, "alpha": self.alpha, "targets": targets}
+
+    def restore(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Load targets from snapshots, the most recently updated copy of a target winning; returns targets loaded"""
+        latest: Dict[Key, Dict[str, Any]] = {}
+        for document in documents:
+            for entry in document.get("targets", []):
+                key = (entry["environment"], entry["target"])
+                if key not in latest or entry["updated"] > latest[key]["updated"]:
+                    latest[key] = entry
+        for key, entry in sorted(latest.items(), key=lambda item: item[1]["updated"]):
+            shard = self._shard(key)
+            with shard.lock:
+                shard.targets.pop(key, None)
+                for name, state in entry["metrics"].items():
+                    for value in state["values"][-self.window:]:
+                        self._update(key, {name: value}, entry["updated"])
+                    window = shard.targets[key].windows.get(name)
+                    if window is not None:
+                        window.ewma = state["ewma"]
+                target = shard.targets.get(key)
+                if target is not None:
+                    target.updated = entry["updated"]
+        return len(latest)
+
+    def save(self, path: str):
+        """Write snapshot() atomically to path"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def load(self, paths: Iterable[str]) -> int:
+        """restore() from snapshot files, skipping unreadable ones"""
+        documents = []
+        for path in paths:
+            try:
+                with open(path) as f:
+                    documents.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return self.restore(documents)
+
+    def autosave(self, directory: str, interval: float = 30.0) -> int:
+        """
+        Load every features-*.json in directory, save the merged windows as
+        this process's features-<pid>.json and delete stale snapshots, then
+        save every interval seconds and at exit (restarted in forked worker
+        processes); returns targets loaded
+        """
+        paths = sorted(glob.glob(os.path.join(directory, "features-*.json")))
+        loaded = self.load(paths)
+
+        def save():
+            try:
+                self.save(os.path.join(directory, f"features-{os.getpid()}.json"))
+            except OSError:
+                pass
+
+        # What they held now lives in this process's own snapshot
+        save()
+        now = time.time()
+        for path in paths:
+            if _stale_snapshot(path, now, max(self.idle_ttl, 3 * interval)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                save()
+
+        def start():
+            threading.Thread(target=loop, name="feature-snapshot", daemon=True).start()
+
+        start()
+        atexit.register(save)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=start)
+        return loaded
+
+def _stale_snapshot(path: str, now: float, max_age: float) -> bool:
+    """A features-<pid>.json whose process has exited or that was not rewritten for max_age seconds"""
+    pid = os.path.basename(path)[len("features-"):-len(".json")]
+    if not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        if now - os.path.getmtime(path) > max_age:
+            return True
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass   # e.g. alive but owned by another user
+    return False
@@ -0,0 +1,186 @@
+"""
+Frozen Learned Policy for RL Decision Brain
+Read-only, memory-mapped policy weights with ACTION_SCOPE-masked argmax
+
+On-disk format: a NumPy .npy weight array plus a JSON sidecar with the same
+stem (policy.npy + policy.json):
+    {
+        "kind": "q_table" | "linear",
+        "version": "2024-06-01",                      # optional, defaults to the hash
+        "event_types": ["high_cpu", "high_memory", "crash", "low_load"]
+    }
+
+q_table weights have shape (environments, event_types, actions).
+linear weights have shape (features, actions) over the features
+    one-hot environment, one-hot event type, cpu_percent / 100,
+    memory_percent / 100, error_rate, bias
+with missing or non-numeric metrics read as 0.
+
+Environments and actions are indexed in Environment / Action declaration
+order. The .npy file is opened with mmap_mode="r", so every worker process
+maps the same page-cache pages instead of holding a private copy.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+
+from rl_decision_brain import Action, Environment
+
+KINDS = ("q_table", "linear")
+
+# Divisors turning raw metric values (METRIC_NAMES order) into linear features
+METRIC_SCALE = (100.0, 100.0, 1.0)
+
+class PolicyFormatError(ValueError):
+    """Raised when policy weights or metadata are invalid"""
+
+class _PolicyAction:
+    """Outcome descriptor for one (environment, event_type, action) cell"""
+
+    __slots__ = ("environment", "event_type", "action", "conditions", "reason")
+
+    def __init__(self, environment: str, event_type: str, action: Action, reason: str):
+        self.environment = environment
+        self.event_type = event_type
+        self.action = action
+        self.conditions = ()
+        self.reason = reason
+
+def metadata_path(weights_path: str) -> str:
+    """JSON sidecar path for a weights file"""
+    return os.path.splitext(weights_path)[0] + ".json"
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class FrozenPolicy:
+    """
+    Learned policy evaluated as a masked argmax over action values
+
+    Exposes the same slot interface as policy_rules.RulePolicy: slot =
+    env_id * len(event_types) + event_id, and evaluation returns an outcome id
+    slot * len(Action) + action_id into self.rules.
+    """
+
+    kind: str
+    metric_scale = METRIC_SCALE
+
+    def __init__(self, weights: np.ndarray, kind: str, event_types: Sequence[str],
+                 action_scope: Mapping[Environment, Set[Action]], version: Optional[str] = None,
+                 sha256: Optional[str] = None):
+        if kind not in KINDS:
+            raise PolicyFormatError(f"Unknown policy kind {kind!r} (expected one of {KINDS})")
+        self.kind = kind
+        self.environments = list(Environment)
+        self.actions = list(Action)
+        self.event_types = [str(event_type).lower() for event_type in event_types]
+        n_env, n_events, n_actions = len(self.environments), len(self.event_types), len(self.actions)
+
+        expected = (n_env, n_events, n_actions) if kind == "q_table" else (n_env + n_events + 4, n_actions)
+        if weights.shape != expected:
+            raise PolicyFormatError(f"{kind} weights must have shape {expected}, got {weights.shape}")
+        if not np.isfinite(weights).all():
+            raise PolicyFormatError("Policy weights contain NaN or infinite values")
+        self.weights = weights
+        self.sha256 = sha256 or hashlib.sha256(np.ascontiguousarray(weights).tobytes()).hexdigest()
+        self.version = version or self.sha256[:12]
+
+        # Illegal actions get -inf so the argmax can never select them
+        self._mask = np.array([
+            [0.0 if action in action_scope[environment] else -np.inf for action in self.actions]
+            for environment in self.environments
+        ])
+        self._mask.setflags(write=False)
+
+        self.rules = tuple(
+            _PolicyAction(environment.value, event_type, action,
+                          f"Frozen policy {self.version} decision for {event_type} in {environment.value}")
+            for environment in self.environments
+            for event_type in self.event_types
+            for action in self.actions
+        )
+
+        self._static: Optional[np.ndarray] = None
+        if kind == "q_table":
+            # Q-values ignore metrics: every slot's action is known at load time
+            masked = weights.astype(np.float64) + self._mask[:, None, :]
+            self._static = masked.argmax(axis=2).reshape(-1)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "version": self.version, "sha256": self.sha256}
+
+    def static_rule(self, slot: int) -> Optional[int]:
+        if self._static is None:
+            return None
+        return slot * len(self.actions) + int(self._static[slot])
+
+    def evaluate_metrics(self, slot: int, metrics: Mapping[str, Any]) -> int:
+        return self.evaluate_many([slot], [metrics])[0]
+
+    def evaluate_many(self, slots: Sequence[int], metrics: Sequence[Mapping[str, Any]]) -> List[int]:
+        if not slots:
+            return []
+        values = np.array([_feature_metrics(m) for m in metrics], dtype=np.float64)
+        return self.evaluate_batch(np.asarray(slots, dtype=np.intp), values).tolist()
+
+    def evaluate_batch(self, slots: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Outcome ids for slots (n,) and metric values (n, 3) in METRIC_NAMES order, divided by metric_scale"""
+        n_actions = len(self.actions)
+        if self._static is not None:
+            return slots * n_actions + self._static[slots]
+
+        n_env, n_events = len(self.environments), len(self.event_types)
+        env_ids, event_ids = np.divmod(slots, n_events)
+        features = np.zeros((len(slots), n_env + n_events + 4))
+        rows = np.arange(len(slots))
+        features[rows, env_ids] = 1.0
+        features[rows, n_env + event_ids] = 1.0
+        features[:, n_env + n_events:n_env + n_events + 3] = values
+        features[:, -1] = 1.0
+
+        q = features @ self.weights + self._mask[env_ids]
+        return slots * n_actions + q.argmax(axis=1)
+
+def _feature_metrics(metrics: Mapping[str, Any]) -> List[float]:
+    """Scaled metric features; missing or non-numeric values read as 0"""
+    values = []
+    for name, scale in zip(("cpu_percent", "memory_percent", "error_rate"), METRIC_SCALE):
+        value = metrics.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            values.append(float(value) / scale)
+        else:
+            values.append(0.0)
+    return values
+
+def load_frozen_policy(path: str, action_scope: Mapping[Environment, Set[Action]]) -> FrozenPolicy:
+    """Memory-map a weights file read-only and validate it against its sidecar"""
+    meta_path = metadata_path(path)
+    try:
+        with open(meta_path) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PolicyFormatError(f"Cannot read policy metadata {meta_path}: {e}")
+
+    weights = np.load(path, mmap_mode="r", allow_pickle=False)
+    return FrozenPolicy(weights, metadata.get("kind", ""), metadata.get("event_types", []),
+                        action_scope, metadata.get("version"), file_sha256(path))
+
+def save_frozen_policy(path: str, weights: np.ndarray, kind: str, event_types: Sequence[str],
+                       version: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
+    """Write weights (.npy) and their JSON sidecar deterministically"""
+    np.save(path, np.ascontiguousarray(weights))
+    metadata = {"kind": kind, "event_types": list(event_types)}
+    if version:
+        metadata["version"] = version
+    metadata.update(extra or {})
+    with open(metadata_path(path), "w") as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,59 @@
+"""
+Gunicorn Configuration for RL Decision Brain
+Fast cold start: load the app once in the master, fork workers that share its memory
+
+gunicorn picks this file up automatically when started from the repository
+directory (`gunicorn app:app`); command-line flags override it.
+
+- preload_app: app.py (Flask, the agent and its compiled decision table, the
+  request validators, the policy file) is imported once in the master, not
+  once per worker, and workers start already warm.
+- The garbage collector is disabled while the app is imported and everything
+  allocated by then is moved to the permanent generation (gc.freeze) before
+  each fork. Collections in the workers then never write to those objects'
+  headers, so their pages - DECISION_MAP, the decision table, module code -
+  stay shared copy-on-write instead of being copied into every worker.
+- The dashboard page is read and compressed in the master, so workers share
+  the bytes too.
+- Workers are threaded (gthread): an open /events stream holds one thread,
+  not a whole worker, and each worker admits at most half its threads as
+  /events subscribers so /decide always has threads left. Sync workers
+  (`--threads 1 -k sync` on the command line) refuse /events and the dashboard
+  falls back to polling.
+"""
+
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = "gthread"
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+preload_app = True
+
+# Collections during import only churn objects that are about to be frozen
+gc.disable()
+
+def when_ready(server):
+    """Master, after preloading and before the first fork"""
+    app_module = sys.modules.get("app")
+    if app_module is not None and hasattr(app_module, "dashboard"):
+        app_module.dashboard.load()
+    gc.freeze()
+    gc.enable()
+
+def pre_fork(server, worker):
+    """Freeze what the master allocated since the last fork (e.g. before a worker restart)"""
+    gc.freeze()
+
+def post_worker_init(worker):
+    """Worker, after loading the app: size the live feed to the worker's threads"""
+    app_module = sys.modules.get("app")
+    if app_module is None or not hasattr(app_module, "feed"):
+        return
+    from gunicorn.workers.sync import SyncWorker
+    if isinstance(worker, SyncWorker):
+        app_module.EVENTS_ENABLED = False
+    elif worker.cfg.threads > 1:
+        app_module.feed.max_subscribers = min(app_module.feed.max_subscribers, worker.cfg.threads // 2)
@@ -0,0 +1,169 @@
+"""
+Local HTTP Load Generator for RL Decision Brain
+Asyncio keep-alive client reporting requests/s and p50/p95/p99 latency
+
+Run: python loadgen.py --url http://127.0.0.1:8080/decide --concurrency 64 --duration 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_PAYLOAD = {
+    "environment": "dev",
+    "event_type": "high_cpu",
+    "metrics": {"cpu_percent": 85.0, "memory_percent": 50.0, "error_rate": 0.01}
+}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Requests/s and latency percentiles (milliseconds) for one run"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": count / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": (sum(latencies) / count * 1000) if count else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+async def _read_response(reader: asyncio.StreamReader) -> bool:
+    """Consume one HTTP/1.1 response; return True if the connection may be reused"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip().lower()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+        keep_alive = headers.get("connection") != "close"
+    else:
+        await reader.read()
+        keep_alive = False
+
+    if status >= 500:
+        raise IOError(f"HTTP {status}")
+    return keep_alive
+
+async def _client(host: str, port: int, request_head: bytes, body: bytes, deadline: float,
+                  slow_body: float, latencies: List[float], errors: List[int]):
+    """One connection issuing requests back to back until the deadline"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            if slow_body:
+                # Slow client: headers first, body after a pause
+                writer.write(request_head)
+                await writer.drain()
+                await asyncio.sleep(slow_body)
+                writer.write(body)
+            else:
+                writer.write(request_head + body)
+            await writer.drain()
+            keep_alive = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors[0] += 1
+            keep_alive = False
+            await asyncio.sleep(0.01)
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+async def _run(url: str, payload: Dict[str, Any], concurrency: int, duration: float,
+               slow_body: float) -> Dict[str, float]:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    body = json.dumps(payload).encode()
+    request_head = (
+        f"POST {parts.path or '/'} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode()
+
+    latencies: List[float] = []
+    errors = [0]
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        _client(host, port, request_head, body, deadline, slow_body, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+def run_load(url: str, payload: Optional[Dict[str, Any]] = None, concurrency: int = 16,
+             duration: float = 5.0, slow_body: float = 0.0) -> Dict[str, float]:
+    """Drive POST requests at url from concurrency connections for duration seconds"""
+    return asyncio.run(_run(url, payload or DEFAULT_PAYLOAD, concurrency, duration, slow_body))
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextlib.contextmanager
+def serve(command: List[str], port: int, timeout: float = 15.0, env: Optional[Dict[str, str]] = None):
+    """Run a server command in the background until its /health answers"""
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, **(env or {})))
+    try:
+        deadline = time.time() + timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+                break
+            except OSError:
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError(f"Server did not start: {' '.join(command)}")
+                time.sleep(0.1)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP load generator for POST /decide")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/decide")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--slow-body", type=float, default=0.0,
+                        help="seconds each client waits between sending headers and body")
+    parser.add_argument("--payload", help="JSON request body (default: dev high_cpu)")
+    args = parser.parse_args()
+
+    result = run_load(args.url, json.loads(args.payload) if args.payload else None,
+                      args.concurrency, args.duration, args.slow_body)
+    json.dump(result, sys.stdout, indent=2)
+    print()
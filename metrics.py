@@ -0,0 +1,236 @@
+"""
+Server-side Metrics for RL Decision Brain
+Prometheus text exposition with per-thread counters and multi-process aggregation
+
+Counters and histograms are written to a shard owned by the calling thread,
+so the request path never takes a shared lock. A scrape sums all shards.
+When a thread exits its shard is folded into a retired total, so servers
+that start a thread per request or connection do not accumulate shards.
+
+With several gunicorn workers, set RL_BRAIN_METRICS_DIR to a directory shared
+by the workers: each process periodically writes its totals to
+metrics-<pid>.json there, and a scrape on any worker sums every file.
+A scrape deletes the files of workers that have exited or stopped flushing
+for three intervals, so restarted workers and earlier runs are not counted.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+# Latency buckets (seconds) for request duration histograms
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class _Shard:
+    """Counters and histograms written by a single thread"""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters: Dict[Key, float] = {}
+        # Per-bucket (non-cumulative) counts, then +Inf count, sum, count
+        self.histograms: Dict[Key, List[float]] = {}
+
+class _Owner:
+    """Held only by a thread's local storage: collected, and its finalizer run, when the thread exits"""
+
+    __slots__ = ("__weakref__",)
+
+class Metrics:
+    """Lock-free-on-write metrics registry rendered in Prometheus text format"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 5.0,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = buckets
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Start from empty shards (at construction and in a freshly forked worker)"""
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        # Totals of shards whose threads have exited
+        self._retired = _Shard()
+        # Reentrant: a finalizer may run on a thread that already holds it
+        self._shards_lock = threading.RLock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """Declare a metric's type ("counter" or "histogram") and help text"""
+        self._descriptions[name] = (kind, help_text)
+
+    def _shard(self) -> _Shard:
+        """Return the calling thread's shard, registering it on first use"""
+        shard = _Shard()
+        with self._shards_lock:
+            self._shards.append(shard)
+            if self.directory and self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                self._flusher.start()
+        owner = _Owner()
+        weakref.finalize(owner, self._retire, self._shards, self._retired, shard)
+        self._local.owner = owner
+        self._local.shard = shard
+        return shard
+
+    def _retire(self, shards: List[_Shard], retired: _Shard, shard: _Shard):
+        """Fold an exited thread's shard into the retired totals of its generation"""
+        with self._shards_lock:
+            for i, registered in enumerate(shards):
+                if registered is shard:
+                    del shards[i]
+                    _merge(retired.counters, retired.histograms, shard.counters, shard.histograms)
+                    break
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        """Add value to a counter"""
+        shard = getattr(self._local, "shard", None) or self._shard()
+        key = (name, labels)
+        counters = shard.counters
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """Record one observation in a histogram"""
+        shard = getattr(self._local, "shard", None) or self._shard()
+        key = (name, labels)
+        histogram = shard.histograms.get(key)
+        if histogram is None:
+            histogram = shard.histograms[key] = [0] * (len(self.buckets) + 3)
+        histogram[bisect.bisect_left(self.buckets, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def snapshot(self) -> Tuple[Dict[Key, float], Dict[Key, List[float]]]:
+        """Sum every shard of this process"""
+        counters: Dict[Key, float] = {}
+        histograms: Dict[Key, List[float]] = {}
+        # Under the lock, so a shard is never counted both live and retired
+        with self._shards_lock:
+            for shard in self._shards + [self._retired]:
+                _merge(counters, histograms, shard.counters.copy(), shard.histograms.copy())
+        return counters, histograms
+
+    def flush(self):
+        """Write this process's totals to the shared directory"""
+        if not self.directory:
+            return
+        counters, histograms = self.snapshot()
+        document = {
+            "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+            "histograms": [[name, labels, values] for (name, labels), values in histograms.items()],
+        }
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(document, f)
+        os.replace(tmp_path, path)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def collect(self) -> Tuple[Dict[Key, float], Dict[Key, List[float]]]:
+        """Totals across threads, and across worker processes when a directory is set"""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush()
+        counters: Dict[Key, float] = {}
+        histograms: Dict[Key, List[float]] = {}
+        now = time.time()
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            if _stale_worker_file(path, now, 3 * self.flush_interval):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path) as f:
+                    document = json.load(f)
+            except (OSError, ValueError):
+                continue
+            _merge(
+                counters, histograms,
+                {(name, _labels(labels)): value for name, labels, value in document["counters"]},
+                {(name, _labels(labels)): values for name, labels, values in document["histograms"]},
+            )
+        return counters, histograms
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        counters, histograms = self.collect()
+        by_name: Dict[str, List[str]] = {}
+
+        for (name, labels), value in sorted(counters.items()):
+            by_name.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), values in sorted(histograms.items()):
+            lines = by_name.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-2]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(values[-1])}")
+
+        output = []
+        for name in sorted(set(by_name) | set(self._descriptions)):
+            kind, help_text = self._descriptions.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(by_name.get(name, []))
+        return "\n".join(output) + "\n"
+
+def _merge(counters, histograms, new_counters, new_histograms):
+    for key, value in new_counters.items():
+        counters[key] = counters.get(key, 0) + value
+    for key, values in new_histograms.items():
+        existing = histograms.get(key)
+        histograms[key] = list(values) if existing is None else [a + b for a, b in zip(existing, values)]
+
+def _stale_worker_file(path: str, now: float, max_age: float) -> bool:
+    """A metrics-<pid>.json whose process has exited or that was not rewritten for max_age seconds"""
+    pid = os.path.basename(path)[len("metrics-"):-len(".json")]
+    if not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        if now - os.path.getmtime(path) > max_age:
+            return True
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass   # e.g. alive but owned by another user
+    return False
+
+def _labels(pairs) -> Labels:
+    return tuple((str(k), str(v)) for k, v in pairs)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
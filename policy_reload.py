@@ -0,0 +1,177 @@
+"""
+Hot-Reloadable Policy for RL Decision Brain
+Versioned policy files watched by stat polling and installed by reference swap
+
+Policy files:
+    policy.json - decision map:  {"version": str, "decision_map": {...}, "action_scope": {...}}
+                  or rule set:   {"version": str, "rules": [...]}  (see policy_rules.py)
+    policy.npy  - frozen learned weights plus their .json sidecar (see frozen_policy.py)
+
+decision_map maps environment -> event_type -> action name and replaces
+DECISION_MAP entirely. action_scope is optional, maps environment -> action
+names, and may only narrow ACTION_SCOPE. A missing version defaults to a hash
+of the document.
+
+Each poll compares (inode, size, mtime) of the file; on a change the new
+version is loaded, validated and compiled on the watcher thread, then
+installed with RLDecisionBrain.install_policy(). A file that fails
+validation is logged and the active version keeps serving. Publish a new
+version by writing a temporary file and renaming it over the old one.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from rl_decision_brain import Action, Environment, RLDecisionBrain, _DecisionTable
+
+logger = logging.getLogger(__name__)
+
+class PolicyFileError(ValueError):
+    """Raised when a policy file cannot be loaded or fails validation"""
+
+def file_signature(path: str) -> Tuple[Optional[Tuple[int, int, int]], ...]:
+    """(inode, size, mtime_ns) of a policy file and, for weights, of its sidecar"""
+    paths = [path]
+    if path.endswith(".npy"):
+        paths.append(os.path.splitext(path)[0] + ".json")
+    signature = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+def _parse_scope(raw: Any) -> Dict[Environment, Set[Action]]:
+    if not isinstance(raw, dict):
+        raise PolicyFileError("action_scope must map environments to lists of actions")
+    scope = {}
+    for env_str, actions in raw.items():
+        if not isinstance(actions, list):
+            raise PolicyFileError(f"action_scope for {env_str} must be a list of actions")
+        try:
+            scope[Environment(str(env_str).lower())] = {Action(str(action).lower()) for action in actions}
+        except ValueError as e:
+            raise PolicyFileError(f"action_scope: {e}")
+    return scope
+
+def _parse_decision_map(raw: Any) -> Dict[Tuple[str, str], Action]:
+    if not isinstance(raw, dict):
+        raise PolicyFileError("decision_map must map environments to {event_type: action} objects")
+    decision_map = {}
+    for env_str, events in raw.items():
+        if not isinstance(events, dict):
+            raise PolicyFileError(f"decision_map for {env_str} must map event types to actions")
+        try:
+            environment = Environment(str(env_str).lower())
+            for event_type, action in events.items():
+                decision_map[(environment.value, str(event_type).lower())] = Action(str(action).lower())
+        except ValueError as e:
+            raise PolicyFileError(f"decision_map: {e}")
+    return decision_map
+
+def load_policy_file(brain: RLDecisionBrain, path: str) -> _DecisionTable:
+    """Load, validate and compile a policy file for brain without installing it; raises PolicyFileError"""
+    try:
+        if path.endswith(".npy"):
+            from frozen_policy import load_frozen_policy
+            return brain.compile_policy(load_frozen_policy(path, brain.ACTION_SCOPE))
+
+        with open(path) as f:
+            document = json.load(f)
+        if isinstance(document, list):
+            document = {"rules": document}
+        if not isinstance(document, dict):
+            raise PolicyFileError("expected a JSON object")
+
+        scope = None if document.get("action_scope") is None else _parse_scope(document["action_scope"])
+        if "rules" in document:
+            from policy_rules import RulePolicy
+            if not isinstance(document["rules"], list):
+                raise PolicyFileError("'rules' must be a list")
+            return brain.compile_policy(RulePolicy(document["rules"], document.get("version")),
+                                        action_scope=scope)
+        if "decision_map" in document:
+            version = document.get("version")
+            if not version:
+                canonical = json.dumps(document, sort_keys=True, separators=(",", ":"))
+                version = hashlib.sha256(canonical.encode()).hexdigest()[:12]
+            return brain.compile_policy(decision_map=_parse_decision_map(document["decision_map"]),
+                                        action_scope=scope, version=str(version))
+        raise PolicyFileError("expected a 'decision_map' or 'rules' field")
+    except Exception as e:
+        # Any malformed document (e.g. a TypeError deep in a loader) is a bad file, not a crash
+        raise PolicyFileError(f"{path}: {e}") from e
+
+class PolicyWatcher:
+    """Polls a policy file and installs each new valid version into a brain"""
+
+    def __init__(self, brain: RLDecisionBrain, path: str, interval: float = 2.0,
+                 on_install: Optional[Callable[[_DecisionTable], None]] = None):
+        self.brain = brain
+        self.path = path
+        self.interval = interval
+        self.on_install = on_install
+        self.last_error: Optional[str] = None
+        self._signature: Optional[Tuple] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fork_hook = False
+
+    def reload(self) -> _DecisionTable:
+        """Load, compile and install the file now; raises PolicyFileError and keeps the active table"""
+        # Stat before reading, so a write that lands mid-load is picked up by the next poll
+        self._signature = file_signature(self.path)
+        table = load_policy_file(self.brain, self.path)
+        self.brain.install_policy(table)
+        self.last_error = None
+        logger.info("Installed policy %s from %s", table.version, self.path)
+        if self.on_install:
+            self.on_install(table)
+        return table
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last load; True if a new version was installed"""
+        if file_signature(self.path) == self._signature:
+            return False
+        try:
+            self.reload()
+        except PolicyFileError as e:
+            self.last_error = str(e)
+            logger.error("Policy reload failed, still serving %s: %s", self.brain.policy_info()["version"], e)
+            return False
+        return True
+
+    def start(self) -> "PolicyWatcher":
+        """Poll in a daemon thread (restarted in forked worker processes)"""
+        if not self._fork_hook and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._fork_hook = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="policy-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _after_fork(self):
+        # Threads do not survive fork: each worker polls for itself
+        if self._thread is not None:
+            self._stop = threading.Event()
+            self.start()
+
+    def _run(self):
+        stop = self._stop
+        while not stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Policy watcher error")
@@ -0,0 +1,266 @@
+"""
+Metric-Aware Rule Policy for RL Decision Brain
+Declarative threshold rules compiled into flat NumPy arrays
+
+Rule format (JSON-compatible):
+    {
+        "environment": "dev",
+        "event_type": "high_cpu",
+        "when": {"cpu_percent": [">", 80]},     # optional, all conditions must hold
+        "action": "scale_up",
+        "reason": "CPU above 80% in dev"         # optional
+    }
+
+For each (environment, event_type) the first matching rule wins; a pair with
+no matching rule decides NOOP. Proposals are still passed through the
+brain's ACTION_SCOPE filter. A compiled policy is immutable.
+"""
+
+import hashlib
+import json
+import math
+import operator
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rl_decision_brain import Action, Environment
+
+METRIC_NAMES = ("cpu_percent", "memory_percent", "error_rate")
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+class RuleSetError(ValueError):
+    """Raised when a rule set fails validation"""
+
+class Rule:
+    """One compiled rule: (environment, event_type) + metric conditions -> action"""
+
+    __slots__ = ("environment", "event_type", "action", "conditions", "reason", "_checks")
+
+    def __init__(self, environment: str, event_type: str, action: Action,
+                 conditions: Tuple[Tuple[int, str, float], ...], reason: Optional[str]):
+        self.environment = environment
+        self.event_type = event_type
+        self.action = action
+        self.conditions = conditions
+        self.reason = reason
+        self._checks = tuple((metric_index, OPERATORS[op], threshold) for metric_index, op, threshold in conditions)
+
+    def matches(self, values: Sequence[float]) -> bool:
+        for metric_index, compare, threshold in self._checks:
+            if not compare(values[metric_index], threshold):
+                return False
+        return True
+
+def metrics_vector(metrics: Mapping[str, Any]) -> Tuple[float, ...]:
+    """Metric values in METRIC_NAMES order; missing or non-numeric values become NaN"""
+    values = []
+    for name in METRIC_NAMES:
+        value = metrics.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values.append(float(value))
+        else:
+            values.append(math.nan)
+    return tuple(values)
+
+def rules_from_decision_map(decision_map: Mapping[Tuple[str, str], Action]) -> List[Dict[str, Any]]:
+    """Express a frozen DECISION_MAP as unconditional rules"""
+    return [
+        {"environment": env_str, "event_type": event_type, "action": action.value}
+        for (env_str, event_type), action in decision_map.items()
+    ]
+
+class RulePolicy:
+    """
+    Frozen rule set compiled for single and batched evaluation
+
+    Slots are numbered env_id * len(event_types) + event_id, with env ids in
+    Environment declaration order. Every slot ends in an unconditional rule
+    (a NOOP fallback is appended where needed), so evaluation always returns
+    a rule id.
+    """
+
+    kind = "rules"
+
+    def __init__(self, rules: Sequence[Mapping[str, Any]], version: Optional[str] = None):
+        canonical = json.dumps(list(rules), sort_keys=True, separators=(",", ":"))
+        self.version = version or hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+        parsed = [self._parse(index, rule) for index, rule in enumerate(rules)]
+        self.environments = list(Environment)
+        self.event_types = list(dict.fromkeys(rule.event_type for rule in parsed))
+        env_ids = {environment.value: env_id for env_id, environment in enumerate(self.environments)}
+        event_ids = {event_type: event_id for event_id, event_type in enumerate(self.event_types)}
+        n_events = len(self.event_types)
+
+        # Group rules per slot, preserving declaration order, and terminate every slot
+        by_slot: List[List[Rule]] = [[] for _ in range(len(self.environments) * n_events)]
+        for rule in parsed:
+            by_slot[env_ids[rule.environment] * n_events + event_ids[rule.event_type]].append(rule)
+        for slot, slot_rules in enumerate(by_slot):
+            if not slot_rules or slot_rules[-1].conditions:
+                environment = self.environments[slot // n_events]
+                slot_rules.append(Rule(environment.value, self.event_types[slot % n_events], Action.NOOP, (), None))
+
+        self.rules: Tuple[Rule, ...] = tuple(rule for slot_rules in by_slot for rule in slot_rules)
+        rule_ids = {id(rule): rule_id for rule_id, rule in enumerate(self.rules)}
+        self.slot_rules: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(rule_ids[id(rule)] for rule in slot_rules) for slot_rules in by_slot
+        )
+        self._compile_arrays()
+
+    @staticmethod
+    def _parse(index: int, rule: Mapping[str, Any]) -> Rule:
+        """Validate one declarative rule"""
+        if not isinstance(rule, Mapping):
+            raise RuleSetError(f"Rule {index}: expected an object, got {type(rule).__name__}")
+        try:
+            environment = Environment(str(rule["environment"]).lower())
+            event_type = str(rule["event_type"]).lower()
+            action = Action(str(rule["action"]).lower())
+        except KeyError as e:
+            raise RuleSetError(f"Rule {index}: missing field {e}")
+        except ValueError as e:
+            raise RuleSetError(f"Rule {index}: {e}")
+
+        when = rule.get("when") or {}
+        if not isinstance(when, Mapping):
+            raise RuleSetError(f"Rule {index}: 'when' must be an object of metric conditions")
+        conditions = []
+        for metric, spec in when.items():
+            if metric not in METRIC_NAMES:
+                raise RuleSetError(f"Rule {index}: unknown metric {metric!r}")
+            if not isinstance(spec, (list, tuple)):
+                raise RuleSetError(f"Rule {index}: condition for {metric} must be [op, number] or a list of them")
+            # [op, number] or a list of them, e.g. [[">", 20], ["<=", 80]]
+            specs = spec if spec and isinstance(spec[0], (list, tuple)) else [spec]
+            for condition in specs:
+                if (not isinstance(condition, (list, tuple)) or len(condition) != 2
+                        or not isinstance(condition[0], str) or condition[0] not in OPERATORS
+                        or isinstance(condition[1], bool)
+                        or not isinstance(condition[1], (int, float))):
+                    raise RuleSetError(f"Rule {index}: condition for {metric} must be [op, number] "
+                                       f"with op in {sorted(OPERATORS)}")
+                conditions.append((METRIC_NAMES.index(metric), condition[0], float(condition[1])))
+
+        reason = rule.get("reason")
+        return Rule(environment.value, event_type, action, tuple(conditions), None if reason is None else str(reason))
+
+    def _compile_arrays(self):
+        """Flatten rules into padded per-slot arrays for vectorized evaluation"""
+        n_rules, n_metrics = len(self.rules), len(METRIC_NAMES)
+        lower = np.full((n_rules + 1, n_metrics), -np.inf)
+        upper = np.full((n_rules + 1, n_metrics), np.inf)
+        lower_strict = np.zeros((n_rules + 1, n_metrics), dtype=bool)
+        upper_strict = np.zeros((n_rules + 1, n_metrics), dtype=bool)
+        active = np.zeros((n_rules + 1, n_metrics), dtype=bool)
+
+        for rule_id, rule in enumerate(self.rules):
+            for metric_index, op, threshold in rule.conditions:
+                active[rule_id, metric_index] = True
+                # Keep the tightest bound on each side; on a tie the strict operator wins
+                if op in (">", ">="):
+                    current = lower[rule_id, metric_index]
+                    if threshold > current or (threshold == current and op == ">"):
+                        lower[rule_id, metric_index] = threshold
+                        lower_strict[rule_id, metric_index] = op == ">"
+                else:
+                    current = upper[rule_id, metric_index]
+                    if threshold < current or (threshold == current and op == "<"):
+                        upper[rule_id, metric_index] = threshold
+                        upper_strict[rule_id, metric_index] = op == "<"
+
+        # Padding rule (id n_rules) can never match
+        never = n_rules
+        active[never, 0] = True
+        lower[never, 0] = np.inf
+        lower_strict[never, 0] = True
+
+        width = max(len(slot_rules) for slot_rules in self.slot_rules)
+        slot_table = np.full((len(self.slot_rules), width), never, dtype=np.int32)
+        for slot, slot_rules in enumerate(self.slot_rules):
+            slot_table[slot, :len(slot_rules) - 1] = slot_rules[:-1]
+            # Each slot's unconditional terminal rule sits in the last column
+            slot_table[slot, -1] = slot_rules[-1]
+
+        self._lower, self._upper = lower, upper
+        self._lower_strict, self._upper_strict = lower_strict, upper_strict
+        self._active = active
+        self._slot_table = slot_table
+        for array in (lower, upper, lower_strict, upper_strict, active, slot_table):
+            array.setflags(write=False)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "version": self.version}
+
+    def static_rule(self, slot: int) -> Optional[int]:
+        """Rule id that always applies to slot, or None if the slot depends on metrics"""
+        first = self.slot_rules[slot][0]
+        return None if self.rules[first].conditions else first
+
+    def evaluate(self, slot: int, values: Sequence[float]) -> int:
+        """First matching rule id for one request"""
+        rules = self.rules
+        for rule_id in self.slot_rules[slot]:
+            if rules[rule_id].matches(values):
+                return rule_id
+        return self.slot_rules[slot][-1]
+
+    def evaluate_metrics(self, slot: int, metrics: Mapping[str, Any]) -> int:
+        """evaluate() for a request's metrics object"""
+        return self.evaluate(slot, metrics_vector(metrics))
+
+    def evaluate_many(self, slots: Sequence[int], metrics: Sequence[Mapping[str, Any]]) -> List[int]:
+        """evaluate_batch() for request metrics objects, as plain Python lists"""
+        if not slots:
+            return []
+        values = np.array([metrics_vector(m) for m in metrics], dtype=np.float64)
+        return self.evaluate_batch(np.asarray(slots, dtype=np.intp), values).tolist()
+
+    def evaluate_batch(self, slots: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """First matching rule id per row, for slots (n,) and metric values (n, len(METRIC_NAMES))"""
+        candidates = self._slot_table[slots]
+        x = values[:, None, :]
+        lower, upper = self._lower[candidates], self._upper[candidates]
+        above = np.where(self._lower_strict[candidates], x > lower, x >= lower)
+        below = np.where(self._upper_strict[candidates], x < upper, x <= upper)
+        match = ((above & below) | ~self._active[candidates]).all(axis=2)
+        return candidates[np.arange(len(slots)), match.argmax(axis=1)]
+
+    def evaluate_grid(self, slot: int, axes: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        First matching rule id at every point of a metric grid, shape
+        (len(axes[0]), len(axes[1]), len(axes[2])) for axes in METRIC_NAMES order
+
+        Conditions are per-metric intervals, so each axis is tested once and
+        the results are combined by broadcasting instead of per point.
+        """
+        candidates = self._slot_table[slot]
+        shape = [len(values) for values in axes] + [len(candidates)]
+        match = np.ones(shape, dtype=bool)
+        for metric_index, values in enumerate(axes):
+            x = np.asarray(values, dtype=np.float64)[:, None]
+            lower, upper = self._lower[candidates, metric_index], self._upper[candidates, metric_index]
+            above = np.where(self._lower_strict[candidates, metric_index], x > lower, x >= lower)
+            below = np.where(self._upper_strict[candidates, metric_index], x < upper, x <= upper)
+            axis_match = (above & below) | ~self._active[candidates, metric_index]
+            view = [1] * len(shape)
+            view[metric_index], view[-1] = len(values), len(candidates)
+            match &= axis_match.reshape(view)
+        return candidates[match.argmax(axis=-1)]
+
+def load_rules(path: str) -> RulePolicy:
+    """Load a rule set from a JSON file: {"version": str (optional), "rules": [...]}"""
+    with open(path) as f:
+        document = json.load(f)
+    if isinstance(document, list):
+        document = {"rules": document}
+    if not isinstance(document, dict) or not isinstance(document.get("rules"), list):
+        raise RuleSetError(f"{path}: expected a list of rules or an object with a 'rules' list")
+    return RulePolicy(document["rules"], document.get("version"))
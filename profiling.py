@@ -0,0 +1,156 @@
+"""
+Hot-Path Profiling for RL Decision Brain
+Per-stage request timings and an on-demand sampling profiler
+
+Stage timings: a request takes its thread's accumulator with begin() and
+calls lap(stage) after each stage; a lap is one monotonic clock read and a
+few integer updates on memory owned by that thread, so no lock is taken on
+the request path. snapshot() sums every thread's accumulator into count,
+mean, max and approximate p50/p99 per stage (log2 histograms, reported as
+bucket upper bounds).
+
+Sampling profiler: sample_stacks() reads the Python stack of every other
+thread of the process (sys._current_frames) at a fixed interval and counts
+identical stacks. collapsed() renders the counts one stack per line,
+
+    thread;outer (file.py:line);...;inner (file.py:line) count
+
+the input format of flamegraph.pl and speedscope. Samples of threads idle
+in a wait, select or accept are skipped.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+# Innermost (file, function) of a thread waiting for work rather than working
+IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"), ("socket.py", "accept"), ("socketserver.py", "serve_forever"),
+    ("queue.py", "get"),
+})
+
+# Histogram buckets per stage: durations up to 2**63 ns by bit length
+_BUCKETS = 64
+
+_clock = time.perf_counter_ns
+
+class _Stages:
+    """Stage timings of one thread: stage -> [count, total ns, max ns, *log2 histogram]"""
+
+    __slots__ = ("started", "last", "stats")
+
+    def __init__(self):
+        self.started = 0
+        self.last = 0
+        self.stats: Dict[str, List[int]] = {}
+
+    def lap(self, stage: str):
+        """Charge the time since begin() or the previous lap to stage"""
+        now = _clock()
+        elapsed = now - self.last
+        self.last = now
+        stats = self.stats.get(stage)
+        if stats is None:
+            stats = self.stats[stage] = [0] * (3 + _BUCKETS)
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]:
+            stats[2] = elapsed
+        stats[3 + elapsed.bit_length()] += 1
+
+    def end(self):
+        """Charge the time since begin() to "total" """
+        self.last = self.started
+        self.lap("total")
+
+class StageTimer:
+    """Per-thread stage accumulators with an aggregated snapshot"""
+
+    def __init__(self):
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Start from empty accumulators (at construction and in a freshly forked worker)"""
+        self._local = threading.local()
+        self._accumulators: List[_Stages] = []
+        self._lock = threading.Lock()
+        self.since = time.time()
+
+    def begin(self) -> _Stages:
+        """The calling thread's accumulator, with its clock started"""
+        stages = getattr(self._local, "stages", None)
+        if stages is None:
+            stages = self._local.stages = _Stages()
+            with self._lock:
+                self._accumulators.append(stages)
+        stages.started = stages.last = _clock()
+        return stages
+
+    def snapshot(self) -> Dict[str, object]:
+        """count, mean_us, p50_us, p99_us and max_us per stage, summed over threads"""
+        with self._lock:
+            accumulators = list(self._accumulators)
+        merged: Dict[str, List[int]] = {}
+        for stages in accumulators:
+            for stage, stats in stages.stats.copy().items():
+                total = merged.setdefault(stage, [0] * len(stats))
+                for i, value in enumerate(stats):
+                    total[i] = max(total[i], value) if i == 2 else total[i] + value
+
+        report = {}
+        for stage, stats in merged.items():
+            count, total, longest, histogram = stats[0], stats[1], stats[2], stats[3:]
+            report[stage] = {
+                "count": count,
+                "mean_us": total / count / 1e3,
+                "p50_us": _percentile_us(histogram, 0.5),
+                "p99_us": _percentile_us(histogram, 0.99),
+                "max_us": longest / 1e3,
+            }
+        return {"since": self.since, "stages": report}
+
+def _percentile_us(histogram: List[int], q: float) -> float:
+    """Upper bound (microseconds) of the log2 bucket holding quantile q"""
+    rank, seen = q * sum(histogram), 0
+    for bits, count in enumerate(histogram):
+        seen += count
+        if count and seen >= rank:
+            return (1 << bits) / 1e3
+    return 0.0
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Dict[str, int]:
+    """Collapsed stack -> sample count for every other thread, sampled for seconds"""
+    me = threading.get_ident()
+    names: Dict[int, str] = {}
+    counts: Dict[str, int] = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            name = names.get(ident)
+            if name is None:
+                names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                name = names.get(ident, f"thread-{ident}")
+            frames.append(name)
+            stack = ";".join(reversed(frames))
+            counts[stack] = counts.get(stack, 0) + 1
+        time.sleep(interval)
+    return counts
+
+def collapsed(counts: Dict[str, int]) -> str:
+    """Collapsed-stack text, most sampled stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
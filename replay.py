@@ -0,0 +1,167 @@
+"""
+Offline Bulk Replay for RL Decision Brain
+Replays a JSONL request log through RLDecisionBrain without HTTP
+
+Run: python replay.py requests.jsonl decisions.jsonl [--format jsonl|csv] [--jobs N]
+                     [--policy FILE|builtin]
+
+The input is memory-mapped and split into newline-aligned byte ranges that
+worker processes decide independently. Results are written in input order
+with a bounded number of chunks in flight, so memory stays flat for
+multi-GB logs.
+"""
+
+import argparse
+import csv
+import io
+import json
+import mmap
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from rl_decision_brain import RLDecisionBrain, _DecisionTable
+from response_cache import ResponseEncoder
+
+CSV_COLUMNS = ["action", "reason", "demo_frozen", "timestamp", "environment", "safety_filtered", "proposed_action",
+               "policy_version"]
+
+# Per-process worker state, created by _init_worker
+_agent: Optional[RLDecisionBrain] = None
+_encoder: Optional[ResponseEncoder] = None
+
+def chunk_ranges(path: str, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) byte ranges of path that begin and end on line boundaries"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = mm.find(b"\n", min(start + chunk_size, size) - 1)
+            end = size if end == -1 else end + 1
+            yield start, end
+            start = end
+
+def load_table(brain: RLDecisionBrain, spec: str) -> _DecisionTable:
+    """'builtin' (DECISION_MAP and ACTION_SCOPE) or a policy file"""
+    if spec == "builtin":
+        return brain.compile_policy()
+    from policy_reload import load_policy_file
+    return load_policy_file(brain, spec)
+
+def _init_worker(policy: str = "builtin"):
+    global _agent, _encoder
+    _agent = RLDecisionBrain()
+    _agent.install_policy(load_table(_agent, policy))
+    _encoder = ResponseEncoder()
+
+def _replay_chunk(path: str, start: int, end: int, fmt: str,
+                  timestamp: Optional[float]) -> Tuple[bytes, Counter]:
+    """Decide every line in [start, end) and return (encoded output, summary counts)"""
+    if _agent is None:
+        _init_worker()
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+
+    counts: Counter = Counter()
+    out = io.BytesIO()
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="") if fmt == "csv" else None
+    writer = csv.writer(text, lineterminator="\n") if text else None
+
+    for line in data.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            response, shared = _agent.resolve(json.loads(line))
+        except ValueError as e:
+            response, shared = _agent._noop_response(f"Malformed JSON line: {str(e)}", "unknown"), False
+        except Exception as e:
+            response, shared = _agent._noop_response(f"Invalid request: {str(e)}", "unknown"), False
+
+        stamp = time.time() if timestamp is None else timestamp
+        counts[(response["environment"], response["action"], response["safety_filtered"])] += 1
+
+        if writer:
+            row = dict(response, timestamp=stamp)
+            writer.writerow([row.get(column, "") for column in CSV_COLUMNS])
+        else:
+            out.write(_encoder.encode(response, shared, stamp))
+
+    if text:
+        text.flush()
+    return out.getvalue(), counts
+
+def replay(input_path: str, output_path: str, fmt: str = "jsonl", jobs: int = 0,
+           chunk_size: int = 8 << 20, timestamp: Optional[float] = None,
+           policy: str = "builtin") -> Counter:
+    """
+    Replay input_path into output_path under policy ('builtin' or a policy
+    file) and return (environment, action, safety_filtered) counts
+    """
+    # Fail here with PolicyFileError rather than as a broken pool in every worker
+    load_table(RLDecisionBrain(), policy)
+    jobs = jobs or os.cpu_count() or 1
+    max_in_flight = jobs * 2
+    totals: Counter = Counter()
+
+    with open(output_path, "wb") as out, \
+            ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                initargs=(policy,)) as pool:
+        if fmt == "csv":
+            out.write((",".join(CSV_COLUMNS) + "\n").encode())
+
+        pending = deque()
+        for start, end in chunk_ranges(input_path, chunk_size):
+            pending.append(pool.submit(_replay_chunk, input_path, start, end, fmt, timestamp))
+            if len(pending) >= max_in_flight:
+                data, counts = pending.popleft().result()
+                out.write(data)
+                totals.update(counts)
+        while pending:
+            data, counts = pending.popleft().result()
+            out.write(data)
+            totals.update(counts)
+
+    return totals
+
+def print_summary(totals: Counter) -> None:
+    """Print action counts per environment and per safety_filtered value"""
+    by_env: Counter = Counter()
+    by_filtered: Counter = Counter()
+    for (environment, action, filtered), count in totals.items():
+        by_env[(environment, action)] += count
+        by_filtered[filtered] += count
+
+    print(f"Decisions: {sum(totals.values())}")
+    print("\nBy environment / action:")
+    for (environment, action), count in sorted(by_env.items()):
+        print(f"  {environment:<12} {action:<12} {count:>12,}")
+    print("\nBy safety_filtered:")
+    for filtered, count in sorted(by_filtered.items()):
+        print(f"  {str(filtered).lower():<25} {count:>12,}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a JSONL request log through RLDecisionBrain")
+    parser.add_argument("input", help="JSONL file, one /decide request object per line")
+    parser.add_argument("output", help="output file for decisions")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=8 << 20, help="bytes per work unit")
+    parser.add_argument("--timestamp", type=float,
+                        help="stamp every decision with this value (byte-reproducible output)")
+    parser.add_argument("--policy", default="builtin", help="policy file or 'builtin' (default)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    totals = replay(args.input, args.output, args.format, args.jobs, args.chunk_size, args.timestamp,
+                    args.policy)
+    elapsed = time.perf_counter() - started
+
+    print_summary(totals)
+    print(f"\nWrote {args.output} in {elapsed:.2f}s", file=sys.stderr)
@@ -0,0 +1,141 @@
+"""
+Request Schema Validation for RL Decision Brain
+Declarative schema compiled once into specialised validation functions
+
+A schema maps field name -> spec:
+    {"type": "string" | "number" | "object", "required": bool,
+     "min": number, "max": number,      (numbers, inclusive)
+     "fields": {...}}                   (objects: nested schema)
+
+compile_schema() generates straight-line Python for one schema: field
+names, bounds and messages become constants, no spec is interpreted per
+request. Checks run in a fixed order - the top-level type, then required
+fields, then each present field's type and range in schema order - so
+validate() returns the first entry of validate_all(). Unknown fields are
+allowed. "number" accepts int and float (and subclasses such as numpy
+floats) but not bool; NaN fails any range.
+"""
+
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+TYPE_CHECKS = {
+    "string": ("not isinstance({0}, str)", "a string"),
+    # Exact float/int first: the common JSON case costs two identity checks
+    "number": ("(type({0}) is not float and type({0}) is not int"
+               " and (type({0}) is bool or not isinstance({0}, (int, float))))", "a number"),
+    "object": ("not isinstance({0}, dict)", "an object"),
+}
+
+REQUEST_SCHEMA: Dict[str, Dict[str, Any]] = {
+    "environment": {"type": "string", "required": True},
+    "event_type": {"type": "string", "required": True},
+    "metrics": {"type": "object", "required": True, "fields": {
+        "cpu_percent": {"type": "number", "min": 0, "max": 100},
+        "memory_percent": {"type": "number", "min": 0, "max": 100},
+        "error_rate": {"type": "number", "min": 0, "max": 1},
+    }},
+}
+
+class SchemaError(ValueError):
+    """Raised when a schema definition is invalid"""
+
+class CompiledSchema:
+    """
+    Validators generated for one schema
+
+    validate(request) -> first error message or None
+    validate_all(request) -> every error message ([] if valid)
+    validate_batch(requests) -> first error message or None per request
+    """
+
+    def __init__(self, schema: Mapping[str, Mapping[str, Any]]):
+        _check_schema(schema, "")
+        self.schema = schema
+        self.source = "\n\n".join([
+            _function("validate", ["request"], _body(schema, "return {}", True)),
+            _function("validate_all", ["request"], ["errors = []"] + _body(schema, "errors.append({})", False)
+                      + ["return errors"]),
+            _function("validate_batch", ["requests"],
+                      ["results = []", "append = results.append", "for request in requests:"]
+                      + ["    " + line for line in _body(schema, "append({}); continue", True) + ["append(None)"]]
+                      + ["return results"]),
+        ])
+        namespace: Dict[str, Any] = {}
+        exec(compile(self.source, "<request_schema>", "exec"), namespace)
+        self.validate: Callable[[Any], Optional[str]] = namespace["validate"]
+        self.validate_all: Callable[[Any], List[str]] = namespace["validate_all"]
+        self.validate_batch: Callable[[Sequence[Any]], List[Optional[str]]] = namespace["validate_batch"]
+
+def compile_schema(schema: Mapping[str, Mapping[str, Any]]) -> CompiledSchema:
+    """Validate a schema definition and generate its validators; raises SchemaError"""
+    return CompiledSchema(schema)
+
+def _check_schema(schema: Mapping[str, Mapping[str, Any]], prefix: str):
+    for name, spec in schema.items():
+        if spec.get("type") not in TYPE_CHECKS:
+            raise SchemaError(f"Field {prefix}{name}: type must be one of {sorted(TYPE_CHECKS)}")
+        unknown = set(spec) - {"type", "required", "min", "max", "fields"}
+        if unknown:
+            raise SchemaError(f"Field {prefix}{name}: unknown keys {sorted(unknown)}")
+        if ("min" in spec or "max" in spec) and spec["type"] != "number":
+            raise SchemaError(f"Field {prefix}{name}: min/max apply to numbers only")
+        if "fields" in spec:
+            if spec["type"] != "object":
+                raise SchemaError(f"Field {prefix}{name}: fields apply to objects only")
+            _check_schema(spec["fields"], f"{prefix}{name}.")
+
+def _function(name: str, args: List[str], body: List[str]) -> str:
+    return f"def {name}({', '.join(args)}):\n" + "\n".join("    " + line for line in body)
+
+def _body(schema: Mapping[str, Mapping[str, Any]], fail: str, exits: bool) -> List[str]:
+    """
+    Statements validating `request`; fail is a format string for the failure
+    statement and exits tells whether it leaves the validation (fail-fast)
+    """
+    lines = ["if not isinstance(request, dict):", "    " + fail.format(repr("Request must be a JSON object")), "else:"]
+    return lines + ["    " + line for line in _object_checks(schema, "request", fail, exits, "", 0)]
+
+def _object_checks(schema: Mapping[str, Mapping[str, Any]], target: str, fail: str, exits: bool,
+                   prefix: str, depth: int) -> List[str]:
+    """Presence checks for required fields, then per-field checks; target is known to be a dict"""
+    lines = []
+    for name, spec in schema.items():
+        if spec.get("required"):
+            lines += [f"if {name!r} not in {target}:",
+                      "    " + fail.format(repr(f"Missing required field: {prefix}{name}"))]
+
+    for name, spec in schema.items():
+        value = f"v{depth}"
+        checks = _field_checks(spec, value, fail, exits, f"{prefix}{name}", depth)
+        if spec.get("required") and exits:
+            # Presence was checked above and failing left the validation
+            lines += [f"{value} = {target}[{name!r}]"] + checks
+        else:
+            # Optional fields are checked only when present; in collect-all mode a
+            # missing required field has already been reported and must not be read
+            lines += [f"if {name!r} in {target}:", f"    {value} = {target}[{name!r}]"]
+            lines += ["    " + line for line in checks]
+    return lines
+
+def _field_checks(spec: Mapping[str, Any], value: str, fail: str, exits: bool,
+                  path: str, depth: int) -> List[str]:
+    """Type check, then range or nested checks that only run when the type matched"""
+    condition, noun = TYPE_CHECKS[spec["type"]]
+    lines = [f"if {condition.format(value)}:", "    " + fail.format(repr(f"Field '{path}' must be {noun}"))]
+    nested = []
+    if spec["type"] == "number" and ("min" in spec or "max" in spec):
+        low, high = spec.get("min"), spec.get("max")
+        if low is not None and high is not None:
+            bound, message = f"{low!r} <= {value} <= {high!r}", f"between {low} and {high}"
+        elif low is not None:
+            bound, message = f"{value} >= {low!r}", f"at least {low}"
+        else:
+            bound, message = f"{value} <= {high!r}", f"at most {high}"
+        nested = [f"if not {bound}:", "    " + fail.format(repr(f"Field '{path}' must be {message}"))]
+    elif spec["type"] == "object" and spec.get("fields"):
+        nested = _object_checks(spec["fields"], value, fail, exits, f"{path}.", depth + 1)
+    if nested:
+        lines += ["else:"] + ["    " + line for line in nested]
+    return lines
+
+REQUEST_VALIDATOR = compile_schema(REQUEST_SCHEMA)
@@ -0,0 +1,52 @@
+"""
+Pre-serialized Response Cache for RL Decision Brain
+Encodes decision responses to the same bytes as Flask's jsonify
+"""
+
+import json
+from typing import Any, Dict, Tuple
+
+# Placeholder written into the timestamp field while building a template
+_TIMESTAMP_SENTINEL = "\x00timestamp\x00"
+_ENCODED_SENTINEL = json.dumps(_TIMESTAMP_SENTINEL)
+
+def dumps(response: Any) -> str:
+    """Serialize exactly like Flask's default JSON provider in non-debug mode"""
+    return json.dumps(response, sort_keys=True, separators=(",", ":")) + "\n"
+
+class ResponseEncoder:
+    """
+    Encodes decision responses to JSON bytes
+
+    Shared responses (compiled table entries from RLDecisionBrain.resolve) are
+    serialized once into a (prefix, suffix) byte template; each request only
+    splices in its timestamp. Everything else goes through dumps().
+    """
+
+    def __init__(self, max_templates: int = 1024):
+        self.max_templates = max_templates
+        self._templates: Dict[int, Tuple[Dict[str, Any], bytes, bytes]] = {}
+
+    def encode(self, response: Dict[str, Any], shared: bool, timestamp: float) -> bytes:
+        """Return the JSON body for response stamped with timestamp"""
+        if not shared:
+            response["timestamp"] = timestamp
+            return dumps(response).encode()
+
+        entry = self._templates.get(id(response))
+        if entry is None or entry[0] is not response:
+            entry = self._compile(response)
+        return entry[1] + float.__repr__(timestamp).encode() + entry[2]
+
+    def _compile(self, response: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes, bytes]:
+        """Build and remember the byte template for a shared response"""
+        stamped = dict(response)
+        stamped["timestamp"] = _TIMESTAMP_SENTINEL
+        prefix, suffix = dumps(stamped).split(_ENCODED_SENTINEL)
+
+        if len(self._templates) >= self.max_templates:
+            self._templates.clear()
+        # Holding the response keeps its id() from being reused while cached
+        entry = (response, prefix.encode(), suffix.encode())
+        self._templates[id(response)] = entry
+        return entry
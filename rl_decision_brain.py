@@ -3,10 +3,12 @@ RL Decision Brain - Production-Hardened Demo-Frozen Agent
 Stateless | Deterministic | Safety-Caged
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, FrozenSet, List, Mapping, Optional, Set, Tuple
 from enum import Enum
 import time
 
+from request_schema import REQUEST_VALIDATOR
+
 class Environment(Enum):
     DEV = "dev"
     STAGE = "stage"
@@ -18,6 +20,34 @@ class Action(Enum):
     SCALE_DOWN = "scale_down"
     RESTART = "restart"
 
+class _DecisionTable:
+    """
+    Dense decision table compiled from DECISION_MAP (or a rule policy) and ACTION_SCOPE
+    
+    Environments and event types are interned to integer ids; rows[env_id][event_id]
+    holds the finished response for that pair with a placeholder timestamp. With a
+    metric-aware policy, pairs whose outcome depends on metrics hold None and are
+    resolved through policy.evaluate() into rule_outcomes.
+    
+    A table is never mutated after compilation: a new policy version is installed
+    by replacing the brain's reference to the whole table.
+    """
+    
+    __slots__ = ("environments", "env_ids", "event_ids", "rows", "policy", "rule_outcomes",
+                 "scope", "version")
+    
+    def __init__(self, environments: List[Environment], event_types: List[str],
+                 rows: List[List[Optional[Dict[str, Any]]]], scope: Dict[Environment, FrozenSet[Action]],
+                 version: str, policy: Any = None, rule_outcomes: Optional[List[Dict[str, Any]]] = None):
+        self.environments = environments
+        self.env_ids = {environment.value: env_id for env_id, environment in enumerate(environments)}
+        self.event_ids = {event_type: event_id for event_id, event_type in enumerate(event_types)}
+        self.rows = rows
+        self.scope = scope
+        self.version = version
+        self.policy = policy
+        self.rule_outcomes = rule_outcomes
+
 class RLDecisionBrain:
     """
     Demo-frozen RL agent with hard safety guarantees
@@ -49,6 +79,18 @@ class RLDecisionBrain:
         ("prod", "low_load"): Action.NOOP,
     }
     
+    def __init__(self, policy: Any = None, collect_errors: bool = False):
+        """
+        policy: optional policy used in place of DECISION_MAP, either a metric-aware
+        rule set (policy_rules.RulePolicy) or learned weights (frozen_policy.FrozenPolicy).
+        Its proposals still pass the ACTION_SCOPE filter.
+        collect_errors: NOOP responses to invalid requests also list every schema
+        violation under "validation_errors" (the reason is always the first one).
+        """
+        self.collect_errors = collect_errors
+        # Decisions are pure functions of (environment, event_type[, metrics]): compile once
+        self._table = self.compile_policy(policy)
+    
     def decide(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make stateless decision based on request
@@ -71,81 +113,256 @@ class RLDecisionBrain:
             "demo_frozen": true,
             "timestamp": float,
             "environment": str,
-            "safety_filtered": bool
+            "safety_filtered": bool,
+            "policy_version": str
         }
         """
-        # Validate input
+        response, shared = self.resolve(request)
+        if shared:
+            response = response.copy()
+        response["timestamp"] = time.time()
+        return response
+    
+    def resolve(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Resolve a request to its response without copying or stamping it
+        
+        Returns (response, shared). A shared response is an entry of the
+        compiled decision table: it must be treated as read-only and its
+        timestamp is a placeholder. Non-shared responses are fresh objects.
+        """
         validation_error = self._validate_request(request)
         if validation_error:
-            return self._noop_response(validation_error, request.get("environment", "unknown"))
+            return self._invalid_response(request, validation_error), False
+        
+        return self.resolve_valid(request)
+    
+    def resolve_valid(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """resolve() for a request that already passed _validate_request()"""
+        return self._lookup(request["environment"].lower(), request["event_type"].lower(), request["metrics"])
+    
+    def decide_batch(self, requests: List[Dict[str, Any]],
+                     validation_errors: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Make stateless decisions for a list of requests
         
-        env_str = request["environment"].lower()
-        event_type = request["event_type"].lower()
+        Each item uses the /decide input schema. Results are returned in
+        input order; an invalid item becomes a NOOP response for that item
+        only. All results in a batch share one timestamp. validation_errors,
+        when given, is REQUEST_VALIDATOR.validate_batch(requests) computed
+        by the caller.
+        """
+        timestamp = time.time()
+        results: List[Optional[Dict[str, Any]]] = []
+        table = self._table
+        dynamic: List[Tuple[int, int, Dict[str, Any]]] = []
+        if validation_errors is None:
+            validation_errors = REQUEST_VALIDATOR.validate_batch(requests)
+        
+        for request, validation_error in zip(requests, validation_errors):
+            if validation_error:
+                results.append(self._invalid_response(request, validation_error, timestamp))
+                continue
+            
+            env_str = request["environment"].lower()
+            event_type = request["event_type"].lower()
+            env_id = table.env_ids.get(env_str)
+            event_id = table.event_ids.get(event_type)
+            if table.policy is not None and env_id is not None and event_id is not None \
+                    and table.rows[env_id][event_id] is None:
+                # Metric-dependent: evaluated for the whole batch at once below
+                dynamic.append((len(results), env_id * len(table.event_ids) + event_id, request["metrics"]))
+                results.append(None)
+                continue
+            
+            response, shared = self._lookup(env_str, event_type, request["metrics"])
+            if shared:
+                response = response.copy()
+            response["timestamp"] = timestamp
+            results.append(response)
+        
+        if dynamic:
+            rule_ids = table.policy.evaluate_many([slot for _, slot, _ in dynamic],
+                                                  [metrics for _, _, metrics in dynamic])
+            for (index, _, _), rule_id in zip(dynamic, rule_ids):
+                response = table.rule_outcomes[rule_id].copy()
+                response["timestamp"] = timestamp
+                results[index] = response
         
-        # Parse environment
-        try:
-            environment = Environment(env_str)
-        except ValueError:
-            return self._noop_response(f"Invalid environment: {env_str}", env_str)
+        return results
+    
+    def _lookup(self, env_str: str, event_type: str,
+                metrics: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Return (response, shared) for a normalized (environment, event_type)"""
+        table = self._table
+        env_id = table.env_ids.get(env_str)
+        if env_id is None:
+            return self._noop_response(f"Invalid environment: {env_str}", env_str), False
         
-        # Get proposed action from frozen decision map
-        decision_key = (env_str, event_type)
-        proposed_action = self.DECISION_MAP.get(decision_key, Action.NOOP)
+        event_id = table.event_ids.get(event_type)
+        if event_id is None:
+            # Event types outside the compiled vocabulary carry their own name in the reason
+            return self._outcome(table.environments[env_id], event_type, Action.NOOP, None,
+                                 table.scope, table.version), False
+        
+        response = table.rows[env_id][event_id]
+        if response is None:
+            rule_id = table.policy.evaluate_metrics(env_id * len(table.event_ids) + event_id, metrics)
+            response = table.rule_outcomes[rule_id]
+        return response, True
+    
+    def compile_policy(self, policy: Any = None,
+                       decision_map: Optional[Mapping[Tuple[str, str], Action]] = None,
+                       action_scope: Optional[Mapping[Environment, Set[Action]]] = None,
+                       version: Optional[str] = None) -> "_DecisionTable":
+        """
+        Validate and compile a policy into a decision table without installing it
+        
+        decision_map replaces DECISION_MAP and action_scope replaces ACTION_SCOPE
+        per environment. A replacement scope may only remove actions from
+        ACTION_SCOPE, never allow new ones. Raises ValueError if invalid.
+        """
+        if policy is not None and decision_map is not None:
+            raise ValueError("Give either a policy or a decision map, not both")
+        
+        scope = {environment: frozenset(self.ACTION_SCOPE[environment]) for environment in Environment}
+        for environment, actions in (action_scope or {}).items():
+            actions = frozenset(actions)
+            widened = actions - scope[environment]
+            if widened:
+                raise ValueError(f"Action scope for {environment.value} cannot allow "
+                                 f"{sorted(action.value for action in widened)}")
+            if Action.NOOP not in actions:
+                raise ValueError(f"Action scope for {environment.value} must allow noop")
+            scope[environment] = actions
+        
+        if policy is not None:
+            return self._compile_table(policy, None, scope, policy.version)
+        return self._compile_table(None, self.DECISION_MAP if decision_map is None else decision_map,
+                                   scope, version or "builtin")
+    
+    def install_policy(self, table: "_DecisionTable") -> None:
+        """
+        Make a compiled table the active policy
+        
+        A single reference assignment: each call reads self._table once, so an
+        in-flight decision finishes on the table it started with.
+        """
+        self._table = table
+    
+    def _compile_table(self, policy: Any, decision_map: Optional[Mapping[Tuple[str, str], Action]],
+                       scope: Dict[Environment, FrozenSet[Action]], version: str) -> "_DecisionTable":
+        """Precompute the safety-filtered response for every known (environment, event_type)"""
+        environments = list(Environment)
+        if policy is None:
+            event_types = list(dict.fromkeys(event_type for _, event_type in decision_map))
+            rows = [
+                [
+                    self._outcome(environment, event_type,
+                                  decision_map.get((environment.value, event_type), Action.NOOP), None,
+                                  scope, version)
+                    for event_type in event_types
+                ]
+                for environment in environments
+            ]
+            return _DecisionTable(environments, event_types, rows, scope, version)
+        
+        # One finished response per rule; pairs with an unconditional first rule are static
+        rule_outcomes = [
+            self._outcome(Environment(rule.environment), rule.event_type, rule.action, rule.reason,
+                          scope, version)
+            for rule in policy.rules
+        ]
+        event_types = policy.event_types
+        rows = []
+        for env_id, environment in enumerate(environments):
+            row = []
+            for event_id in range(len(event_types)):
+                rule_id = policy.static_rule(env_id * len(event_types) + event_id)
+                row.append(None if rule_id is None else rule_outcomes[rule_id])
+            rows.append(row)
+        return _DecisionTable(environments, event_types, rows, scope, version, policy, rule_outcomes)
+    
+    def _outcome(self, environment: Environment, event_type: str, proposed_action: Action,
+                 reason: Optional[str], scope: Mapping[Environment, FrozenSet[Action]],
+                 version: str) -> Dict[str, Any]:
+        """Apply the safety filter to a proposed action and build the unstamped response"""
+        env_str = environment.value
         
         # Safety filter: enforce action scope
-        allowed_actions = self.ACTION_SCOPE[environment]
+        allowed_actions = scope[environment]
         if proposed_action not in allowed_actions:
             return {
                 "action": Action.NOOP.value,
                 "reason": f"Action {proposed_action.value} not allowed in {env_str}, downgraded to NOOP",
                 "demo_frozen": True,
-                "timestamp": time.time(),
+                "timestamp": 0.0,
                 "environment": env_str,
                 "safety_filtered": True,
-                "proposed_action": proposed_action.value
+                "proposed_action": proposed_action.value,
+                "policy_version": version
             }
         
         # Emit safe action
         return {
             "action": proposed_action.value,
-            "reason": f"Deterministic decision for {event_type} in {env_str}",
+            "reason": reason or f"Deterministic decision for {event_type} in {env_str}",
             "demo_frozen": True,
-            "timestamp": time.time(),
+            "timestamp": 0.0,
             "environment": env_str,
-            "safety_filtered": False
+            "safety_filtered": False,
+            "policy_version": version
         }
     
     def _validate_request(self, request: Dict[str, Any]) -> Optional[str]:
-        """Validate request schema"""
-        if not isinstance(request, dict):
-            return "Request must be a JSON object"
-        
-        if "environment" not in request:
-            return "Missing required field: environment"
-        
-        if "event_type" not in request:
-            return "Missing required field: event_type"
-        
-        if "metrics" not in request:
-            return "Missing required field: metrics"
-        
-        metrics = request["metrics"]
-        if not isinstance(metrics, dict):
-            return "Field 'metrics' must be an object"
-        
-        return None
+        """Validate request schema (request_schema.REQUEST_SCHEMA); first error or None"""
+        return REQUEST_VALIDATOR.validate(request)
+    
+    def validation_errors(self, request: Any) -> List[str]:
+        """Every schema violation of a request, in check order ([] if valid)"""
+        return REQUEST_VALIDATOR.validate_all(request)
     
-    def _noop_response(self, reason: str, environment: str) -> Dict[str, Any]:
+    def _invalid_response(self, request: Any, reason: str,
+                          timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """NOOP response for a request that failed validation"""
+        env = request.get("environment") if isinstance(request, dict) else None
+        response = self._noop_response(reason, env if isinstance(env, str) else "unknown", timestamp)
+        if self.collect_errors:
+            response["validation_errors"] = REQUEST_VALIDATOR.validate_all(request)
+        return response
+    
+    def _noop_response(self, reason: str, environment: str,
+                       timestamp: Optional[float] = None) -> Dict[str, Any]:
         """Generate NOOP response with reason"""
         return {
             "action": Action.NOOP.value,
             "reason": reason,
             "demo_frozen": True,
-            "timestamp": time.time(),
+            "timestamp": time.time() if timestamp is None else timestamp,
             "environment": environment,
-            "safety_filtered": False
+            "safety_filtered": False,
+            "policy_version": self._table.version
+        }
+    
+    def event_types(self) -> List[str]:
+        """Event types with a compiled decision (others always decide NOOP)"""
+        return list(self._table.event_ids)
+    
+    def scope_listing(self) -> Dict[str, List[str]]:
+        """Allowed action names per environment, in Action declaration order"""
+        scope = self._table.scope
+        return {
+            environment.value: [action.value for action in Action if action in scope[environment]]
+            for environment in Environment
         }
     
+    def policy_info(self) -> Dict[str, Any]:
+        """Kind and version of the active decision policy"""
+        table = self._table
+        if table.policy is None:
+            return {"kind": "decision_map", "version": table.version}
+        return table.policy.describe()
+    
     def health_check(self) -> Dict[str, Any]:
         """Health check endpoint"""
         return {
@@ -153,5 +370,6 @@ class RLDecisionBrain:
             "demo_frozen": True,
             "learning_enabled": False,
             "exploration_enabled": False,
-            "stateless": True
+            "stateless": True,
+            "policy": self.policy_info()
         }
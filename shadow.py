@@ -0,0 +1,258 @@
+"""
+Shadow Policy Evaluation for RL Decision Brain
+Candidate policies decide the same live requests off the request path
+
+The request thread only appends (payload, served response, time) to a
+bounded deque and returns the served decision; when the deque is full the
+item is dropped and counted instead of queueing more work. A small pool of
+daemon threads takes items in batches, resolves each through every
+candidate brain and records, per candidate and (environment, event_type),
+how often the candidate agrees with the served action, the action
+transitions where it does not, its decision latency and the queue lag.
+
+Pool threads share the process (and the GIL) with the request threads, so
+they take small batches and yield the GIL between them: a request thread
+waits at most one batch (a few microseconds per candidate and item) rather
+than a full interpreter switch interval. Only requests the primary
+answered normally are shadowed (the app skips invalid and coalesced ones).
+
+Candidates are policy files in any format policy_reload.py accepts:
+    RL_BRAIN_SHADOW_POLICIES="rules-v2=rules.json,learned=policy.npy"
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rl_decision_brain import RLDecisionBrain
+
+# Latency histogram upper bounds (microseconds); percentiles report the bucket bound
+LATENCY_BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000, 1000000)
+
+def load_candidates(spec: str, primary: RLDecisionBrain) -> Dict[str, RLDecisionBrain]:
+    """Parse "name=path,..." (or bare paths, named by file name) into candidate brains"""
+    from policy_reload import load_policy_file
+
+    candidates = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, path = item.rpartition("=")
+        name = name.strip() or os.path.splitext(os.path.basename(path))[0]
+        if name in candidates:
+            raise ValueError(f"Duplicate shadow policy name: {name}")
+        brain = RLDecisionBrain(collect_errors=primary.collect_errors)
+        brain.install_policy(load_policy_file(brain, path.strip()))
+        candidates[name] = brain
+    return candidates
+
+def _percentile(histogram: List[int], q: float) -> Optional[float]:
+    """Upper bucket bound (microseconds) below which a fraction q of observations fall"""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank, seen = q * total, 0
+    for bound, count in zip(LATENCY_BUCKETS_US + (float("inf"),), histogram):
+        seen += count
+        if seen >= rank:
+            return float(bound)
+    return float("inf")
+
+class _WorkerStats:
+    """Counts written by a single pool thread"""
+
+    __slots__ = ("outcomes", "latency", "lag", "errors")
+
+    def __init__(self):
+        # (candidate, environment, event_type, served action, candidate action) -> count
+        self.outcomes: Dict[Tuple[str, str, str, str, str], int] = {}
+        # candidate -> per-bucket counts of decision latency, then +Inf
+        self.latency: Dict[str, List[int]] = {}
+        self.lag = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.errors: Dict[str, int] = {}
+
+class ShadowEvaluator:
+    """Bounded, asynchronous comparison of candidate brains against the served decisions"""
+
+    def __init__(self, primary: RLDecisionBrain, candidates: Dict[str, RLDecisionBrain],
+                 workers: int = 1, queue_size: int = 10000, batch_size: int = 8,
+                 poll_interval: float = 0.05, on_drop: Optional[Callable[[], None]] = None):
+        """
+        workers=0 starts no pool threads: queued items are only evaluated by drain().
+        on_drop() is called on the request thread for every dropped item.
+        """
+        if not candidates:
+            raise ValueError("Shadow evaluation needs at least one candidate policy")
+        self.primary = primary
+        self.candidates = dict(candidates)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.on_drop = on_drop
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Empty queue, statistics and pool (at construction and in a forked worker)"""
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._stats: List[_WorkerStats] = []
+        self._pool: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._drain_stats: Optional[_WorkerStats] = None
+        self.dropped = 0
+
+    def submit(self, payload: Dict[str, Any], response: Dict[str, Any]) -> bool:
+        """
+        Queue one served decision for comparison; False if the queue is full.
+        A cooldown NOOP is compared as the policy's decision (its proposed_action).
+        """
+        queue = self._queue
+        if len(queue) >= self.queue_size:
+            with self._lock:
+                self.dropped += 1
+            if self.on_drop:
+                self.on_drop()
+            return False
+        served = response["proposed_action"] if response.get("cooldown") else response["action"]
+        queue.append((payload, served, time.perf_counter()))
+        if not self._pool and self.workers:
+            self._start_pool()
+        return True
+
+    def _start_pool(self):
+        with self._lock:
+            if not self._pool:
+                self._pool = [threading.Thread(target=self._work_loop, name=f"shadow-{i}", daemon=True)
+                              for i in range(self.workers)]
+                for thread in self._pool:
+                    thread.start()
+
+    def _work_loop(self):
+        stats = self._register()
+        stop = self._stop
+        while not stop.is_set():
+            if self._evaluate(stats):
+                # Hand the GIL back to request threads between batches
+                time.sleep(0)
+            else:
+                stop.wait(self.poll_interval)
+
+    def _register(self) -> _WorkerStats:
+        stats = _WorkerStats()
+        with self._lock:
+            self._stats.append(stats)
+        return stats
+
+    def _evaluate(self, stats: _WorkerStats) -> int:
+        """Evaluate up to batch_size queued items into stats; returns how many were taken"""
+        queue = self._queue
+        batch = []
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(queue.popleft())
+        except IndexError:
+            pass
+        if not batch:
+            return 0
+
+        now = time.perf_counter()
+        lag = stats.lag
+        for _, _, submitted in batch:
+            lag[bisect.bisect_left(LATENCY_BUCKETS_US, (now - submitted) * 1e6)] += 1
+
+        # Event types outside every vocabulary are folded to keep the statistics bounded
+        known = set(self.primary._table.event_ids)
+        for brain in self.candidates.values():
+            known.update(brain._table.event_ids)
+
+        outcomes = stats.outcomes
+        clock = time.perf_counter
+        for name, brain in self.candidates.items():
+            latency = stats.latency.get(name)
+            if latency is None:
+                latency = stats.latency[name] = [0] * (len(LATENCY_BUCKETS_US) + 1)
+            resolve = brain.resolve
+            for payload, served, _ in batch:
+                start = clock()
+                try:
+                    response, _ = resolve(payload)
+                except Exception:
+                    stats.errors[name] = stats.errors.get(name, 0) + 1
+                    continue
+                latency[bisect.bisect_left(LATENCY_BUCKETS_US, (clock() - start) * 1e6)] += 1
+                event_type = payload["event_type"].lower()
+                key = (name, response["environment"], event_type if event_type in known else "other",
+                       served, response["action"])
+                outcomes[key] = outcomes.get(key, 0) + 1
+        return len(batch)
+
+    def drain(self):
+        """Evaluate everything still queued on the calling thread"""
+        if self._drain_stats is None:
+            self._drain_stats = self._register()
+        while self._evaluate(self._drain_stats):
+            pass
+
+    def close(self):
+        """Stop the pool threads (queued items are left unevaluated)"""
+        self._stop.set()
+        for thread in self._pool:
+            if thread is not threading.current_thread():
+                thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Agreement per candidate and (environment, event_type), latency and queue state"""
+        with self._lock:
+            shards = list(self._stats)
+        outcomes: Dict[Tuple[str, str, str, str, str], int] = {}
+        latency: Dict[str, List[int]] = {}
+        lag = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        errors: Dict[str, int] = {}
+        for shard in shards:
+            for key, count in shard.outcomes.copy().items():
+                outcomes[key] = outcomes.get(key, 0) + count
+            for name, histogram in shard.latency.copy().items():
+                total = latency.setdefault(name, [0] * len(histogram))
+                latency[name] = [a + b for a, b in zip(total, histogram)]
+            lag = [a + b for a, b in zip(lag, shard.lag)]
+            for name, count in shard.errors.copy().items():
+                errors[name] = errors.get(name, 0) + count
+
+        candidates = {}
+        for name, brain in self.candidates.items():
+            pairs: Dict[str, Dict[str, Any]] = {}
+            for (candidate, environment, event_type, served, action), count in sorted(outcomes.items()):
+                if candidate != name:
+                    continue
+                pair = pairs.setdefault(f"{environment}/{event_type}", {"agree": 0, "disagree": 0})
+                if served == action:
+                    pair["agree"] += count
+                else:
+                    pair["disagree"] += count
+                    transitions = pair.setdefault("transitions", {})
+                    transitions[f"{served}->{action}"] = count
+            agree = sum(pair["agree"] for pair in pairs.values())
+            evaluated = agree + sum(pair["disagree"] for pair in pairs.values())
+            histogram = latency.get(name, [])
+            candidates[name] = {
+                "version": brain._table.version,
+                "evaluated": evaluated,
+                "errors": errors.get(name, 0),
+                "agreement": agree / evaluated if evaluated else None,
+                "latency_us": {"p50": _percentile(histogram, 0.5), "p99": _percentile(histogram, 0.99)},
+                "pairs": pairs,
+            }
+        return {
+            "primary_version": self.primary._table.version,
+            "queue": {"queued": len(self._queue), "capacity": self.queue_size,
+                      "workers": self.workers, "dropped": self.dropped},
+            "lag_us": {"p50": _percentile(lag, 0.5), "p99": _percentile(lag, 0.99)},
+            "candidates": candidates,
+        }
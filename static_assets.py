@@ -0,0 +1,61 @@
+"""
+Static Assets for RL Decision Brain
+Files served from memory as precompressed bytes with ETag revalidation
+
+An asset is read, gzip-compressed and hashed once per process, on its first
+request (or on load(), e.g. in the gunicorn master before forking), never
+at import. Responses carry a strong ETag and Cache-Control: no-cache, so
+browsers revalidate with If-None-Match and get an empty 304 while the file
+is unchanged. Clients accepting gzip (a q-value above 0, directly or via
+"*") get the compressed bytes under their own tag ("<hash>-gz"), so a cache
+never pairs one encoding's validator with the other's bytes; either tag
+revalidates, since both stand for the same file version. Both headers are parsed by Werkzeug, so
+entity tags are compared whole (weak comparison, as RFC 9110 specifies for
+If-None-Match) rather than as substrings.
+"""
+
+import hashlib
+import threading
+from typing import Optional, Tuple
+
+from flask import Request, Response
+
+class StaticAsset:
+    """One file held in memory as identity and gzip bodies"""
+
+    def __init__(self, path: str, mimetype: str):
+        self.path = path
+        self.mimetype = mimetype
+        self._lock = threading.Lock()
+        self._bodies: Optional[Tuple[bytes, bytes, str]] = None
+
+    def load(self) -> Tuple[bytes, bytes, str]:
+        """(identity bytes, gzip bytes, unquoted ETag), read and compressed on first use"""
+        bodies = self._bodies
+        if bodies is None:
+            with self._lock:
+                if self._bodies is None:
+                    import gzip
+                    with open(self.path, "rb") as f:
+                        raw = f.read()
+                    # mtime=0 keeps the compressed bytes identical across processes
+                    compressed = gzip.compress(raw, compresslevel=9, mtime=0)
+                    self._bodies = (raw, compressed, hashlib.sha256(raw).hexdigest()[:32])
+                bodies = self._bodies
+        return bodies
+
+    def serve(self, request: Request) -> Response:
+        """200 with the best encoding the client accepts, or 304 for a matching If-None-Match"""
+        raw, compressed, etag = self.load()
+        gzipped = request.accept_encodings["gzip"] > 0
+        tags = (f"{etag}-gz", etag) if gzipped else (etag, f"{etag}-gz")
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        for tag in tags:
+            if request.if_none_match.contains_weak(tag):
+                headers["ETag"] = f'"{tag}"'
+                return Response(status=304, headers=headers)
+        headers["ETag"] = f'"{tags[0]}"'
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            return Response(compressed, status=200, mimetype=self.mimetype, headers=headers)
+        return Response(raw, status=200, mimetype=self.mimetype, headers=headers)
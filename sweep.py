@@ -0,0 +1,238 @@
+"""
+What-If Policy Sweep for RL Decision Brain
+Vectorized evaluation of a policy over an environment x event x metric grid
+
+Run: python sweep.py [--policy FILE|builtin] [--against FILE|builtin]
+                     [--cpu 0:100:101] [--memory 0:100:101] [--error-rate 0:1:101]
+                     [--events disk_full,...] [--out surface.npz] [--report report.json]
+
+A sweep evaluates a compiled decision table (the same safety-filtered
+outcomes RLDecisionBrain serves) at every grid point without calling
+decide(): pairs whose outcome ignores metrics are broadcast over the grid,
+and metric-dependent pairs go through the policy's evaluate_grid() when it
+has one (rule sets: per-axis interval tests combined by broadcasting) or
+evaluate_batch() over the flattened grid in chunks. Policies are "builtin"
+(DECISION_MAP) or a policy file in any format policy_reload.py accepts.
+
+The result is a DecisionSurface: one uint8 per point, shape
+(environments, event_types, cpu_percent, memory_percent, error_rate),
+
+    code = action_id | proposed_action_id << 2     (Action declaration order)
+
+where the proposed action differs from the served one exactly when
+ACTION_SCOPE downgraded it. --report writes a JSON summary of the surface
+or, with --against, a diff between the two policies.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from rl_decision_brain import Action, RLDecisionBrain, _DecisionTable
+
+ACTIONS = [action.value for action in Action]
+ACTION_IDS = {action: action_id for action_id, action in enumerate(ACTIONS)}
+AXES = ("cpu_percent", "memory_percent", "error_rate")
+
+# Grid points per evaluate_batch() call, bounding temporary arrays to tens of MB
+CHUNK = 1 << 18
+
+def parse_axis(spec: str) -> np.ndarray:
+    """'start:stop:count' (inclusive linspace) or comma-separated values"""
+    if ":" in spec:
+        start, stop, count = spec.split(":")
+        if int(count) < 1:
+            raise ValueError(f"Axis {spec!r}: count must be at least 1")
+        return np.linspace(float(start), float(stop), int(count))
+    return np.array(sorted(float(value) for value in spec.split(",")))
+
+def outcome_code(response: Dict[str, Any]) -> int:
+    """Surface code of one table outcome"""
+    action = ACTION_IDS[response["action"]]
+    return action | ACTION_IDS[response.get("proposed_action", response["action"])] << 2
+
+class DecisionSurface:
+    """Decision tensor of one policy over a grid, with its axis labels"""
+
+    __slots__ = ("codes", "environments", "event_types", "axes", "version")
+
+    def __init__(self, codes: np.ndarray, environments: Sequence[str], event_types: Sequence[str],
+                 axes: Dict[str, np.ndarray], version: str):
+        self.codes = codes
+        self.environments = list(environments)
+        self.event_types = list(event_types)
+        self.axes = axes
+        self.version = version
+
+    @property
+    def actions(self) -> np.ndarray:
+        """Served action id per point"""
+        return self.codes & 3
+
+    @property
+    def downgraded(self) -> np.ndarray:
+        """True where ACTION_SCOPE replaced the proposed action with NOOP"""
+        return (self.codes >> 2) != (self.codes & 3)
+
+    def save(self, path: str):
+        np.savez_compressed(path, codes=self.codes, environments=np.array(self.environments),
+                            event_types=np.array(self.event_types), version=np.array(self.version),
+                            actions=np.array(ACTIONS), **self.axes)
+
+    @classmethod
+    def load(cls, path: str) -> "DecisionSurface":
+        with np.load(path) as data:
+            if list(data["actions"]) != ACTIONS:
+                raise ValueError(f"{path}: recorded with a different action set")
+            return cls(data["codes"], [str(e) for e in data["environments"]],
+                       [str(e) for e in data["event_types"]], {axis: data[axis] for axis in AXES},
+                       str(data["version"]))
+
+    def summary(self) -> Dict[str, Any]:
+        """Share of grid points per action and downgraded points, per environment and event type"""
+        points = int(np.prod([len(self.axes[axis]) for axis in AXES]))
+        actions, downgraded = self.actions, self.downgraded
+        pairs = {}
+        for env_id, environment in enumerate(self.environments):
+            for event_id, event_type in enumerate(self.event_types):
+                counts = np.bincount(actions[env_id, event_id].ravel(), minlength=len(ACTIONS))
+                pairs[f"{environment}/{event_type}"] = {
+                    "actions": {ACTIONS[a]: int(n) for a, n in enumerate(counts) if n},
+                    "downgraded": int(downgraded[env_id, event_id].sum()),
+                }
+        return {"version": self.version, "points_per_pair": points,
+                "axes": {axis: _axis_info(self.axes[axis]) for axis in AXES}, "pairs": pairs}
+
+def sweep(table: _DecisionTable, axes: Dict[str, np.ndarray],
+          event_types: Optional[Sequence[str]] = None) -> DecisionSurface:
+    """
+    Evaluate table at every grid point; event_types defaults to the table's
+    vocabulary, and event types outside it decide NOOP as in RLDecisionBrain
+    """
+    event_types = list(table.event_ids) if event_types is None else [e.lower() for e in event_types]
+    grid_shape = tuple(len(axes[axis]) for axis in AXES)
+    codes = np.zeros((len(table.environments), len(event_types)) + grid_shape, dtype=np.uint8)
+
+    values = None
+    policy = table.policy
+    if policy is not None:
+        rule_codes = np.array([outcome_code(outcome) for outcome in table.rule_outcomes], dtype=np.uint8)
+        scale = np.asarray(getattr(policy, "metric_scale", (1.0, 1.0, 1.0)), dtype=np.float64)
+
+    n_events = len(table.event_ids)
+    for env_id in range(len(table.environments)):
+        for column, event_type in enumerate(event_types):
+            event_id = table.event_ids.get(event_type)
+            if event_id is None:
+                continue   # NOOP, code 0
+            response = table.rows[env_id][event_id]
+            if response is not None:
+                codes[env_id, column] = outcome_code(response)
+                continue
+
+            slot = env_id * n_events + event_id
+            if hasattr(policy, "evaluate_grid"):
+                codes[env_id, column] = rule_codes[policy.evaluate_grid(slot, [axes[axis] for axis in AXES])]
+                continue
+
+            if values is None:
+                mesh = np.meshgrid(*(axes[axis] for axis in AXES), indexing="ij")
+                values = np.stack([m.ravel() for m in mesh], axis=1) / scale
+            out = codes[env_id, column].reshape(-1)
+            for start in range(0, len(values), CHUNK):
+                chunk = values[start:start + CHUNK]
+                rule_ids = policy.evaluate_batch(np.full(len(chunk), slot, dtype=np.intp), chunk)
+                out[start:start + len(chunk)] = rule_codes[rule_ids]
+
+    return DecisionSurface(codes, [environment.value for environment in table.environments],
+                           event_types, dict(axes), table.version)
+
+def diff_surfaces(before: DecisionSurface, after: DecisionSurface) -> Dict[str, Any]:
+    """
+    Changed points between two surfaces of the same grid and labels: counts,
+    action transitions and the metric bounding box of the change per pair
+    """
+    if before.environments != after.environments or before.event_types != after.event_types \
+            or any(not np.array_equal(before.axes[axis], after.axes[axis]) for axis in AXES):
+        raise ValueError("Surfaces were swept over different grids")
+
+    old_actions, new_actions = before.actions, after.actions
+    changed = old_actions != new_actions
+    old_down, new_down = before.downgraded, after.downgraded
+    pairs = {}
+    for env_id, environment in enumerate(before.environments):
+        for event_id, event_type in enumerate(before.event_types):
+            mask = changed[env_id, event_id]
+            downgrades = (int(old_down[env_id, event_id].sum()), int(new_down[env_id, event_id].sum()))
+            count = int(mask.sum())
+            if not count and downgrades[0] == downgrades[1]:
+                continue
+            entry: Dict[str, Any] = {"changed": count, "downgraded": {"before": downgrades[0], "after": downgrades[1]}}
+            if count:
+                transitions = np.bincount(
+                    (old_actions[env_id, event_id][mask] * len(ACTIONS) + new_actions[env_id, event_id][mask]),
+                    minlength=len(ACTIONS) ** 2)
+                entry["transitions"] = {f"{ACTIONS[i // len(ACTIONS)]}->{ACTIONS[i % len(ACTIONS)]}": int(n)
+                                        for i, n in enumerate(transitions) if n}
+                entry["region"] = {}
+                for axis_index, axis in enumerate(AXES):
+                    others = tuple(i for i in range(len(AXES)) if i != axis_index)
+                    hit = np.flatnonzero(mask.any(axis=others))
+                    entry["region"][axis] = [float(before.axes[axis][hit[0]]), float(before.axes[axis][hit[-1]])]
+            pairs[f"{environment}/{event_type}"] = entry
+
+    return {
+        "before": before.version,
+        "after": after.version,
+        "points": int(changed.size),
+        "changed": int(changed.sum()),
+        "changed_fraction": float(changed.mean()) if changed.size else 0.0,
+        "pairs": pairs,
+    }
+
+def load_table(brain: RLDecisionBrain, spec: str) -> _DecisionTable:
+    """'builtin' (DECISION_MAP and ACTION_SCOPE) or a policy file"""
+    if spec == "builtin":
+        return brain.compile_policy()
+    from policy_reload import load_policy_file
+    return load_policy_file(brain, spec)
+
+def _axis_info(values: np.ndarray) -> Dict[str, Any]:
+    return {"min": float(values.min()), "max": float(values.max()), "count": int(len(values))}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep a policy over an environment x event x metric grid")
+    parser.add_argument("--policy", default="builtin", help="policy file or 'builtin' (default)")
+    parser.add_argument("--against", help="second policy: report the diff from --policy to it")
+    parser.add_argument("--cpu", default="0:100:101", help="cpu_percent axis, start:stop:count or list")
+    parser.add_argument("--memory", default="0:100:101", help="memory_percent axis")
+    parser.add_argument("--error-rate", default="0:1:101", help="error_rate axis")
+    parser.add_argument("--events", default="", help="extra comma-separated event types to include")
+    parser.add_argument("--out", help="save the --policy surface (and --against as OUT.after.npz)")
+    parser.add_argument("--report", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    brain = RLDecisionBrain()
+    axes = {"cpu_percent": parse_axis(args.cpu), "memory_percent": parse_axis(args.memory),
+            "error_rate": parse_axis(args.error_rate)}
+    tables = [load_table(brain, args.policy)] + ([load_table(brain, args.against)] if args.against else [])
+    # One event axis for both policies: the union of their vocabularies plus --events
+    event_types: List[str] = list(dict.fromkeys(
+        [e for table in tables for e in table.event_ids]
+        + [e.strip().lower() for e in args.events.split(",") if e.strip()]))
+    surfaces = [sweep(table, axes, event_types) for table in tables]
+
+    if args.out:
+        surfaces[0].save(args.out)
+        if len(surfaces) > 1:
+            surfaces[1].save(args.out[:-4] + ".after.npz" if args.out.endswith(".npz") else args.out + ".after")
+    report = diff_surfaces(*surfaces) if len(surfaces) > 1 else surfaces[0].summary()
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
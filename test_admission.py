@@ -0,0 +1,118 @@
+"""
+Admission Control Test Suite
+Validates token buckets, prod crash priority, the in-flight limit and shed responses
+"""
+
+import logging
+
+import app as app_module
+from admission import AdmissionController, parse_budgets
+
+logging.disable(logging.INFO)
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _request(environment, event_type="high_cpu"):
+    return {"environment": environment, "event_type": event_type,
+            "metrics": {"cpu_percent": 90.0, "memory_percent": 50.0, "error_rate": 0.1}}
+
+def test_token_buckets():
+    """Test per-environment budgets refill, and prod crash borrows from stage and dev before shedding"""
+    assert parse_budgets("dev=10, prod=5:20") == {"dev": (10.0, 10.0), "prod": (5.0, 20.0)}
+    for spec in ("qa=1", "dev=1:0", "dev=fast"):
+        try:
+            parse_budgets(spec)
+            assert False, spec
+        except ValueError:
+            pass
+
+    clock = _Clock()
+    shed = []
+    controller = AdmissionController(parse_budgets("dev=1:2,stage=1:1,prod=1:1"), clock=clock,
+                                     on_shed=lambda environment, cause: shed.append((environment, cause)))
+    assert [controller.admit(_request("dev")) for _ in range(3)][:2] == [None, None]
+    assert shed == [("dev", "rate")]
+    assert controller.admit({"environment": "qa"}) is not None   # invalid environments are charged to dev
+    clock.now += 1.0
+    assert controller.admit(_request("DEV")) is None and controller.admit(_request("dev")) is not None
+
+    clock.now += 2.0   # dev refills to its burst of 2, stage and prod to 1
+    assert controller.admit(_request("prod")) is None
+    reason = controller.admit(_request("prod"))
+    assert reason.startswith("Load shed") and "prod" in reason   # only crash may borrow
+    assert [controller.admit(_request("prod", "crash")) for _ in range(3)] == [None] * 3   # stage, dev, dev
+    assert controller.admit(_request("prod", "crash")) is not None
+    assert controller.stats()["shed"] == {"dev/rate": 3, "prod/rate": 2}
+
+    unlimited = AdmissionController(parse_budgets("dev=0:1"), clock=clock)
+    assert all(unlimited.admit(_request("prod", "crash")) is None for _ in range(100))
+    print("[PASS] Token buckets shed per environment and prod crash last")
+
+def test_in_flight_limit():
+    """Test dev and stage are shed first when too many requests are in progress"""
+    controller = AdmissionController({}, max_in_flight=4, reserve=0.25)
+    for _ in range(3):
+        controller.enter()
+    assert controller.admit(_request("dev")) is None   # 3 in flight, soft limit 3
+    controller.enter()
+    assert "4 requests in progress" in controller.admit(_request("stage"))
+    assert controller.admit(_request("prod")) is None
+    assert controller.admit(_request("prod", "crash")) is None
+    controller.enter()   # past max_in_flight: only critical events get through
+    assert "5 requests in progress" in controller.admit(_request("prod", "high_cpu"))
+    assert controller.admit(_request("prod", "crash")) is None
+    for _ in range(5):
+        controller.leave()
+    assert controller.admit(_request("dev")) is None
+    assert controller.stats() == {"in_flight": 0, "shed": {"prod/in_flight": 1, "stage/in_flight": 1}, "tokens": {}}
+    print("[PASS] In-flight limit keeps a reserve for prod")
+
+def test_shed_responses():
+    """Test /decide, /decide/batch and /decide/stream answer over-budget requests with shed NOOPs"""
+    client = app_module.app.test_client()
+    app_module.admission = AdmissionController(parse_budgets("dev=0:1,stage=0:1,prod=0:1"),
+                                               max_in_flight=8, on_shed=app_module._count_shed)
+    try:
+        assert client.post('/decide', json=_request("dev")).get_json()["action"] == "scale_up"
+        shed = client.post('/decide', json=_request("dev")).get_json()
+        assert shed["action"] == "noop" and shed["shed"] is True and shed["environment"] == "dev"
+        assert shed["reason"] == "Load shed: dev over its admission budget"
+
+        batch = [_request("stage"), _request("stage"), _request("prod", "crash"), _request("prod", "crash")]
+        results = client.post('/decide/batch', json=batch).get_json()
+        assert [r["action"] for r in results] == ["scale_up", "noop", "restart", "noop"]
+        assert ["shed" in r for r in results] == [False, True, False, True]
+
+        body = b'{"environment": "dev", "event_type": "crash", "metrics": {}}\n'
+        line = client.post('/decide/stream', data=body).get_data()
+        assert b'"shed":true' in line
+
+        assert app_module.admission.in_flight == 0
+        text = client.get('/metrics').get_data(as_text=True)
+        assert 'rl_brain_shed_total{environment="dev",cause="rate"} 2' in text
+    finally:
+        app_module.admission = None
+    print("[PASS] Shed requests get a fast NOOP and are counted")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Admission Control Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing token buckets...")
+    test_token_buckets()
+
+    print("\n[2/3] Testing in-flight limit...")
+    test_in_flight_limit()
+
+    print("\n[3/3] Testing shed responses...")
+    test_shed_responses()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL ADMISSION TESTS PASSED")
+    print("=" * 60)
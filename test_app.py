@@ -0,0 +1,284 @@
+"""
+HTTP Service Test Suite
+Validates the Flask routes wrapping the agent
+"""
+
+import logging
+
+from flask import jsonify
+
+from app import agent, app, encoder
+from rl_decision_brain import Environment
+
+logging.disable(logging.INFO)
+
+def test_decide_batch_endpoint():
+    """Test /decide/batch returns one result per item, in order"""
+    client = app.test_client()
+
+    response = client.post('/decide/batch', json=[
+        {"environment": "dev", "event_type": "high_cpu",
+         "metrics": {"cpu_percent": 85, "memory_percent": 50, "error_rate": 0.01}},
+        {"environment": "dev", "event_type": "crash"},
+        {"environment": "prod", "event_type": "crash",
+         "metrics": {"cpu_percent": 10, "memory_percent": 20, "error_rate": 0.95}},
+    ])
+    assert response.status_code == 200
+    results = response.get_json()
+    assert [r["action"] for r in results] == ["scale_up", "noop", "restart"]
+    assert "Missing required field: metrics" in results[1]["reason"]
+    print("[PASS] /decide/batch preserves order, invalid item -> noop")
+
+def test_decide_batch_rejects_non_array():
+    """Test /decide/batch refuses a body that is not a JSON array"""
+    client = app.test_client()
+
+    response = client.post('/decide/batch', json={"environment": "dev"})
+    assert response.status_code == 400
+    assert response.get_json()["action"] == "noop"
+    print("[PASS] /decide/batch non-array body -> noop")
+
+def test_encoded_responses_match_jsonify():
+    """Test pre-encoded response bytes are identical to jsonify output"""
+    client = app.test_client()
+    metrics = {"cpu_percent": 50, "memory_percent": 50, "error_rate": 0.01}
+
+    payloads = [
+        {"environment": environment.value, "event_type": event_type, "metrics": metrics}
+        for environment in Environment
+        for event_type in ["high_cpu", "high_memory", "crash", "low_load", "disk_full"]
+    ]
+    payloads += [
+        {"environment": "invalid", "event_type": "crash", "metrics": metrics},
+        {"environment": "dev", "event_type": "crash"},
+    ]
+
+    with app.app_context():
+        for payload in payloads:
+            for _ in range(2):  # first call builds the template, second reuses it
+                response = client.post('/decide', json=payload)
+                assert response.status_code == 200
+                assert response.mimetype == 'application/json'
+                data = response.get_json()
+                assert response.data == jsonify(data).data, f"{response.data!r} != jsonify output"
+    print("[PASS] /decide pre-encoded bytes match jsonify")
+
+def test_encoder_splices_timestamp():
+    """Test shared templates only differ by timestamp"""
+    response, shared = agent.resolve({"environment": "prod", "event_type": "crash", "metrics": {}})
+    assert shared
+    first = encoder.encode(response, shared, 1.5)
+    second = encoder.encode(response, shared, 1234567890.123)
+    assert first.replace(b"1.5", b"1234567890.123") == second
+    assert response["timestamp"] == 0.0, "Shared template must not be mutated"
+    print("[PASS] Encoder splices timestamp into shared template")
+
+def test_decide_stream():
+    """Test /decide/stream answers each NDJSON line, malformed lines -> noop"""
+    import json
+    client = app.test_client()
+
+    lines = [
+        json.dumps({"environment": "dev", "event_type": "high_cpu",
+                    "metrics": {"cpu_percent": 85, "memory_percent": 50, "error_rate": 0.01}}),
+        "{not json",
+        "",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"environment": "prod", "event_type": "crash",
+                    "metrics": {"cpu_percent": 10, "memory_percent": 20, "error_rate": 0.95}}),
+    ]
+    response = client.post('/decide/stream', data="\n".join(lines) + "\n",
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    results = [json.loads(line) for line in response.data.splitlines()]
+    assert [r["action"] for r in results] == ["scale_up", "noop", "noop", "restart"]
+    assert results[1]["reason"].startswith("Malformed JSON line")
+    assert results[2]["reason"] == "Request must be a JSON object"
+    print("[PASS] /decide/stream one decision per line, malformed line -> noop")
+
+def test_asgi_matches_flask():
+    """Test the ASGI app returns the same JSON as the Flask app"""
+    import asyncio
+    import json
+    import asgi
+
+    def call(method, path, body=b""):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": method, "path": path}
+        asyncio.run(asgi.app(scope, receive, send))
+        return messages[0]["status"], messages[1]["body"]
+
+    client = app.test_client()
+    for path in ('/health', '/scope'):
+        status, body = call("GET", path)
+        assert status == 200
+        assert body == client.get(path).data, f"{path} differs between ASGI and Flask"
+
+    payload = {"environment": "prod", "event_type": "high_cpu",
+               "metrics": {"cpu_percent": 95, "memory_percent": 60, "error_rate": 0.01}}
+    status, body = call("POST", "/decide", json.dumps(payload).encode())
+    asgi_data = json.loads(body)
+    flask_data = client.post('/decide', json=payload).get_json()
+    assert status == 200
+    assert asgi_data.pop("timestamp") > 0 and flask_data.pop("timestamp") > 0
+    assert asgi_data == flask_data
+
+    status, _ = call("GET", "/missing")
+    assert status == 404
+
+    status, body = call("POST", "/decide", b" " * (asgi.MAX_BODY_SIZE + 1))
+    assert status == 413 and json.loads(body)["action"] == "noop"
+
+    # A client gone mid-body gets no response and no error log
+    async def disconnect():
+        return {"type": "http.disconnect"}
+
+    async def record(message):
+        sent.append(message)
+
+    sent = []
+    scope = {"type": "http", "method": "POST", "path": "/decide"}
+    errors = []
+    original_error, asgi.logger.error = asgi.logger.error, lambda *args: errors.append(args)
+    try:
+        asyncio.run(asgi.app(scope, disconnect, record))
+    finally:
+        asgi.logger.error = original_error
+    assert sent == [] and errors == []
+
+    # Unexpected failures still answer with the active policy version
+    asgi.agent.resolve = None
+    try:
+        status, body = call("POST", "/decide", json.dumps(payload).encode())
+    finally:
+        del asgi.agent.resolve
+    assert status == 500 and json.loads(body)["policy_version"] == "builtin"
+
+    # The policy file and validation mode apply to the ASGI app too (bootstrap.py)
+    import importlib
+    import os
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.json")
+        with open(path, "w") as f:
+            json.dump({"version": "asgi-v1", "decision_map": {"prod": {"high_cpu": "noop"}}}, f)
+        os.environ.update(RL_BRAIN_POLICY=path, RL_BRAIN_POLICY_RELOAD_INTERVAL="0", RL_BRAIN_VALIDATION="collect")
+        try:
+            importlib.reload(asgi)
+            assert json.loads(call("POST", "/decide", json.dumps(payload).encode())[1])["policy_version"] == "asgi-v1"
+            assert "validation_errors" in json.loads(call("POST", "/decide", b"{}")[1])
+        finally:
+            for name in ("RL_BRAIN_POLICY", "RL_BRAIN_POLICY_RELOAD_INTERVAL", "RL_BRAIN_VALIDATION"):
+                del os.environ[name]
+            importlib.reload(asgi)
+    print("[PASS] ASGI /decide, /health, /scope match Flask")
+
+def test_metrics_endpoint():
+    """Test /metrics counts decisions, downgrades and validation failures"""
+    client = app.test_client()
+    before = client.get('/metrics').data.decode()
+
+    # Each request is validated once, on the decision path, not again when it is counted
+    calls = []
+    validate = agent._validate_request
+    agent._validate_request = lambda payload: calls.append(payload) or validate(payload)
+    try:
+        client.post('/decide', json={"environment": "stage", "event_type": "low_load",
+                                     "metrics": {"cpu_percent": 5, "memory_percent": 10, "error_rate": 0.0}})
+        client.post('/decide', json={"environment": "stage"})
+    finally:
+        del agent._validate_request
+    assert len(calls) == 2
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.data.decode()
+
+    def value(text, line_prefix):
+        for line in text.splitlines():
+            if line.startswith(line_prefix + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    decision = 'rl_brain_decisions_total{environment="stage",event_type="low_load",action="scale_down"}'
+    assert value(text, decision) == value(before, decision) + 1
+    failures = 'rl_brain_validation_failures_total'
+    assert value(text, failures) == value(before, failures) + 1
+    assert 'rl_brain_http_request_duration_seconds_count{route="/decide"}' in text
+    print("[PASS] /metrics exposes decision and validation counters")
+
+def test_dashboard_caching():
+    """Test the dashboard is served gzip-encoded with per-encoding revalidatable ETags"""
+    import gzip
+    client = app.test_client()
+
+    plain = client.get('/')
+    assert plain.status_code == 200 and plain.mimetype == 'text/html'
+    assert b"RL Decision Brain" in plain.data and "Content-Encoding" not in plain.headers
+    etag = plain.headers["ETag"]
+
+    compressed = client.get('/', headers={"Accept-Encoding": "gzip, deflate"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    gz_etag = compressed.headers["ETag"]
+    assert gz_etag == f'"{etag[1:-1]}-gz"' and compressed.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data) / 2
+
+    cached = client.get('/', headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b""
+    # Either encoding's tag revalidates, whichever encoding the client now accepts
+    for tag in (etag, gz_etag):
+        for accept in ("gzip", "identity"):
+            cached = client.get('/', headers={"If-None-Match": tag, "Accept-Encoding": accept})
+            assert cached.status_code == 304 and cached.headers["ETag"] == tag, (tag, accept)
+    assert client.get('/', headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get('/', headers={"If-None-Match": f'"stale", W/{etag}'}).status_code == 304
+    assert client.get('/', headers={"If-None-Match": f'"x{etag[1:-1]}x"'}).status_code == 200   # no substring match
+
+    for accept, gzipped in (("gzip;q=0", False), ("gzip;q=0, *;q=1", False), ("*", True),
+                            ("deflate, GZIP;q=0.5", True), ("identity", False)):
+        assert ("Content-Encoding" in client.get('/', headers={"Accept-Encoding": accept}).headers) == gzipped, accept
+    print("[PASS] Dashboard served precompressed with ETag revalidation")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - HTTP Service Test Suite")
+    print("=" * 60)
+
+    print("\n[1/8] Testing batch endpoint...")
+    test_decide_batch_endpoint()
+
+    print("\n[2/8] Testing batch refusal...")
+    test_decide_batch_rejects_non_array()
+
+    print("\n[3/8] Testing pre-encoded responses...")
+    test_encoded_responses_match_jsonify()
+
+    print("\n[4/8] Testing timestamp splicing...")
+    test_encoder_splices_timestamp()
+
+    print("\n[5/8] Testing decision stream...")
+    test_decide_stream()
+
+    print("\n[6/8] Testing ASGI parity...")
+    test_asgi_matches_flask()
+
+    print("\n[7/8] Testing metrics endpoint...")
+    test_metrics_endpoint()
+
+    print("\n[8/8] Testing dashboard caching...")
+    test_dashboard_caching()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL HTTP TESTS PASSED")
+    print("=" * 60)
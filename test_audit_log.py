@@ -0,0 +1,111 @@
+"""
+Audit Log Test Suite
+Validates binary records, rotation, the sparse time index and /audit queries
+"""
+
+import glob
+import logging
+import os
+import random
+import tempfile
+
+import app as app_module
+from audit_log import BLOCK_RECORDS, INDEX_ENTRY, RECORD, AuditLog
+
+logging.disable(logging.INFO)
+
+def _response(environment, action, filtered=False):
+    return {"environment": environment, "action": action, "safety_filtered": filtered}
+
+def test_rotation_and_index():
+    """Test records rotate into segments and time/env/action queries match a full scan"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp, segment_bytes=RECORD.size * 3000)
+        rng = random.Random(11)
+        expected = []
+        for i in range(10000):
+            # Roughly increasing timestamps with local jitter, like concurrent request threads
+            timestamp = 1000.0 + i + rng.uniform(-3, 3)
+            environment = rng.choice(["dev", "stage", "prod"])
+            action = rng.choice(["noop", "restart"])
+            log.record(timestamp, rng.choice(["crash", "high_cpu"]), _response(environment, action),
+                       {"cpu_percent": 50.0, "memory_percent": 25.5, "error_rate": 0.5})
+            expected.append((timestamp, environment, action))
+        log.close()
+
+        segments = log.segments()
+        assert len(segments) == 4
+        assert os.path.getsize(segments[0]) == 3000 * RECORD.size
+        assert os.path.getsize(segments[0][:-4] + ".idx") == (3000 // BLOCK_RECORDS) * INDEX_ENTRY.size
+
+        records = log.query(start=4100.5, end=4300.5, environment="prod", action="restart")
+        assert [r["timestamp"] for r in records] == sorted(
+            t for t, env, action in expected if 4100.5 <= t <= 4300.5 and env == "prod" and action == "restart")
+        assert records[0]["metrics"] == {"cpu_percent": 50.0, "memory_percent": 25.5, "error_rate": 0.5}
+        assert records[0]["event_type"] in ("crash", "high_cpu")
+        assert len(log.query(limit=20000)) == 10000
+        assert len(log.query(limit=7)) == 7
+        assert log.query(action="explode") == []
+    print("[PASS] Audit segments rotate and indexed queries match a full scan")
+
+def test_retention():
+    """Test retain_segments deletes this process's oldest segments"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(tmp, segment_bytes=RECORD.size * BLOCK_RECORDS, retain_segments=2)
+        for i in range(BLOCK_RECORDS * 5):
+            log.record(float(i), "crash", _response("prod", "restart", filtered=i % 2 == 0), None, valid=False)
+        log.close()
+        assert len(glob.glob(os.path.join(tmp, "*.bin"))) == 2
+        assert len(glob.glob(os.path.join(tmp, "*.idx"))) == 2
+        records = log.query(limit=100000)
+        assert records[0]["timestamp"] == BLOCK_RECORDS * 3
+        assert records[0]["safety_filtered"] == True and records[0]["valid"] == False
+        assert records[0]["metrics"]["cpu_percent"] is None
+    print("[PASS] Audit retention keeps the newest segments")
+
+def test_audit_endpoint():
+    """Test /decide outcomes are queryable through /audit"""
+    client = app_module.app.test_client()
+    assert client.get('/audit').status_code == 404
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app_module.audit = AuditLog(tmp)
+        try:
+            metrics = {"cpu_percent": 90, "memory_percent": 40, "error_rate": 0.2}
+            client.post('/decide', json={"environment": "prod", "event_type": "crash", "metrics": metrics})
+            client.post('/decide', json={"environment": "dev", "event_type": "high_cpu", "metrics": metrics})
+            client.post('/decide', json={"environment": "qa", "event_type": "crash", "metrics": metrics})
+            app_module.audit.close()
+
+            response = client.get('/audit?environment=prod&action=restart')
+            assert response.status_code == 200
+            body = response.get_json()
+            assert body["count"] == 1
+            assert body["records"][0]["event_type"] == "crash"
+            assert body["records"][0]["metrics"]["cpu_percent"] == 90.0
+            everything = client.get('/audit').get_json()["records"]
+            assert [r["environment"] for r in everything] == ["prod", "dev", "unknown"]
+            assert everything[2]["valid"] == False
+            assert client.get('/audit?start=abc').status_code == 400
+            assert client.get('/audit?limit=0').status_code == 400
+        finally:
+            app_module.audit = None
+    print("[PASS] /audit returns filtered decision records")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Audit Log Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing rotation and index...")
+    test_rotation_and_index()
+
+    print("\n[2/3] Testing retention...")
+    test_retention()
+
+    print("\n[3/3] Testing /audit endpoint...")
+    test_audit_endpoint()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL AUDIT LOG TESTS PASSED")
+    print("=" * 60)
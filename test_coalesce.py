@@ -0,0 +1,108 @@
+"""
+Coalescing Test Suite
+Validates windowed folding of duplicate events, eviction and thread safety
+"""
+
+import logging
+import threading
+
+import app as app_module
+from coalesce import Coalescer
+from rl_decision_brain import RLDecisionBrain
+
+logging.disable(logging.INFO)
+
+METRICS = {"cpu_percent": 90, "memory_percent": 50, "error_rate": 0.9}
+
+def _request(env="prod", event="crash", **extra):
+    return dict({"environment": env, "event_type": event, "metrics": METRICS}, **extra)
+
+def test_window_folds_duplicates():
+    """Test only the first event of a window is decided; later ones are marked coalesced"""
+    agent = RLDecisionBrain()
+    coalescer = Coalescer(window=5.0)
+    calls = []
+
+    def resolve(payload):
+        calls.append(payload)
+        return agent.resolve(payload)
+
+    first, shared = coalescer.resolve(_request(), resolve, now=100.0)
+    assert first["action"] == "restart" and "coalesced" not in first and shared
+    for i in range(1, 4):
+        response, shared = coalescer.resolve(_request(env="PROD"), resolve, now=100.0 + i)
+        assert response["action"] == "restart" and not shared
+        assert response["coalesced"] == True and response["coalesced_count"] == i
+    assert len(calls) == 1
+
+    # Different target, event or environment opens its own window
+    assert "coalesced" not in coalescer.resolve(_request(target="api"), resolve, now=101.0)[0]
+    assert coalescer.resolve(_request(target="api"), resolve, now=101.5)[0]["coalesced_count"] == 1
+    assert "coalesced" not in coalescer.resolve(_request(event="high_cpu"), resolve, now=101.0)[0]
+    assert "coalesced" not in coalescer.resolve(_request(env="dev"), resolve, now=101.0)[0]
+
+    # The window closes 5s after its first event, even with events in between
+    assert "coalesced" not in coalescer.resolve(_request(), resolve, now=105.0)[0]
+    # Malformed requests bypass coalescing
+    for payload in ({"environment": "prod"}, _request(env="qa"), [1]):
+        assert "coalesced" not in coalescer.resolve(payload, agent.resolve, now=105.1)[0]
+    print("[PASS] Duplicates inside a window are folded into the first decision")
+
+def test_bounded_and_thread_safe():
+    """Test window state stays bounded and concurrent duplicates get one real decision"""
+    agent = RLDecisionBrain()
+    coalescer = Coalescer(window=60.0, max_keys=64, shards=4)
+    for i in range(1000):
+        coalescer.resolve(_request(target=f"svc-{i}"), agent.resolve, now=float(i) / 100)
+    assert len(coalescer) <= 64
+    # Evicted windows simply start over
+    assert "coalesced" not in coalescer.resolve(_request(target="svc-0"), agent.resolve, now=10.0)[0]
+
+    coalescer = Coalescer(window=60.0)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        local = [coalescer.resolve(_request(target="db"), agent.resolve)[0] for _ in range(500)]
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(1 for r in results if "coalesced" not in r) == 1
+    assert sorted(r["coalesced_count"] for r in results if "coalesced" in r) == list(range(1, 4000))
+    print("[PASS] Coalescing state is bounded and thread-safe")
+
+def test_coalescing_in_app():
+    """Test /decide marks duplicates when coalescing is enabled"""
+    client = app_module.app.test_client()
+    app_module.coalescer = Coalescer(window=30.0)
+    try:
+        bodies = [client.post('/decide', json=_request(target="checkout")).get_json() for _ in range(3)]
+    finally:
+        app_module.coalescer = None
+    assert [b.get("coalesced_count") for b in bodies] == [None, 1, 2]
+    assert all(b["action"] == "restart" and b["timestamp"] > 0 for b in bodies)
+    assert "coalesced" not in client.post('/decide', json=_request(target="checkout")).get_json()
+    print("[PASS] /decide folds an incident storm")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Coalescing Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing window folding...")
+    test_window_folds_duplicates()
+
+    print("\n[2/3] Testing bounds and thread safety...")
+    test_bounded_and_thread_safe()
+
+    print("\n[3/3] Testing /decide coalescing...")
+    test_coalescing_in_app()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL COALESCING TESTS PASSED")
+    print("=" * 60)
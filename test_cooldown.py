@@ -0,0 +1,165 @@
+"""
+Cooldown Test Suite
+Validates per-target cooldowns, opposite-action intervals and both state stores
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+
+import app as app_module
+from cooldown import CooldownGate, MemoryCooldownStore, SQLiteCooldownStore, parse_cooldowns
+
+logging.disable(logging.INFO)
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _decision(action, environment="dev"):
+    return {"action": action, "reason": "Deterministic decision", "demo_frozen": True, "timestamp": 0.0,
+            "environment": environment, "safety_filtered": False, "policy_version": "builtin"}
+
+def _request(environment, event_type, target=None):
+    request = {"environment": environment, "event_type": event_type,
+               "metrics": {"cpu_percent": 90.0, "memory_percent": 50.0, "error_rate": 0.1}}
+    if target is not None:
+        request["target"] = target
+    return request
+
+def test_cooldown_rules():
+    """Test repeated and opposite actions are blocked per target until their interval has passed"""
+    assert parse_cooldowns("restart=300, SCALE_UP=60") == {"restart": 300.0, "scale_up": 60.0}
+    for spec in ("noop=5", "reboot=5", "restart=-1", "restart=soon"):
+        try:
+            parse_cooldowns(spec)
+            assert False, spec
+        except ValueError:
+            pass
+
+    clock = _Clock()
+    blocked = []
+    gate = CooldownGate(parse_cooldowns("restart=300"), flip_interval=120, clock=clock,
+                        on_block=lambda environment, action: blocked.append((environment, action)))
+    web = {"target": "web-1"}
+    shared = _decision("restart", "prod")
+    assert gate.apply(web, shared, True) == (shared, True)
+    response, is_shared = gate.apply(web, shared, True)
+    assert not is_shared and response["action"] == "noop" and response["cooldown"] is True
+    assert response["proposed_action"] == "restart" and response["reason"].startswith("Cooldown: restart blocked")
+    assert shared["action"] == "restart" and "cooldown" not in shared      # shared table entry untouched
+    assert gate.apply({"target": "web-2"}, shared, True)[0] is shared     # other targets are independent
+    assert gate.apply({}, shared, True)[0] is shared and gate.apply({"target": True}, shared, True)[0]["cooldown"]
+    clock.now += 299
+    assert gate.apply(web, shared, True)[0]["action"] == "noop"           # blocked actions are not recorded
+    clock.now += 1
+    assert gate.apply(web, shared, True)[0] is shared
+
+    up, down = _decision("scale_up"), _decision("scale_down")
+    assert gate.apply(web, up, False)[0] is up and gate.apply(web, up, False)[0] is up   # no scale_up cooldown
+    clock.now += 60
+    flip = gate.apply(web, down, False)[0]
+    assert flip["action"] == "noop" and "scale_up was decided 60s ago (minimum 120s)" in flip["reason"]
+    clock.now += 60
+    assert gate.apply(web, down, False)[0] is down
+    assert gate.apply(web, _decision("noop"), False)[0]["action"] == "noop"
+    assert blocked == [("prod", "restart"), ("prod", "restart"), ("prod", "restart"), ("dev", "scale_down")]
+
+    store = MemoryCooldownStore(max_keys=4, shards=1)
+    store.retain(10.0)
+    for i in range(6):
+        store.take(("dev", f"t{i}"), "restart", (("restart", 10.0),), 0.0)
+    assert len(store) == 4 and store.last(("dev", "t0")) == {} and store.last(("dev", "t5")) == {"restart": 0.0}
+    store.take(("dev", "t6"), "restart", (), 20.0)                         # the rest are past the horizon
+    assert len(store) == 1
+    print("[PASS] Cooldowns and flip intervals block actions per target")
+
+def test_sqlite_store():
+    """Test the SQLite store shares state between workers through batched WAL writes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cooldowns.db")
+        worker_a = SQLiteCooldownStore(path, flush_interval=60.0)
+        worker_b = SQLiteCooldownStore(path, flush_interval=60.0)
+        rules = (("restart", 300.0),)
+        now = time.time()
+        worker_a.retain(3600.0)
+        worker_b.retain(3600.0)
+        try:
+            with sqlite3.connect(path) as connection:
+                assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert worker_a.take(("prod", "web-1"), "restart", rules, now) is None
+            assert worker_a.take(("prod", "web-1"), "restart", rules, now + 1) == ("restart", 300.0, 1.0)
+            assert worker_b.last(("prod", "web-1")) == {}                   # not flushed yet
+            assert worker_a.flush() == 1
+            assert worker_b.take(("prod", "web-1"), "restart", rules, now + 2) == ("restart", 300.0, 2.0)
+
+            for i in range(300):
+                worker_a.take(("dev", f"svc-{i}"), "scale_up", (), now - 2 * i)   # flushed in batches
+            worker_b.take(("prod", "web-1"), "restart", rules, now + 300)
+            worker_b.close()
+            worker_a.close()
+            with sqlite3.connect(path) as connection:
+                assert connection.execute("SELECT count(*) FROM cooldowns").fetchone()[0] == 301
+                assert connection.execute("SELECT at FROM cooldowns WHERE target = 'web-1'").fetchone()[0] == now + 300
+
+            worker_c = SQLiteCooldownStore(path, prune_interval=0.0)
+            worker_c.retain(101.0)
+            assert worker_c.last(("dev", "svc-299")) == {"scale_up": now - 598}
+            assert worker_c.take(("dev", "svc-0"), "scale_down", (("scale_up", 60.0),), now + 1)[0] == "scale_up"
+            assert worker_c.take(("dev", "svc-1"), "scale_down", (("scale_up", 1.0),), now + 1) is None
+            worker_c.close()
+            with sqlite3.connect(path) as connection:
+                assert connection.execute("SELECT count(*) FROM cooldowns").fetchone()[0] == 53   # svc-51.. pruned
+        finally:
+            worker_a.close()
+            worker_b.close()
+    print("[PASS] SQLite store shares cooldowns between workers")
+
+def test_cooldown_responses():
+    """Test /decide and /decide/batch downgrade actions in cooldown and count them"""
+    client = app_module.app.test_client()
+    app_module.cooldown = CooldownGate(parse_cooldowns("restart=300"), flip_interval=120,
+                                       on_block=lambda environment, action: app_module.metrics.inc(
+                                           "rl_brain_cooldown_blocked_total",
+                                           (("environment", environment), ("action", action))))
+    try:
+        assert client.post('/decide', json=_request("prod", "crash", "api")).get_json()["action"] == "restart"
+        body = client.post('/decide', json=_request("prod", "crash", "api")).get_json()
+        assert body["action"] == "noop" and body["cooldown"] is True and body["proposed_action"] == "restart"
+        assert client.post('/decide', json=_request("prod", "crash", "db")).get_json()["action"] == "restart"
+
+        batch = [_request("dev", "high_cpu", "web"), _request("dev", "low_load", "web"),
+                 _request("dev", "low_load", "cache"), _request("dev", "crash", "web")]
+        results = client.post('/decide/batch', json=batch).get_json()
+        assert [r["action"] for r in results] == ["scale_up", "noop", "scale_down", "restart"]
+        assert [r.get("cooldown", False) for r in results] == [False, True, False, False]
+
+        text = client.get('/metrics').get_data(as_text=True)
+        assert 'rl_brain_cooldown_blocked_total{environment="prod",action="restart"} 1' in text
+        assert 'rl_brain_cooldown_blocked_total{environment="dev",action="scale_down"} 1' in text
+    finally:
+        app_module.cooldown = None
+    print("[PASS] Decisions in cooldown are answered with a NOOP")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Cooldown Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing cooldown rules...")
+    test_cooldown_rules()
+
+    print("\n[2/3] Testing SQLite store...")
+    test_sqlite_store()
+
+    print("\n[3/3] Testing cooldown responses...")
+    test_cooldown_responses()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL COOLDOWN TESTS PASSED")
+    print("=" * 60)
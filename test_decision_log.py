@@ -0,0 +1,136 @@
+"""
+Decision Log Test Suite
+Validates sampling, backpressure accounting and the async /decide log mode
+"""
+
+import io
+import json
+import logging
+import random
+import threading
+import time
+
+import app as app_module
+from decision_log import DecisionLogger, parse_sample_rates
+
+logging.disable(logging.INFO)
+
+def _response(environment, action, filtered=False):
+    response = {"action": action, "reason": "r", "environment": environment,
+                "safety_filtered": filtered, "policy_version": "builtin"}
+    if filtered:
+        response.update(action="noop", proposed_action=action)
+    return response
+
+class _BlockingStream(io.StringIO):
+    """Stream whose writes wait until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait()
+        return super().write(text)
+
+def test_sampling():
+    """Test per environment/action rates, with downgrades, invalid requests and errors never sampled out"""
+    rates = parse_sample_rates("*=0.25, prod=1, dev:noop=0")
+    assert rates == {"*": 0.25, "prod": 1.0, "dev:noop": 0.0}
+    stream = io.StringIO()
+    log = DecisionLogger(stream=stream, sample_rates=rates)
+    assert log.sample_rate("dev", "noop") == 0.0
+    assert log.sample_rate("dev", "restart") == 0.25
+    assert log.sample_rate("prod", "noop") == 1.0
+
+    random.seed(7)
+    kept = sum(log.decision("crash", _response("stage", "scale_up"), 1.0) for _ in range(4000))
+    assert 800 < kept < 1200
+    assert not any(log.decision("low_load", _response("dev", "noop"), 1.0) for _ in range(100))
+    assert all(log.decision("crash", _response("prod", "restart"), 1.0) for _ in range(10))
+    assert log.decision("crash", _response("dev", "scale_up", filtered=True), 2.0)
+    assert all(log.decision(None, _response("dev", "noop"), 3.0, valid=False) for _ in range(5))
+    assert log.error("/decide", "boom")
+    log.drain()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) == kept + 10 + 2 + 5
+    rejected = [r for r in records if r.get("valid") is False]
+    assert len(rejected) == 5 and rejected[0]["level"] == "warning" and rejected[0]["sample_rate"] == 1.0
+    downgrade, = [r for r in records if r.get("safety_filtered")]
+    assert downgrade["proposed_action"] == "scale_up"
+    assert downgrade["level"] == "warning" and downgrade["sample_rate"] == 1.0
+    error, = [r for r in records if r["kind"] == "error"]
+    assert error == {"ts": error["ts"], "level": "error", "kind": "error", "route": "/decide", "error": "boom"}
+    print("[PASS] Sampling follows rates; downgrades and errors always kept")
+
+def test_backpressure():
+    """Test a full queue drops and counts records instead of blocking"""
+    stream = _BlockingStream()
+    drops = []
+    log = DecisionLogger(stream=stream, queue_size=10, reserved=0.2, batch_size=1,
+                         on_drop=drops.append)
+    log.decision("crash", _response("dev", "restart"), 0.0)
+    deadline = time.time() + 5
+    while log.stats()["queued"] and time.time() < deadline:
+        time.sleep(0.01)   # writer has taken the first record and is blocked writing it
+
+    started = time.perf_counter()
+    for _ in range(20):
+        log.decision("crash", _response("dev", "restart"), 0.0)
+    for _ in range(5):
+        log.decision("crash", _response("prod", "scale_up", filtered=True), 0.0)
+    assert time.perf_counter() - started < 0.5
+    assert log.stats() == {"queued": 10, "written": 0, "dropped": 12, "dropped_priority": 3}
+    assert drops == [False] * 12 + [True] * 3
+
+    stream.release.set()
+    deadline = time.time() + 5
+    while log.stats()["written"] < 11 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(stream.getvalue().splitlines()) == 11
+    print("[PASS] Backpressure drops are counted, request thread never blocks")
+
+def test_async_mode_in_app():
+    """Test /decide hands decisions and errors to the async logger"""
+    stream = io.StringIO()
+    app_module.decision_log = DecisionLogger(stream=stream)
+    try:
+        client = app_module.app.test_client()
+        client.post('/decide', json={"environment": "prod", "event_type": "Crash",
+                                     "metrics": {"cpu_percent": 1, "memory_percent": 1, "error_rate": 0}})
+        client.post('/decide/batch', json=[{"environment": "dev", "event_type": "low_load", "metrics": {}}])
+        resolve = app_module._resolve
+        app_module._resolve = lambda payload, stages=None: 1 / 0
+        try:
+            assert client.post('/decide', json={"environment": "dev", "event_type": "crash", "metrics": {}}).status_code == 500
+        finally:
+            app_module._resolve = resolve
+        app_module.decision_log.drain()
+    finally:
+        app_module.decision_log = None
+
+    records = sorted((json.loads(line) for line in stream.getvalue().splitlines()), key=lambda r: r["ts"])
+    assert [(r["kind"], r.get("action")) for r in records] == [
+        ("decision", "restart"), ("decision", "scale_down"), ("error", None)]
+    assert records[0]["event_type"] == "crash" and records[0]["environment"] == "prod"
+    assert records[2]["route"] == "/decide"
+    print("[PASS] Async log mode records decisions and errors")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Decision Log Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing sampling...")
+    test_sampling()
+
+    print("\n[2/3] Testing backpressure...")
+    test_backpressure()
+
+    print("\n[3/3] Testing async log mode...")
+    test_async_mode_in_app()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL DECISION LOG TESTS PASSED")
+    print("=" * 60)
@@ -0,0 +1,106 @@
+"""
+Decision Feed Test Suite
+Validates the broadcast ring buffer and the /events SSE stream
+"""
+
+import json
+import logging
+
+import app as app_module
+from event_feed import DecisionFeed
+
+logging.disable(logging.INFO)
+
+RESPONSE = {"action": "scale_up", "reason": "r", "environment": "dev", "safety_filtered": False,
+            "policy_version": "builtin"}
+
+def _parse(body):
+    """SSE body -> list of (event, data) pairs"""
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_ring_buffer():
+    """Test publishing never waits on subscribers and slow ones are detected"""
+    feed = DecisionFeed(capacity=8, max_subscribers=2)
+    feed.publish("high_cpu", RESPONSE, 1.0)   # nobody listening: dropped on the floor
+    assert feed._published == 0
+
+    fast, slow = feed.subscribe(), feed.subscribe()
+    assert feed.subscribe() is None
+    for i in range(5):
+        feed.publish("high_cpu", RESPONSE, float(i))
+    assert [entry[3] for entry in fast.poll(100)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    for i in range(5, 11):
+        feed.publish("high_cpu", RESPONSE, float(i))
+    assert len(fast.poll(3)) == 3 and not fast.lapped
+    assert slow.poll(100) == [] and slow.lapped
+    slow.close()
+    fast.close()
+    assert feed.subscribers == 0 and feed.dropped == 1
+
+    # Reconnecting with Last-Event-ID resumes after that event while it is buffered
+    assert [entry[0] for entry in feed.subscribe(last_event_id="8").poll(100)] == [9, 10]
+    assert feed.subscribe(last_event_id="1").poll(100) == []   # overwritten: start from the newest
+    print("[PASS] Ring buffer broadcasts and drops lapped subscribers")
+
+def test_events_endpoint():
+    """Test /events streams decisions made by other clients, then summaries under load"""
+    client = app_module.app.test_client()
+    app_module.EVENTS_MAX_DURATION = 0.3
+    metrics = {"cpu_percent": 85, "memory_percent": 50, "error_rate": 0.01}
+
+    stream = client.get('/events', buffered=False)
+    assert stream.status_code == 200
+    assert stream.mimetype == 'text/event-stream'
+    client.post('/decide', json={"environment": "dev", "event_type": "HIGH_CPU", "metrics": metrics})
+    client.post('/decide', json={"environment": "prod", "event_type": "<b>x</b>", "metrics": metrics})
+    events = _parse(b"".join(stream.response).decode())
+    stream.close()
+    assert [name for name, _ in events] == ["decision", "decision"]
+    assert events[0][1]["action"] == "scale_up" and events[0][1]["event_type"] == "high_cpu"
+    assert events[1][1]["environment"] == "prod" and events[1][1]["policy_version"] == "builtin"
+
+    stream = client.get('/events', buffered=False)
+    client.post('/decide/batch', json=[{"environment": "stage", "event_type": "low_load", "metrics": metrics}] * 50)
+    events = _parse(b"".join(stream.response).decode())
+    stream.close()
+    assert [name for name, _ in events] == ["summary"]
+    assert events[0][1]["count"] == 50
+    assert events[0][1]["decisions"] == [{"environment": "stage", "action": "scale_down", "count": 50}]
+    assert app_module.feed.subscribers == 0
+
+    # HEAD never subscribes, and a stream closed before its first chunk frees its slot
+    for _ in range(3):
+        assert client.head('/events').status_code == 200
+    assert app_module.feed.subscribers == 0
+    client.get('/events', buffered=False).close()
+    assert app_module.feed.subscribers == 0
+
+    # Sync workers (see gunicorn.conf.py) refuse streams that would block /decide
+    app_module.EVENTS_ENABLED = False
+    try:
+        assert client.get('/events').status_code == 503
+    finally:
+        app_module.EVENTS_ENABLED = True
+    assert app_module.feed.subscribers == 0
+    print("[PASS] /events pushes live decisions and summaries")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Decision Feed Test Suite")
+    print("=" * 60)
+
+    print("\n[1/2] Testing ring buffer...")
+    test_ring_buffer()
+
+    print("\n[2/2] Testing /events endpoint...")
+    test_events_endpoint()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL DECISION FEED TESTS PASSED")
+    print("=" * 60)
@@ -0,0 +1,150 @@
+"""
+Feature Store Test Suite
+Validates sliding-window statistics, bounded memory, snapshots and windowed decisions
+"""
+
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import app as app_module
+from feature_store import FeatureStore, parse_feature_spec
+from policy_rules import RulePolicy
+from rl_decision_brain import RLDecisionBrain
+
+logging.disable(logging.INFO)
+
+def _request(cpu, target="web-1", environment="dev", **metrics):
+    return {"environment": environment, "event_type": "high_cpu", "target": target,
+            "metrics": dict({"cpu_percent": cpu}, **metrics)}
+
+def test_window_statistics():
+    """Test incremental statistics match a recomputation over the last window values"""
+    rng = random.Random(3)
+    for size in (1, 5, 32):
+        store = FeatureStore(window=size, alpha=0.25)
+        history, ewma = [], None
+        for step in range(200):
+            value = rng.choice([rng.uniform(0, 100), float(rng.randrange(0, 101, 25))])
+            store.smooth(_request(value, error_rate=value / 100), {})
+            history.append(value)
+            ewma = value if ewma is None else ewma + 0.25 * (value - ewma)
+            window = sorted(history[-size:])
+            cpu = store.features("dev", "web-1")["cpu_percent"]
+            assert cpu["samples"] == len(window) and cpu["last"] == value
+            assert cpu["min"] == window[0] and cpu["max"] == window[-1]
+            assert abs(cpu["mean"] - sum(window) / len(window)) < 1e-9 and abs(cpu["ewma"] - ewma) < 1e-9
+            for q in (50, 90, 99):
+                exact = window[min(len(window) - 1, max(0, -(-q * len(window) // 100) - 1))]
+                assert abs(cpu[f"p{q}"] - exact) <= 1.0, (size, step, q, cpu[f"p{q}"], exact)
+            assert abs(store.features("dev", "web-1")["error_rate"]["p50"] - cpu["p50"] / 100) <= 0.01
+
+    assert parse_feature_spec("ewma") == {"cpu_percent": "ewma", "memory_percent": "ewma", "error_rate": "ewma"}
+    assert parse_feature_spec("cpu_percent=p90, error_rate=max") == {"cpu_percent": "p90", "error_rate": "max"}
+    for spec in ("median", "disk=ewma", "cpu_percent=p42"):
+        try:
+            parse_feature_spec(spec)
+            assert False, spec
+        except ValueError:
+            pass
+    print("[PASS] Sliding-window statistics are exact (percentiles within 1% of range)")
+
+def test_eviction_and_snapshot():
+    """Test LRU and idle eviction bound memory, and snapshots restore the newest windows"""
+    now = [0.0]
+    store = FeatureStore(window=4, max_targets=3, idle_ttl=100.0, shards=1, clock=lambda: now[0])
+    for target in ("a", "b", "c"):
+        store.smooth(_request(10.0, target), {})
+    store.smooth(_request(20.0, "a"), {})          # a is now the most recently used
+    store.smooth(_request(30.0, "d"), {})          # evicts b
+    assert store.features("dev", "b") is None and len(store) == 3
+    now[0] = 150.0
+    store.smooth(_request(40.0, "e"), {})          # c, a and d idle for >= 100 s: all evicted
+    assert len(store) == 1 and store.features("dev", "e") is not None
+
+    for value in (50.0, 60.0, 70.0, 80.0, 90.0):
+        store.smooth(_request(value, "e", memory_percent=value / 2), {})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "features-1.json")
+        store.save(path)
+        older = FeatureStore(window=4, clock=lambda: 10.0)
+        older.smooth(_request(5.0, "e"), {})
+        older.smooth(_request(5.0, "f", environment="prod"), {})
+        older.save(os.path.join(tmp, "features-2.json"))
+
+        restored = FeatureStore(window=4)
+        assert restored.load([path, os.path.join(tmp, "features-2.json"), os.path.join(tmp, "missing.json")]) == 2
+
+        # autosave re-saves what it loaded under its own pid and drops snapshots of exited processes
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        live, old = os.path.join(tmp, f"features-{os.getppid()}.json"), os.path.join(tmp, "features-2.json")
+        os.replace(path, os.path.join(tmp, f"features-{exited.pid}.json"))
+        store.save(live)
+        os.utime(old, (time.time() - 86400, time.time() - 86400))   # not rewritten for the idle TTL
+        autosaved = FeatureStore(window=4, idle_ttl=3600.0)
+        assert autosaved.autosave(tmp, interval=3600.0) == 2
+        assert sorted(os.listdir(tmp)) == sorted([os.path.basename(live), f"features-{os.getpid()}.json"])
+    assert restored.features("dev", "e") == store.features("dev", "e")
+    assert restored.features("prod", "f")["cpu_percent"]["last"] == 5.0
+    print("[PASS] Targets are evicted LRU and restored from snapshots")
+
+def test_windowed_decisions():
+    """Test decisions on windowed features ignore isolated spikes, and /decide uses the store"""
+    brain = RLDecisionBrain(RulePolicy([
+        {"environment": "dev", "event_type": "high_cpu", "action": "scale_up", "when": {"cpu_percent": [">", 80]}},
+        {"environment": "dev", "event_type": "high_cpu", "action": "noop"},
+    ]))
+    store = FeatureStore(window=10)
+    features = {"cpu_percent": "p50"}
+    samples = [40.0, 95.0, 42.0, 38.0, 97.0, 41.0] + [92.0] * 8
+    raw = [brain.decide(_request(cpu))["action"] for cpu in samples]
+    windowed = [brain.decide(store.smooth(_request(cpu), features))["action"] for cpu in samples]
+    assert raw[:6] == ["noop", "scale_up", "noop", "noop", "scale_up", "noop"]
+    assert windowed[:8] == ["noop"] * 8 and windowed[8:] == ["scale_up"] * 6   # once most samples are high
+
+    invalid = _request(500.0)
+    assert store.smooth(invalid, features)["metrics"]["cpu_percent"] == 500.0
+    assert store.smooth({"environment": "dev", "metrics": {"cpu_percent": 90}}, features) == \
+        {"environment": "dev", "metrics": {"cpu_percent": 90}}
+
+    client = app_module.app.test_client()
+    assert client.get('/features?environment=dev&target=web-1').status_code == 404
+    app_module.feature_store, app_module.FEATURES = FeatureStore(window=3), {"cpu_percent": "max"}
+    try:
+        for cpu in (10.0, 70.0, 20.0):
+            client.post('/decide', json=_request(cpu, "db-1", "prod"))
+        # Rejected requests never reach the windows
+        client.post('/decide', json=dict(_request(99.0, "db-1", "prod"), event_type=7))
+        client.post('/decide/batch', json=[dict(_request(98.0, "db-1", "prod"), metrics={"cpu_percent": 98.0,
+                                                                                     "error_rate": "high"})])
+        body = client.get('/features?environment=prod&target=db-1').get_json()
+        assert body["decided_on"] == {"cpu_percent": "max"}
+        assert body["metrics"]["cpu_percent"]["max"] == 70.0 and body["metrics"]["cpu_percent"]["samples"] == 3
+        assert client.get('/features?environment=prod&target=db-2').status_code == 404
+        assert client.get('/features?environment=prod').status_code == 400
+    finally:
+        app_module.feature_store, app_module.FEATURES = None, {}
+    print("[PASS] Windowed features keep decisions from flapping on spikes")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Feature Store Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing window statistics...")
+    test_window_statistics()
+
+    print("\n[2/3] Testing eviction and snapshots...")
+    test_eviction_and_snapshot()
+
+    print("\n[3/3] Testing windowed decisions...")
+    test_windowed_decisions()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL FEATURE STORE TESTS PASSED")
+    print("=" * 60)
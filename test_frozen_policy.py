@@ -0,0 +1,104 @@
+"""
+Frozen Policy Test Suite
+Validates memory-mapped weights, masked argmax and batched inference
+"""
+
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from frozen_policy import PolicyFormatError, load_frozen_policy, save_frozen_policy
+from rl_decision_brain import Environment, RLDecisionBrain
+
+EVENTS = ["high_cpu", "high_memory", "crash", "low_load"]
+
+def _request(env, event, cpu=50, memory=50, error_rate=0.1):
+    return {"environment": env, "event_type": event,
+            "metrics": {"cpu_percent": cpu, "memory_percent": memory, "error_rate": error_rate}}
+
+def test_q_table_masked_argmax():
+    """Test a Q-table preferring illegal actions can never emit them"""
+    weights = np.zeros((3, len(EVENTS), 4), dtype=np.float32)
+    weights[:, :, 1] = 10.0   # scale_up best everywhere
+    weights[:, :, 3] = 5.0    # restart second best
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.npy")
+        save_frozen_policy(path, weights, "q_table", EVENTS, version="q-test")
+        policy = load_frozen_policy(path, RLDecisionBrain.ACTION_SCOPE)
+        agent = RLDecisionBrain(policy=policy)
+
+        assert isinstance(policy.weights, np.memmap) and not policy.weights.flags.writeable
+        assert agent.decide(_request("dev", "crash"))["action"] == "scale_up"
+        assert agent.decide(_request("stage", "crash"))["action"] == "scale_up"
+        response = agent.decide(_request("prod", "high_cpu"))
+        assert response["action"] == "restart"
+        assert response["safety_filtered"] == False
+        assert response["reason"] == "Frozen policy q-test decision for high_cpu in prod"
+
+        health = agent.health_check()
+        assert health["policy"]["kind"] == "q_table"
+        assert health["policy"]["version"] == "q-test"
+        assert len(health["policy"]["sha256"]) == 64
+    print("[PASS] Q-table argmax is masked by ACTION_SCOPE")
+
+def test_linear_batched_inference():
+    """Test a linear policy reacts to metrics and batch output matches single calls"""
+    rng = np.random.default_rng(3)
+    weights = rng.normal(size=(3 + len(EVENTS) + 4, 4))
+    weights[3 + len(EVENTS), 1] = 8.0   # cpu feature drives scale_up
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.npy")
+        save_frozen_policy(path, weights, "linear", EVENTS)
+        agent = RLDecisionBrain(policy=load_frozen_policy(path, RLDecisionBrain.ACTION_SCOPE))
+
+        sampler = random.Random(5)
+        requests = [
+            _request(sampler.choice(["dev", "stage", "prod"]), sampler.choice(EVENTS + ["other"]),
+                     sampler.uniform(0, 100), sampler.uniform(0, 100), sampler.random())
+            for _ in range(1000)
+        ]
+        results = agent.decide_batch(requests)
+        for request, result in zip(requests, results):
+            expected = agent.decide(request)
+            expected["timestamp"] = result["timestamp"]
+            assert result == expected
+            allowed = {a.value for a in RLDecisionBrain.ACTION_SCOPE[Environment(request["environment"])]}
+            assert result["action"] in allowed and result["safety_filtered"] == False
+
+        assert agent.decide(_request("dev", "high_cpu", cpu=100))["action"] == "scale_up"
+    print("[PASS] Linear policy batched inference matches single calls")
+
+def test_invalid_weights_rejected():
+    """Test weights with the wrong shape or non-finite values fail to load"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.npy")
+        for weights in (np.zeros((3, 2, 4)), np.full((3, len(EVENTS), 4), np.nan)):
+            save_frozen_policy(path, weights, "q_table", EVENTS)
+            try:
+                load_frozen_policy(path, RLDecisionBrain.ACTION_SCOPE)
+            except PolicyFormatError:
+                continue
+            raise AssertionError("Invalid weights accepted")
+    print("[PASS] Invalid weights rejected")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Frozen Policy Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing masked Q-table...")
+    test_q_table_masked_argmax()
+
+    print("\n[2/3] Testing linear batched inference...")
+    test_linear_batched_inference()
+
+    print("\n[3/3] Testing weight validation...")
+    test_invalid_weights_rejected()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL FROZEN POLICY TESTS PASSED")
+    print("=" * 60)
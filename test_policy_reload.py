@@ -0,0 +1,163 @@
+"""
+Policy Reload Test Suite
+Validates versioned policy files, stat polling and atomic table swaps
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from policy_reload import PolicyFileError, PolicyWatcher, load_policy_file
+from rl_decision_brain import Action, RLDecisionBrain
+
+METRICS = {"cpu_percent": 50, "memory_percent": 50, "error_rate": 0.01}
+
+def _write_policy(path, version, dev_high_cpu, **extra):
+    """Publish a policy version atomically (write + rename)"""
+    document = dict({"version": version, "decision_map": {"dev": {"high_cpu": dev_high_cpu}}}, **extra)
+    with open(path + ".tmp", "w") as f:
+        json.dump(document, f)
+    os.replace(path + ".tmp", path)
+
+def _decide(agent, env="dev", event="high_cpu"):
+    return agent.decide({"environment": env, "event_type": event, "metrics": METRICS})
+
+def test_reload_on_change():
+    """Test a changed file is installed and an invalid one keeps the active version"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.json")
+        _write_policy(path, "v1", "scale_up")
+        agent = RLDecisionBrain()
+        assert _decide(agent)["policy_version"] == "builtin"
+
+        watcher = PolicyWatcher(agent, path)
+        assert watcher.check() == True
+        response = _decide(agent)
+        assert response["action"] == "scale_up"
+        assert response["policy_version"] == "v1"
+        assert agent.health_check()["policy"] == {"kind": "decision_map", "version": "v1"}
+        # Pairs missing from the file decide NOOP
+        assert _decide(agent, "dev", "crash")["action"] == "noop"
+        assert watcher.check() == False
+
+        _write_policy(path, "v2", "scale_down")
+        assert watcher.check() == True
+        assert _decide(agent)["action"] == "scale_down"
+        assert _decide(agent, "dev", "unknown_event")["policy_version"] == "v2"
+
+        with open(path, "w") as f:
+            f.write('{"version": "v3", "decision_map": {"dev": {"high_cpu": "explode"}}}')
+        assert watcher.check() == False
+        assert "explode" in watcher.last_error
+        assert _decide(agent)["policy_version"] == "v2"
+
+        # Malformed frozen-policy sidecars fail like any other invalid file
+        npy_path = os.path.join(tmp, "policy.npy")
+        np.save(npy_path, np.zeros((3, 1, 4)))
+        for metadata in ({"kind": "q_table", "event_types": 5}, [1]):
+            with open(os.path.join(tmp, "policy.json"), "w") as f:
+                json.dump(metadata, f)
+            npy_watcher = PolicyWatcher(agent, npy_path)
+            assert npy_watcher.check() == False
+            assert npy_watcher.last_error.startswith(npy_path)
+        assert _decide(agent)["policy_version"] == "v2"
+    print("[PASS] Policy file changes are installed, invalid versions rejected")
+
+def test_scope_may_only_narrow():
+    """Test a policy file can remove actions from ACTION_SCOPE but never add them"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.json")
+        agent = RLDecisionBrain()
+
+        _write_policy(path, "narrow", "scale_up", action_scope={"dev": ["noop", "restart"]})
+        agent.install_policy(load_policy_file(agent, path))
+        response = _decide(agent)
+        assert response["action"] == "noop"
+        assert response["safety_filtered"] == True
+        assert agent.scope_listing()["dev"] == ["noop", "restart"]
+        assert agent.scope_listing()["prod"] == ["noop", "restart"]
+
+        for scope in ({"prod": ["noop", "scale_up"]}, {"dev": ["restart"]}, {"qa": ["noop"]}):
+            _write_policy(path, "bad", "scale_up", action_scope=scope)
+            try:
+                load_policy_file(agent, path)
+            except PolicyFileError:
+                continue
+            raise AssertionError(f"Scope {scope} should be rejected")
+        assert _decide(agent)["policy_version"] == "narrow"
+    print("[PASS] Policy files can only narrow the action scope")
+
+def test_swap_under_load():
+    """Test concurrent decisions always see one complete policy version"""
+    agent = RLDecisionBrain()
+    tables = {
+        version: (agent.compile_policy(decision_map={("dev", "high_cpu"): action}, version=version), action.value)
+        for version, action in (("a", Action.SCALE_UP), ("b", Action.SCALE_DOWN))
+    }
+    stop = threading.Event()
+    mismatches = []
+
+    def worker():
+        while not stop.is_set():
+            for response in [_decide(agent)] + agent.decide_batch([
+                    {"environment": "dev", "event_type": "high_cpu", "metrics": METRICS}] * 8):
+                if response["policy_version"] in tables and \
+                        response["action"] != tables[response["policy_version"]][1]:
+                    mismatches.append(response)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(2000):
+        agent.install_policy(tables["ab"[i % 2]][0])
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not mismatches, mismatches[:3]
+    print("[PASS] Table swaps are atomic for in-flight decisions")
+
+def test_watcher_thread():
+    """Test the polling thread installs a published version"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "policy.json")
+        _write_policy(path, "w1", "scale_up")
+        agent = RLDecisionBrain()
+        installed = []
+        watcher = PolicyWatcher(agent, path, interval=0.02, on_install=lambda t: installed.append(t.version))
+        watcher.reload()
+        watcher.start()
+        try:
+            _write_policy(path, "w2", "restart")
+            deadline = time.time() + 5
+            while _decide(agent)["policy_version"] != "w2" and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+        assert _decide(agent)["action"] == "restart"
+        assert installed == ["w1", "w2"]
+    print("[PASS] Watcher thread picks up new versions")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Policy Reload Test Suite")
+    print("=" * 60)
+
+    print("\n[1/4] Testing reload on change...")
+    test_reload_on_change()
+
+    print("\n[2/4] Testing scope narrowing...")
+    test_scope_may_only_narrow()
+
+    print("\n[3/4] Testing atomic swap under load...")
+    test_swap_under_load()
+
+    print("\n[4/4] Testing watcher thread...")
+    test_watcher_thread()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL POLICY RELOAD TESTS PASSED")
+    print("=" * 60)
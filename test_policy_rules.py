@@ -0,0 +1,130 @@
+"""
+Rule Policy Test Suite
+Validates metric-aware rules, vectorized evaluation and safety filtering
+"""
+
+import json
+import random
+
+import numpy as np
+
+from policy_rules import RulePolicy, RuleSetError, metrics_vector, rules_from_decision_map
+from rl_decision_brain import RLDecisionBrain
+
+RULES = [
+    {"environment": "dev", "event_type": "high_cpu", "when": {"cpu_percent": [">", 80]},
+     "action": "scale_up", "reason": "CPU above 80% in dev"},
+    {"environment": "dev", "event_type": "high_cpu", "action": "noop"},
+    {"environment": "stage", "event_type": "low_load",
+     "when": {"cpu_percent": ["<", 20], "memory_percent": [[">=", 10], ["<=", 40]]}, "action": "scale_down"},
+    {"environment": "prod", "event_type": "high_cpu", "when": {"error_rate": [">", 0.5]}, "action": "scale_up"},
+    {"environment": "prod", "event_type": "crash", "action": "restart"},
+]
+
+def _request(env, event, cpu, memory, error_rate):
+    return {"environment": env, "event_type": event,
+            "metrics": {"cpu_percent": cpu, "memory_percent": memory, "error_rate": error_rate}}
+
+def test_metric_thresholds():
+    """Test rules fire only when their metric conditions hold"""
+    agent = RLDecisionBrain(policy=RulePolicy(RULES))
+
+    response = agent.decide(_request("dev", "high_cpu", 85, 50, 0.01))
+    assert response["action"] == "scale_up"
+    assert response["reason"] == "CPU above 80% in dev"
+    assert agent.decide(_request("dev", "high_cpu", 80, 50, 0.01))["action"] == "noop"
+    assert agent.decide(_request("stage", "low_load", 5, 10, 0.0))["action"] == "scale_down"
+    assert agent.decide(_request("stage", "low_load", 5, 41, 0.0))["action"] == "noop"
+    assert agent.decide(_request("prod", "crash", 5, 5, 0.9))["action"] == "restart"
+    # Missing or non-numeric metrics never satisfy a condition
+    assert agent.decide({"environment": "dev", "event_type": "high_cpu", "metrics": {}})["action"] == "noop"
+    print("[PASS] Metric thresholds select rules")
+
+def test_scope_still_enforced():
+    """Test rule proposals outside ACTION_SCOPE are downgraded"""
+    agent = RLDecisionBrain(policy=RulePolicy(RULES))
+    response = agent.decide(_request("prod", "high_cpu", 50, 50, 0.9))
+    assert response["action"] == "noop"
+    assert response["safety_filtered"] == True
+    assert response["proposed_action"] == "scale_up"
+    print("[PASS] PROD scale_up rule -> noop (safety filtered)")
+
+def test_vectorized_matches_single():
+    """Test decide_batch (vectorized) agrees with decide() on random metrics"""
+    agent = RLDecisionBrain(policy=RulePolicy(RULES))
+    rng = random.Random(7)
+    requests = [
+        _request(rng.choice(["dev", "stage", "prod"]), rng.choice(["high_cpu", "low_load", "crash", "other"]),
+                 rng.choice([rng.uniform(0, 100), 80, 20]), rng.uniform(0, 100), rng.random())
+        for _ in range(2000)
+    ]
+    for request, result in zip(requests, agent.decide_batch(requests)):
+        expected = agent.decide(request)
+        expected["timestamp"] = result["timestamp"]
+        assert result == expected
+
+    policy = agent._table.policy
+    slots = np.array([0, 0, 0])
+    values = np.array([[90.0, 0, 0], [np.nan, 0, 0], [10.0, 0, 0]])
+    assert policy.evaluate_batch(slots, values).tolist() == [
+        policy.evaluate(0, tuple(row)) for row in values.tolist()]
+    print("[PASS] Vectorized evaluation matches single evaluation")
+
+def test_decision_map_rules_identical():
+    """Test DECISION_MAP expressed as rules gives byte-identical decisions"""
+    default = RLDecisionBrain()
+    ruled = RLDecisionBrain(policy=RulePolicy(rules_from_decision_map(RLDecisionBrain.DECISION_MAP), "builtin"))
+    for env in ["dev", "stage", "prod"]:
+        for event in ["high_cpu", "high_memory", "crash", "low_load", "other"]:
+            request = _request(env, event, 50, 50, 0.1)
+            a, b = default.decide(request), ruled.decide(request)
+            a["timestamp"] = b["timestamp"] = 0
+            assert json.dumps(a) == json.dumps(b)
+    print("[PASS] DECISION_MAP as rules is byte-identical")
+
+def test_invalid_rules_rejected():
+    """Test malformed rule sets fail at load time"""
+    bad_rule_sets = [
+        [{"environment": "qa", "event_type": "crash", "action": "restart"}],
+        [{"environment": "dev", "event_type": "crash", "action": "reboot"}],
+        [{"environment": "dev", "event_type": "crash", "action": "restart", "when": {"disk": [">", 1]}}],
+        [{"environment": "dev", "event_type": "crash", "action": "restart", "when": {"cpu_percent": ["~", 1]}}],
+        [{"environment": "dev", "action": "restart"}],
+        ["x"],
+        [{"environment": "dev", "event_type": "crash", "action": "restart", "when": [[">", 1]]}],
+        [{"environment": "dev", "event_type": "crash", "action": "restart", "when": {"cpu_percent": {">": 1}}}],
+        [{"environment": "dev", "event_type": "crash", "action": "restart", "when": {"cpu_percent": 5}}],
+        [{"environment": "dev", "event_type": "crash", "action": "restart", "when": {"cpu_percent": [[">"], 1]}}],
+    ]
+    for rules in bad_rule_sets:
+        try:
+            RulePolicy(rules)
+        except RuleSetError:
+            continue
+        raise AssertionError(f"Rule set accepted: {rules}")
+    assert metrics_vector({"cpu_percent": "90", "memory_percent": True})[:2] != (90.0, 1.0)
+    print("[PASS] Invalid rule sets rejected")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Rule Policy Test Suite")
+    print("=" * 60)
+
+    print("\n[1/5] Testing metric thresholds...")
+    test_metric_thresholds()
+
+    print("\n[2/5] Testing safety scope...")
+    test_scope_still_enforced()
+
+    print("\n[3/5] Testing vectorized evaluation...")
+    test_vectorized_matches_single()
+
+    print("\n[4/5] Testing DECISION_MAP equivalence...")
+    test_decision_map_rules_identical()
+
+    print("\n[5/5] Testing rule validation...")
+    test_invalid_rules_rejected()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL RULE POLICY TESTS PASSED")
+    print("=" * 60)
@@ -0,0 +1,103 @@
+"""
+Request Schema Test Suite
+Validates the compiled validators and that invalid input never reaches a 500
+"""
+
+import logging
+import random
+
+import app as app_module
+from request_schema import REQUEST_VALIDATOR, SchemaError, compile_schema
+from rl_decision_brain import RLDecisionBrain
+
+logging.disable(logging.INFO)
+
+VALUES = ["dev", "prod", "", 5, 5.5, -1, 150, 0.5, True, None, float("nan"), [], {}, {"cpu_percent": 1}]
+
+def _random_request(rng):
+    """Well-formed or broken request with each field independently missing or mistyped"""
+    request = {}
+    for field, good in (("environment", "prod"), ("event_type", "crash"), ("metrics", None)):
+        roll = rng.random()
+        if roll < 0.15:
+            continue
+        if field == "metrics" and roll < 0.85:
+            request[field] = {name: rng.choice([rng.uniform(-0.5, 1.5), rng.uniform(0, 100), rng.choice(VALUES)])
+                              for name in ("cpu_percent", "memory_percent", "error_rate") if rng.random() < 0.7}
+        else:
+            request[field] = good if roll < 0.85 and good is not None else rng.choice(VALUES)
+    return request if rng.random() < 0.95 else rng.choice(VALUES)
+
+def test_compiled_validators():
+    """Test fail-fast, collect-all and batched validators agree on randomized input"""
+    v = REQUEST_VALIDATOR
+    assert v.validate({"environment": "dev", "event_type": "crash", "metrics": {}}) is None
+    assert v.validate({"environment": 5, "event_type": "crash", "metrics": {}}) == "Field 'environment' must be a string"
+    assert v.validate({"environment": "dev", "event_type": "x", "metrics": {"cpu_percent": "90"}}) == \
+        "Field 'metrics.cpu_percent' must be a number"
+    assert v.validate({"environment": "dev", "event_type": "x", "metrics": {"error_rate": 1.5}}) == \
+        "Field 'metrics.error_rate' must be between 0 and 1"
+    assert v.validate({"environment": "dev", "event_type": "x", "metrics": {"cpu_percent": True}}) is not None
+    assert v.validate_all({"metrics": {"cpu_percent": -1, "memory_percent": None}}) == [
+        "Missing required field: environment",
+        "Missing required field: event_type",
+        "Field 'metrics.cpu_percent' must be between 0 and 100",
+        "Field 'metrics.memory_percent' must be a number",
+    ]
+
+    rng = random.Random(3)
+    requests = [_random_request(rng) for _ in range(5000)]
+    first = [v.validate(r) for r in requests]
+    assert first == v.validate_batch(requests)
+    assert first == [(v.validate_all(r) or [None])[0] for r in requests]
+    assert 500 < first.count(None) < 4500
+
+    for bad in ({"x": {"type": "uuid"}}, {"x": {"type": "string", "min": 1}},
+                {"x": {"type": "number", "fields": {}}}, {"x": {"type": "object", "fields": {"y": {}}}}):
+        try:
+            compile_schema(bad)
+            assert False, bad
+        except SchemaError:
+            pass
+    print("[PASS] Fail-fast, collect-all and batch validators agree")
+
+def test_invalid_requests_are_noops():
+    """Test malformed bodies and mistyped fields answer NOOP with 200, never 500"""
+    client = app_module.app.test_client()
+    bodies = [b"{not json", b"", b"null", b"[1, 2]", b'"prod"',
+              b'{"environment": 5, "event_type": "crash", "metrics": {}}',
+              b'{"environment": "prod", "event_type": ["crash"], "metrics": {}}',
+              b'{"environment": "prod", "event_type": "crash", "metrics": {"cpu_percent": "high"}}',
+              b'{"environment": "prod", "event_type": "crash", "metrics": {"error_rate": 7}}']
+    for body in bodies:
+        response = client.post('/decide', data=body, content_type='application/json')
+        assert response.status_code == 200, body
+        result = response.get_json()
+        assert result["action"] == "noop" and result["environment"] in ("prod", "unknown"), body
+    assert client.post('/decide/batch', data=b"{oops", content_type='application/json').status_code == 400
+
+    agent = RLDecisionBrain(collect_errors=True)
+    results = agent.decide_batch([
+        {"environment": "prod", "event_type": "crash", "metrics": {"cpu_percent": 200, "error_rate": "x"}},
+        {"environment": "prod", "event_type": "crash", "metrics": {"cpu_percent": 20}},
+    ])
+    assert results[0]["reason"] == "Field 'metrics.cpu_percent' must be between 0 and 100"
+    assert len(results[0]["validation_errors"]) == 2
+    assert results[1]["action"] == "restart" and "validation_errors" not in results[1]
+    assert "validation_errors" not in RLDecisionBrain().decide({"environment": "prod"})
+    print("[PASS] Invalid input always becomes a NOOP response")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Request Schema Test Suite")
+    print("=" * 60)
+
+    print("\n[1/2] Testing compiled validators...")
+    test_compiled_validators()
+
+    print("\n[2/2] Testing invalid requests over HTTP...")
+    test_invalid_requests_are_noops()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL REQUEST SCHEMA TESTS PASSED")
+    print("=" * 60)
@@ -0,0 +1,140 @@
+"""
+Shadow Evaluation Test Suite
+Validates agreement statistics, the bounded queue and the /shadow endpoint
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+
+import app as app_module
+from rl_decision_brain import Action, RLDecisionBrain
+from shadow import ShadowEvaluator, load_candidates
+
+logging.disable(logging.INFO)
+
+def _candidate(changes):
+    """Brain serving DECISION_MAP with some (environment, event_type) pairs changed"""
+    brain = RLDecisionBrain()
+    decision_map = dict(RLDecisionBrain.DECISION_MAP)
+    decision_map.update(changes)
+    brain.install_policy(brain.compile_policy(decision_map=decision_map, version="candidate"))
+    return brain
+
+def _request(environment, event_type):
+    return {"environment": environment, "event_type": event_type,
+            "metrics": {"cpu_percent": 50.0, "memory_percent": 50.0, "error_rate": 0.1}}
+
+def test_agreement_statistics():
+    """Test per-pair agreement, transitions and latency against the served decisions"""
+    primary = RLDecisionBrain()
+    shadow = ShadowEvaluator(primary, {
+        "same": RLDecisionBrain(),
+        "cautious": _candidate({("prod", "crash"): Action.NOOP, ("dev", "high_cpu"): Action.SCALE_DOWN}),
+    }, workers=0)
+
+    requests = [_request("prod", "crash")] * 4 + [_request("dev", "high_cpu")] * 3 \
+        + [_request("stage", "low_load"), _request("dev", "made_up_event")]
+    for request in requests:
+        assert shadow.submit(request, primary.decide(request))
+    # A cooldown downgrade is compared as the policy's decision, not as a disagreement
+    cooled = dict(primary.decide(requests[0]), action="noop", proposed_action="restart", cooldown=True)
+    assert shadow.submit(requests[0], cooled)
+    requests.append(requests[0])
+    shadow.drain()
+
+    stats = shadow.stats()
+    assert stats["primary_version"] == "builtin" and stats["queue"]["queued"] == 0
+    assert stats["candidates"]["same"]["agreement"] == 1.0 and stats["candidates"]["same"]["evaluated"] == 10
+    cautious = stats["candidates"]["cautious"]
+    assert cautious["version"] == "candidate" and cautious["evaluated"] == len(requests)
+    assert cautious["pairs"]["prod/crash"] == {"agree": 0, "disagree": 5, "transitions": {"restart->noop": 5}}
+    assert cautious["pairs"]["dev/high_cpu"]["transitions"] == {"scale_up->scale_down": 3}
+    assert cautious["pairs"]["stage/low_load"] == {"agree": 1, "disagree": 0}
+    assert cautious["pairs"]["dev/other"] == {"agree": 1, "disagree": 0}
+    assert cautious["agreement"] == 2 / len(requests)
+    assert cautious["latency_us"]["p50"] is not None and stats["lag_us"]["p99"] is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "v2.json")
+        with open(path, "w") as f:
+            json.dump({"version": "v2", "decision_map": {"prod": {"crash": "noop"}}}, f)
+        candidates = load_candidates(f"{path}, renamed={path}", primary)
+    assert sorted(candidates) == ["renamed", "v2"] and candidates["v2"].policy_info()["version"] == "v2"
+    print("[PASS] Shadow statistics report agreement and transitions per pair")
+
+def test_bounded_queue():
+    """Test a saturated queue drops and counts work instead of growing, and the pool drains it"""
+    primary = RLDecisionBrain()
+    dropped = []
+    request = _request("prod", "crash")
+    response = primary.decide(request)
+
+    shadow = ShadowEvaluator(primary, {"same": RLDecisionBrain()}, workers=0, queue_size=5,
+                             on_drop=lambda: dropped.append(1))
+    accepted = [shadow.submit(request, response) for _ in range(8)]
+    assert accepted == [True] * 5 + [False] * 3
+    assert shadow.stats()["queue"]["dropped"] == 3 and len(dropped) == 3
+    shadow.drain()
+    assert shadow.stats()["candidates"]["same"]["evaluated"] == 5
+
+    pooled = ShadowEvaluator(primary, {"same": RLDecisionBrain()}, workers=2, queue_size=1000,
+                             poll_interval=0.01)
+    try:
+        for _ in range(500):
+            pooled.submit(request, response)
+        deadline = time.time() + 5
+        while pooled.stats()["candidates"]["same"]["evaluated"] < 500 and time.time() < deadline:
+            time.sleep(0.01)
+        assert pooled.stats()["candidates"]["same"]["evaluated"] == 500
+    finally:
+        pooled.close()
+    print("[PASS] Shadow queue stays bounded and the pool evaluates in the background")
+
+def test_shadow_endpoint():
+    """Test /decide feeds valid, non-coalesced decisions to the shadow pool and /shadow reports them"""
+    from coalesce import Coalescer
+
+    client = app_module.app.test_client()
+    assert client.get('/shadow').status_code == 404
+
+    candidate = _candidate({("prod", "crash"): Action.NOOP})
+    app_module.shadow = ShadowEvaluator(app_module.agent, {"cautious": candidate}, workers=0)
+    app_module.coalescer = Coalescer(window=30.0)
+    try:
+        for _ in range(3):
+            response = client.post('/decide', json=dict(_request("prod", "crash"), target="web-1"))
+            assert response.get_json()["action"] == "restart"
+        client.post('/decide', json={"environment": "prod"})
+        client.post('/decide/batch', json=[_request("dev", "crash"), _request("qa", "crash")])
+        app_module.shadow.drain()
+
+        stats = client.get('/shadow').get_json()
+        cautious = stats["candidates"]["cautious"]
+        assert cautious["evaluated"] == 2
+        assert cautious["pairs"] == {"prod/crash": {"agree": 0, "disagree": 1, "transitions": {"restart->noop": 1}},
+                                     "dev/crash": {"agree": 1, "disagree": 0}}
+    finally:
+        app_module.shadow = None
+        app_module.coalescer = None
+    print("[PASS] /shadow reports agreement for decisions served by /decide")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Shadow Evaluation Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing agreement statistics...")
+    test_agreement_statistics()
+
+    print("\n[2/3] Testing bounded queue...")
+    test_bounded_queue()
+
+    print("\n[3/3] Testing /shadow endpoint...")
+    test_shadow_endpoint()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL SHADOW TESTS PASSED")
+    print("=" * 60)
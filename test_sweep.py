@@ -0,0 +1,115 @@
+"""
+Policy Sweep Test Suite
+Validates vectorized decision surfaces against decide() and the policy diff
+"""
+
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from frozen_policy import FrozenPolicy
+from policy_rules import RulePolicy
+from rl_decision_brain import Action, Environment, RLDecisionBrain
+from sweep import ACTIONS, AXES, DecisionSurface, diff_surfaces, parse_axis, sweep
+
+AXES_SMALL = {"cpu_percent": parse_axis("0:100:21"), "memory_percent": parse_axis("0,50,85,85.5,100"),
+              "error_rate": parse_axis("0:1:11")}
+
+def _check_against_decide(brain, surface, samples=400):
+    rng = random.Random(5)
+    for _ in range(samples):
+        env_id = rng.randrange(len(surface.environments))
+        event_id = rng.randrange(len(surface.event_types))
+        index = [rng.randrange(len(surface.axes[axis])) for axis in AXES]
+        metrics = {axis: float(surface.axes[axis][i]) for axis, i in zip(AXES, index)}
+        expected = brain.decide({"environment": surface.environments[env_id],
+                                 "event_type": surface.event_types[event_id], "metrics": metrics})
+        code = int(surface.codes[(env_id, event_id) + tuple(index)])
+        assert ACTIONS[code & 3] == expected["action"], (surface.event_types[event_id], metrics)
+        assert ACTIONS[code >> 2] == expected.get("proposed_action", expected["action"])
+
+def test_surface_matches_decide():
+    """Test builtin, rule and linear learned policies sweep to the outcomes decide() serves"""
+    builtin = RLDecisionBrain()
+    surface = sweep(builtin._table, AXES_SMALL, builtin.event_types() + ["disk_full"])
+    assert surface.codes.shape == (3, 5, 21, 5, 11) and surface.codes.dtype == np.uint8
+    _check_against_decide(builtin, surface)
+    # stage/crash and prod/high_cpu are DECISION_MAP NOOPs; only scope downgrades count
+    assert not surface.downgraded.any()
+    summary = surface.summary()
+    assert summary["pairs"]["prod/crash"] == {"actions": {"restart": 21 * 5 * 11}, "downgraded": 0}
+
+    rules = RLDecisionBrain(RulePolicy([
+        {"environment": "dev", "event_type": "high_cpu", "action": "scale_up", "when": {"cpu_percent": [">", 80]}},
+        {"environment": "prod", "event_type": "high_memory", "action": "scale_up",
+         "when": {"memory_percent": [">=", 85], "error_rate": ["<", 0.5]}},
+        {"environment": "stage", "event_type": "crash", "action": "restart"},
+    ]))
+    surface = sweep(rules._table, AXES_SMALL)
+    _check_against_decide(rules, surface)
+    prod_memory = surface.downgraded[2, surface.event_types.index("high_memory")]
+    assert prod_memory.sum() == 21 * 3 * 5   # memory 85, 85.5, 100 and error_rate below 0.5
+    assert surface.downgraded[1, surface.event_types.index("crash")].all()
+
+    rng = np.random.default_rng(2)
+    events = ["high_cpu", "crash"]
+    linear = FrozenPolicy(rng.normal(size=(len(Environment) + len(events) + 4, len(Action))),
+                          "linear", events, RLDecisionBrain.ACTION_SCOPE)
+    learned = RLDecisionBrain(linear)
+    surface = sweep(learned._table, AXES_SMALL)
+    _check_against_decide(learned, surface)
+    print("[PASS] Swept surfaces match decide() point by point")
+
+def test_policy_diff():
+    """Test the diff locates the changed region and round-trips saved surfaces"""
+    brain = RLDecisionBrain()
+    before = sweep(brain._table, AXES_SMALL)
+    after_table = brain.compile_policy(RulePolicy([
+        {"environment": "dev", "event_type": "high_cpu", "action": "scale_up", "when": {"cpu_percent": [">", 80]}},
+        {"environment": "dev", "event_type": "high_cpu", "action": "noop"},
+    ] + [
+        {"environment": env, "event_type": event, "action": action.value}
+        for (env, event), action in brain.DECISION_MAP.items() if (env, event) != ("dev", "high_cpu")
+    ], version="v2"), action_scope={Environment.PROD: {Action.NOOP}})
+    after = sweep(after_table, AXES_SMALL, before.event_types)
+
+    report = diff_surfaces(before, after)
+    assert report["before"] == "builtin" and report["after"] == "v2"
+    cpu_pair = report["pairs"]["dev/high_cpu"]
+    assert cpu_pair["transitions"] == {"scale_up->noop": 17 * 5 * 11}   # cpu 0..80 of 0..100 step 5
+    assert cpu_pair["region"]["cpu_percent"] == [0.0, 80.0]
+    crash = report["pairs"]["prod/crash"]
+    assert crash["transitions"] == {"restart->noop": 21 * 5 * 11}
+    assert crash["downgraded"] == {"before": 0, "after": 21 * 5 * 11}
+    assert report["changed"] == 17 * 5 * 11 + 21 * 5 * 11
+    assert set(report["pairs"]) == {"dev/high_cpu", "prod/crash"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "surface.npz")
+        after.save(path)
+        loaded = DecisionSurface.load(path)
+    assert np.array_equal(loaded.codes, after.codes) and loaded.version == "v2"
+    assert diff_surfaces(after, loaded)["changed"] == 0
+    try:
+        diff_surfaces(before, sweep(brain._table, dict(AXES_SMALL, error_rate=parse_axis("0:1:3"))))
+        assert False, "grids differ"
+    except ValueError:
+        pass
+    print("[PASS] Policy diff reports changed cells, transitions and regions")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Policy Sweep Test Suite")
+    print("=" * 60)
+
+    print("\n[1/2] Testing surfaces against decide()...")
+    test_surface_matches_decide()
+
+    print("\n[2/2] Testing policy diff...")
+    test_policy_diff()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL SWEEP TESTS PASSED")
+    print("=" * 60)
@@ -0,0 +1,161 @@
+"""
+Offline Training Test Suite
+Validates fitted Q iteration, ACTION_SCOPE restriction and the exported frozen policies
+"""
+
+import json
+import os
+import random
+import tempfile
+
+import numpy as np
+
+import train_policy
+from frozen_policy import load_frozen_policy
+from policy_reload import load_policy_file
+from rl_decision_brain import RLDecisionBrain
+from train_policy import ACTION_IDS, train
+
+def _state(environment, event_type, cpu=50.0):
+    return {"environment": environment, "event_type": event_type,
+            "metrics": {"cpu_percent": cpu, "memory_percent": 40.0, "error_rate": 0.01}}
+
+def _transition(state, action, reward, next_state=None):
+    return json.dumps({"state": state, "action": action, "reward": reward, "next_state": next_state})
+
+def _write(path, lines):
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def test_q_table_training():
+    """Test Q values solve the empirical Bellman equation and unseen or illegal actions are never chosen"""
+    high, low = _state("dev", "high_cpu"), _state("dev", "low_load")
+    lines = ([_transition(high, "scale_up", 1.0, low)] * 4 + [_transition(high, "noop", -1.0, high)] * 2
+             + [_transition(low, "scale_down", 2.0)] * 3 + [_transition(low, "noop", 0.0)]
+             + [_transition(_state("prod", "crash"), "scale_up", 5.0),       # outside ACTION_SCOPE
+                _transition(high, "reboot", 1.0), _transition(high, "noop", float("nan")),
+                _transition(high, "noop", 1.0, {"environment": "qa"}), "{broken", "[1]"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "transitions.jsonl")
+        _write(source, lines)
+        stats = train([source], os.path.join(tmp, "policy.npy"), gamma=0.5, jobs=1)
+        assert stats["transitions"] == 10 and stats["pairs_trained"] == 4
+        assert stats["skipped"] == {"invalid_next_state": 1, "invalid_reward": 1, "malformed": 2,
+                                    "out_of_scope": 1, "unknown_action": 1}
+
+        # V(low) = 2, Q(high, scale_up) = 1 + 0.5 * 2, Q(high, noop) = -1 + 0.5 * V(high); floor = -1 / 0.5 - 1
+        weights = np.load(os.path.join(tmp, "policy.npy"))
+        with open(os.path.join(tmp, "policy.json")) as f:
+            metadata = json.load(f)
+        events = metadata["event_types"]
+        assert metadata["kind"] == "q_table" and set(events) == {"high_cpu", "low_load"}
+        expected_high = np.full(4, -3.0)
+        expected_high[[ACTION_IDS["noop"], ACTION_IDS["scale_up"]]] = [0.0, 2.0]
+        assert np.allclose(weights[0, events.index("high_cpu")], expected_high)
+        assert np.allclose(weights[0, events.index("low_load"), [ACTION_IDS["noop"], ACTION_IDS["scale_down"]]], [0, 2])
+
+        brain = RLDecisionBrain()
+        brain.install_policy(load_policy_file(brain, os.path.join(tmp, "policy.npy")))
+        assert brain.decide(high)["action"] == "scale_up" and brain.decide(low)["action"] == "scale_down"
+        assert brain.decide(_state("stage", "high_cpu"))["action"] == "noop"   # no evidence in stage
+        assert brain.decide(_state("dev", "crash"))["action"] == "noop"        # event type never logged
+
+        train([source], os.path.join(tmp, "strict.npy"), gamma=0.5, min_count=3, jobs=1)
+        strict = load_frozen_policy(os.path.join(tmp, "strict.npy"), RLDecisionBrain.ACTION_SCOPE)
+        assert strict.weights[0, events.index("high_cpu"), ACTION_IDS["noop"]] == -3.0   # 2 < min_count
+    print("[PASS] Tabular fitted Q iteration matches the Bellman solution")
+
+def test_linear_training():
+    """Test the linear policy learns metric thresholds without carrying actions into other states"""
+    rng = random.Random(7)
+    lines = []
+    for _ in range(3000):
+        cpu = rng.uniform(0, 100)
+        action = rng.choice(["noop", "scale_up"])
+        reward = (1.0 if cpu > 60 else -1.0) * (1 if action == "scale_up" else -1)
+        lines.append(_transition(_state("dev", "high_cpu", cpu), action, reward))
+        action = rng.choice(["noop", "restart"])
+        lines.append(_transition(_state("prod", "crash"), action, 1.0 if action == "restart" else -1.0,
+                                 _state("prod", "high_cpu")))
+        lines.append(_transition(_state("prod", "high_cpu"), "noop", 0.0))
+    # json accepts Infinity and 1e400 as metric values
+    lines += [_transition(_state("dev", "high_cpu", float("inf")), "noop", 1.0),
+              _transition(_state("prod", "crash"), "restart", 1.0, _state("prod", "high_cpu", 1e300))
+              .replace("1e+300", "1e400")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "transitions.jsonl")
+        _write(source, lines)
+        stats = train([source], os.path.join(tmp, "linear.npy"), kind="linear", jobs=1)
+        assert stats["transitions"] == 9000 and stats["actions_trained"] == ["noop", "scale_up", "restart"]
+        assert stats["skipped"] == {"invalid_next_state": 1, "invalid_state": 1}
+        policy = load_frozen_policy(os.path.join(tmp, "linear.npy"), RLDecisionBrain.ACTION_SCOPE)
+
+        # A diverged fit is refused rather than written
+        trainer = train_policy.train_linear
+        train_policy.train_linear = lambda *args, **kwargs: (np.full((11, 4), np.nan), {"delta": float("nan")})
+        try:
+            train([source], os.path.join(tmp, "diverged.npy"), kind="linear", jobs=1)
+            assert False, "non-finite weights were saved"
+        except ValueError as e:
+            assert "non-finite" in str(e)
+        finally:
+            train_policy.train_linear = trainer
+        assert not os.path.exists(os.path.join(tmp, "diverged.npy"))
+    assert policy.kind == "linear"
+
+    brain = RLDecisionBrain(policy)
+    assert [brain.decide(_state("dev", "high_cpu", cpu))["action"] for cpu in (10, 40, 80, 95)] == \
+        ["noop", "noop", "scale_up", "scale_up"]                                 # never restart: not seen in dev
+    assert brain.decide(_state("prod", "crash"))["action"] == "restart"
+    assert brain.decide(_state("prod", "high_cpu"))["action"] == "noop"
+    assert policy.weights[-1, ACTION_IDS["scale_down"]] < -10 and not policy.weights[:-1, ACTION_IDS["scale_down"]].any()
+    print("[PASS] Linear fitted Q iteration learns metric-aware decisions")
+
+def test_deterministic_export():
+    """Test the artifact is byte-identical across parser processes and chunking"""
+    rng = random.Random(3)
+    states = [_state(environment, event_type, rng.uniform(0, 100))
+              for environment in ("dev", "stage", "prod") for event_type in ("high_cpu", "crash", "low_load")]
+    lines = [_transition(state, rng.choice(["noop", "scale_up", "scale_down", "restart"]), rng.gauss(0, 1),
+                         rng.choice(states + [None])) for state in (rng.choice(states) for _ in range(2000))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = os.path.join(tmp, "a.jsonl"), os.path.join(tmp, "b.jsonl")
+        _write(first, lines[:1200])
+        _write(second, lines[1200:])
+        outputs = []
+        for kind in ("q_table", "linear"):
+            for jobs in (1, 2):
+                prefix = os.path.join(tmp, f"{kind}-{jobs}")
+                stats = train([first, second], prefix + ".npy", kind=kind, jobs=jobs, chunk_size=4096)
+                assert stats["skipped"] == {"out_of_scope": sum(1 for line in lines if _out_of_scope(line))}
+                with open(prefix + ".npy", "rb") as weights, open(prefix + ".json", "rb") as metadata:
+                    outputs.append((weights.read(), metadata.read()))
+        assert outputs[0] == outputs[1] and outputs[2] == outputs[3]
+    print("[PASS] Exported policies are deterministic")
+
+def _out_of_scope(line):
+    transition = json.loads(line)
+    environment = transition["state"]["environment"]
+    return transition["action"] not in {action.value for action in RLDecisionBrain.ACTION_SCOPE[
+        next(env for env in RLDecisionBrain.ACTION_SCOPE if env.value == environment)]}
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Offline Training Test Suite")
+    print("=" * 60)
+
+    print("\n[1/3] Testing tabular training...")
+    test_q_table_training()
+
+    print("\n[2/3] Testing linear training...")
+    test_linear_training()
+
+    print("\n[3/3] Testing deterministic export...")
+    test_deterministic_export()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL OFFLINE TRAINING TESTS PASSED")
+    print("=" * 60)
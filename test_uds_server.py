@@ -0,0 +1,126 @@
+"""
+Unix Socket Listener Test Suite
+Validates the binary protocol against RLDecisionBrain and pipelined connections
+"""
+
+import logging
+import os
+import socket
+import tempfile
+import threading
+
+from policy_rules import RulePolicy
+from rl_decision_brain import RLDecisionBrain
+from uds_server import LENGTH, RESPONSE, DecisionSocketClient, decode_response, encode_request, serve_in_thread
+
+logging.disable(logging.INFO)
+
+def _serve(agent, **kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "brain.sock")
+    return path, serve_in_thread(path, agent, **kwargs)
+
+def test_matches_brain():
+    """Test every environment/event pair decides as RLDecisionBrain.decide() does"""
+    agent = RLDecisionBrain()
+    seen = []
+    path, server = _serve(agent, on_decision=lambda event, response, ts: seen.append(event))
+    try:
+        with DecisionSocketClient(path) as client:
+            for environment in ("dev", "stage", "prod"):
+                for event_type in agent.event_types() + ["disk_full"]:
+                    expected = agent.decide({"environment": environment, "event_type": event_type, "metrics": {}})
+                    got = client.decide(environment, event_type, {"cpu_percent": 50})
+                    assert got["action"] == expected["action"]
+                    assert got["safety_filtered"] == expected["safety_filtered"] and got["valid"]
+                    assert got.get("proposed_action") == expected.get("proposed_action")
+                    assert got["timestamp"] > 0
+            # Case-insensitive event types, as over HTTP
+            assert client.decide("prod", "CRASH")["action"] == "restart"
+            # Out-of-range metrics fail the request schema
+            invalid = client.decide("dev", "crash", {"cpu_percent": 150})
+            assert invalid["action"] == "noop" and not invalid["valid"]
+        assert len(seen) == 3 * (len(agent.event_types()) + 1) + 1
+
+        # Unknown environment id: NOOP flagged invalid, connection stays usable
+        raw = socket.socket(socket.AF_UNIX)
+        raw.connect(path)
+        frame = bytearray(encode_request(7, "dev", "crash"))
+        frame[LENGTH.size + 4] = 9
+        raw.sendall(bytes(frame) + encode_request(8, "dev", "crash"))
+        data = b""
+        while len(data) < 2 * (LENGTH.size + RESPONSE.size):
+            data += raw.recv(4096)
+        first = decode_response(data[LENGTH.size:LENGTH.size + RESPONSE.size])
+        second = decode_response(data[2 * LENGTH.size + RESPONSE.size:])
+        assert first["request_id"] == 7 and first["action"] == "noop" and not first["valid"]
+        assert second["request_id"] == 8 and second["action"] == "restart"
+        # Bad frame length closes the connection
+        raw.sendall(LENGTH.pack(3) + b"abc")
+        assert raw.recv(4096) == b""
+        raw.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not os.path.exists(path)
+
+    # A regular file at the socket path is never deleted
+    with open(path, "w") as f:
+        f.write("keep")
+    try:
+        serve_in_thread(path, agent)
+        assert False, "a regular file was replaced by the socket"
+    except FileExistsError:
+        pass
+    with open(path) as f:
+        assert f.read() == "keep"
+    print("[PASS] Socket decisions match RLDecisionBrain")
+
+def test_pipelining_and_rules():
+    """Test pipelined requests from concurrent connections, with metric-aware rules"""
+    agent = RLDecisionBrain(RulePolicy([
+        {"environment": "prod", "event_type": "high_cpu", "action": "restart", "when": {"cpu_percent": [">", 90]}},
+        {"environment": "prod", "event_type": "high_cpu", "action": "noop"},
+    ]))
+    path, server = _serve(agent)
+    requests = [("prod", "high_cpu", {"cpu_percent": float(i % 100)}) for i in range(5000)]
+    expected = ["restart" if i % 100 > 90 else "noop" for i in range(5000)]
+    failures = []
+
+    def worker():
+        try:
+            with DecisionSocketClient(path) as client:
+                # Frames split across reads at arbitrary points are reassembled
+                results = client.decide_many(requests, depth=333)
+                if [r["action"] for r in results] != expected:
+                    failures.append("actions")
+        except Exception as e:
+            failures.append(repr(e))
+
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with DecisionSocketClient(path) as client:
+            assert client.decide("prod", "high_cpu")["action"] == "noop"   # missing metric
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert failures == []
+    print("[PASS] Pipelined connections return ordered, rule-aware decisions")
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("RL Decision Brain - Unix Socket Test Suite")
+    print("=" * 60)
+
+    print("\n[1/2] Testing decisions over the socket...")
+    test_matches_brain()
+
+    print("\n[2/2] Testing pipelining...")
+    test_pipelining_and_rules()
+
+    print("\n" + "=" * 60)
+    print("[SUCCESS] ALL UNIX SOCKET TESTS PASSED")
+    print("=" * 60)
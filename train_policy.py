@@ -0,0 +1,433 @@
+"""
+Offline Policy Training for RL Decision Brain
+Fitted Q iteration over logged transitions, exported as a frozen policy
+
+Run: python train_policy.py transitions.jsonl [more.jsonl ...] --out policy.npy
+                            [--kind q_table|linear] [--gamma 0.9] [--min-count 1] [--jobs N]
+
+Training happens offline only; the service keeps serving the frozen
+artifact (RL_BRAIN_POLICY=policy.npy) with learning disabled.
+
+Input: JSONL, one transition per line,
+
+    {"state": <a /decide request>, "action": "restart", "reward": 1.0,
+     "next_state": <a /decide request>, "done": false}
+
+where a missing or null next_state (or "done": true) ends an episode. Lines
+that are malformed, name an unknown environment or action, carry a
+non-finite reward or metric, or take an action ACTION_SCOPE does not allow in the
+state's environment are skipped and counted.
+
+Files are split into newline-aligned byte ranges (replay.chunk_ranges) that
+worker processes parse into compact arrays, consumed in file order:
+
+q_table  States are (environment, event_type). Each chunk is reduced to
+         counts, reward sums and next-state counts per (state, action), so
+         memory does not grow with the log, and Q is iterated to convergence
+         on that empirical model:
+             Q(s, a) = mean reward + gamma * sum_s' P(s' | s, a) * max_a' Q(s', a')
+linear   Q(s, a) = features(s) . w_a over the frozen_policy.py linear
+         features (metrics included). Every iteration regresses
+         r + gamma * max_a' Q(s', a') per action with ridge least squares;
+         the transitions stay in memory as arrays (about 45 bytes each).
+
+The max over next actions only considers actions ACTION_SCOPE allows in the
+next state's environment and that were seen at least min_count times (per
+state for q_table, overall for linear). Other actions are exported with a
+value below any achievable return, so a q_table policy never picks an
+action without evidence; ties resolve to noop (first in Action order).
+A linear policy shares weights across states: in each (environment,
+event_type) of the data, actions seen fewer than min_count times there are
+anchored at that low value, but states absent from the data are
+extrapolated - compare against the current policy with sweep.py first.
+
+The same inputs and options give byte-identical artifacts, whatever --jobs.
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from frozen_policy import METRIC_SCALE, save_frozen_policy
+from replay import chunk_ranges
+from rl_decision_brain import Action, Environment, RLDecisionBrain
+
+ENVIRONMENTS = [environment.value for environment in Environment]
+ENV_IDS = {env_str: env_id for env_id, env_str in enumerate(ENVIRONMENTS)}
+ACTIONS = [action.value for action in Action]
+ACTION_IDS = {action: action_id for action_id, action in enumerate(ACTIONS)}
+
+# LEGAL[env_id, action_id]: ACTION_SCOPE as a boolean matrix
+LEGAL = np.array([[action in RLDecisionBrain.ACTION_SCOPE[environment] for action in Action]
+                  for environment in Environment])
+LEGAL_LISTS = LEGAL.tolist()
+
+_NUMBERS = (int, float)
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+# Event types beyond this many are skipped (the q_table model is dense in them)
+MAX_EVENT_TYPES = 256
+
+# Transitions per block in linear iterations, bounding temporary arrays
+BLOCK = 1 << 18
+
+# Fields of a parsed chunk; next_env is -1 for terminal transitions
+FIELDS = ("env", "event", "metrics", "action", "reward", "next_env", "next_event", "next_metrics")
+
+def _state(state: Any) -> Optional[Tuple[int, str, float, float, float]]:
+    """(env_id, event_type, raw metrics...) of a /decide request, or None"""
+    if type(state) is not dict:
+        return None
+    environment, event_type = state.get("environment"), state.get("event_type")
+    if type(environment) is not str or type(event_type) is not str:
+        return None
+    env_id = ENV_IDS.get(environment) if environment in ENV_IDS else ENV_IDS.get(environment.lower())
+    if env_id is None:
+        return None
+    event_type = event_type.lower()
+    metrics = state.get("metrics")
+    if type(metrics) is not dict:
+        return env_id, event_type, 0.0, 0.0, 0.0
+    # Missing, non-numeric and NaN metrics read as 0 (as in frozen_policy._feature_metrics);
+    # infinite ones (Infinity, 1e400) and ones that overflow float32 make the state invalid
+    values = []
+    for name in ("cpu_percent", "memory_percent", "error_rate"):
+        value = metrics.get(name)
+        if type(value) not in _NUMBERS or value != value:
+            value = 0.0
+        elif not -_FLOAT32_MAX <= value <= _FLOAT32_MAX:
+            return None
+        values.append(value)
+    return (env_id, event_type, values[0], values[1], values[2])
+
+def _decode(lines: List[bytes], skipped: Counter) -> List[Any]:
+    """JSON values of lines: one decoder call for the whole chunk, line by line if any is malformed"""
+    try:
+        return json.loads(b"[" + b",".join(lines) + b"]")
+    except ValueError:
+        pass
+    values = []
+    for line in lines:
+        try:
+            values.append(json.loads(line))
+        except ValueError:
+            skipped["malformed"] += 1
+    return values
+
+def parse_chunk(path: str, start: int, end: int) -> Tuple[List[str], Dict[str, np.ndarray], Counter]:
+    """Transitions in [start, end) of path as (event vocabulary, FIELDS arrays, skip counts)"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+
+    rows: List[tuple] = []
+    skipped: Counter = Counter()
+    terminal = (-1, None, 0.0, 0.0, 0.0)
+    for transition in _decode([line for line in data.splitlines() if line.strip()], skipped):
+        if type(transition) is not dict:
+            skipped["malformed"] += 1
+            continue
+        state = _state(transition.get("state"))
+        if state is None:
+            skipped["invalid_state"] += 1
+            continue
+        action = transition.get("action")
+        action_id = ACTION_IDS.get(action.lower()) if type(action) is str else None
+        if action_id is None:
+            skipped["unknown_action"] += 1
+            continue
+        if not LEGAL_LISTS[state[0]][action_id]:
+            skipped["out_of_scope"] += 1
+            continue
+        reward = transition.get("reward")
+        if type(reward) not in _NUMBERS or not math.isfinite(reward):
+            skipped["invalid_reward"] += 1
+            continue
+        next_state = transition.get("next_state")
+        if next_state is None or transition.get("done") is True:
+            next_state = terminal
+        else:
+            next_state = _state(next_state)
+            if next_state is None:
+                skipped["invalid_next_state"] += 1
+                continue
+        rows.append(state + (action_id, reward) + next_state)
+
+    # Columns: env, event, 3 metrics, action, reward, next_env, next_event, 3 next metrics
+    table = np.array(rows, dtype=object).reshape(len(rows), 12)
+    # Event types of accepted transitions only, in first-seen order (terminal states read 0)
+    events: Dict[str, int] = {}
+    for event_type in table[:, [1, 8]].ravel().tolist():
+        if event_type is not None and event_type not in events:
+            events[event_type] = len(events)
+    event_ids = {None: 0, **events}
+    numbers = table[:, [0, 2, 3, 4, 5, 6, 7, 9, 10, 11]].astype(np.float64)
+    scale = np.array(METRIC_SCALE)
+    arrays = {
+        "env": numbers[:, 0].astype(np.int8),
+        "event": np.fromiter(map(event_ids.__getitem__, table[:, 1].tolist()), np.int32, len(rows)),
+        "metrics": (numbers[:, 1:4] / scale).astype(np.float32),
+        "action": numbers[:, 4].astype(np.int8),
+        "reward": numbers[:, 5].copy(),
+        "next_env": numbers[:, 6].astype(np.int8),
+        "next_event": np.fromiter(map(event_ids.__getitem__, table[:, 8].tolist()), np.int32, len(rows)),
+        "next_metrics": (numbers[:, 7:10] / scale).astype(np.float32),
+    }
+    return list(events), arrays, skipped
+
+def read_transitions(paths: Sequence[str], jobs: int = 0,
+                     chunk_size: int = 8 << 20) -> Iterator[Tuple[List[str], Dict[str, np.ndarray], Counter]]:
+    """parse_chunk() results for every chunk of paths, in file order"""
+    ranges = [(path, start, end) for path in paths for start, end in chunk_ranges(path, chunk_size)]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for path, start, end in ranges:
+            yield parse_chunk(path, start, end)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for path, start, end in ranges:
+            pending.append(pool.submit(parse_chunk, path, start, end))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class _Vocabulary:
+    """Global event ids, in first-seen order, for chunk-local vocabularies"""
+
+    def __init__(self, max_size: int = MAX_EVENT_TYPES):
+        self.ids: Dict[str, int] = {}
+        self.max_size = max_size
+
+    def remap(self, chunk: Dict[str, np.ndarray], names: List[str], skipped: Counter) -> Dict[str, np.ndarray]:
+        """chunk with global event ids; transitions over the vocabulary limit are dropped"""
+        lookup = np.empty(len(names) + 1, dtype=np.int32)
+        for local_id, name in enumerate(names):
+            global_id = self.ids.get(name)
+            if global_id is None and len(self.ids) < self.max_size:
+                global_id = self.ids[name] = len(self.ids)
+            lookup[local_id] = -1 if global_id is None else global_id
+        event, next_event = lookup[chunk["event"]], lookup[chunk["next_event"]]
+        keep = (event >= 0) & ((next_event >= 0) | (chunk["next_env"] < 0))
+        if not keep.all():
+            skipped["event_overflow"] += int((~keep).sum())
+            chunk = {name: values[keep] for name, values in chunk.items()}
+            event, next_event = event[keep], next_event[keep]
+        chunk["event"], chunk["next_event"] = event, np.maximum(next_event, 0)
+        return chunk
+
+def _floor(min_reward: float, gamma: float) -> float:
+    """A value below every discounted return of rewards >= min_reward"""
+    return min(0.0, min_reward) / (1.0 - gamma) - 1.0
+
+def train_q_table(chunks: Iterator[Dict[str, np.ndarray]], vocabulary: _Vocabulary, gamma: float = 0.9,
+                  min_count: int = 1, tol: float = 1e-9,
+                  max_iterations: int = 10000) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Weights of shape (environments, event_types, actions) and training statistics"""
+    n_env, n_actions, capacity = len(ENVIRONMENTS), len(ACTIONS), vocabulary.max_size
+    n_pairs = n_env * capacity * n_actions
+    counts = np.zeros(n_pairs)
+    rewards = np.zeros(n_pairs)
+    # Non-terminal successors: (state, action) x next state, states indexed env_id * capacity + event_id
+    successors = np.zeros(n_pairs * n_env * capacity)
+    transitions, min_reward = 0, 0.0
+    for chunk in chunks:
+        if not len(chunk["reward"]):
+            continue
+        pair = (chunk["env"].astype(np.int64) * capacity + chunk["event"]) * n_actions + chunk["action"]
+        counts += np.bincount(pair, minlength=n_pairs)
+        rewards += np.bincount(pair, weights=chunk["reward"], minlength=n_pairs)
+        live = chunk["next_env"] >= 0
+        successor = pair[live] * (n_env * capacity) + chunk["next_env"][live].astype(np.int64) * capacity \
+            + chunk["next_event"][live]
+        successors += np.bincount(successor, minlength=len(successors))
+        transitions += len(pair)
+        min_reward = min(min_reward, float(chunk["reward"].min()))
+    if not transitions:
+        raise ValueError("No valid transitions to train on")
+
+    n_events = len(vocabulary.ids)
+    shape = (n_env, n_events, n_actions)
+    counts = counts.reshape(n_env, capacity, n_actions)[:, :n_events]
+    rewards = rewards.reshape(n_env, capacity, n_actions)[:, :n_events]
+    n_states = n_env * n_events
+    transition_matrix = successors.reshape(n_env, capacity, n_actions, n_env, capacity)[:, :n_events, :, :, :n_events]
+    seen = counts.reshape(n_states, n_actions)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_reward = np.where(seen > 0, rewards.reshape(n_states, n_actions) / seen, 0.0)
+        probabilities = np.where(seen[:, :, None] > 0,
+                                 transition_matrix.reshape(n_states, n_actions, n_states) / seen[:, :, None], 0.0)
+    allowed = (seen >= max(min_count, 1)) & np.repeat(LEGAL, n_events, axis=0)
+    probabilities = probabilities.reshape(n_states * n_actions, n_states)
+
+    values = np.zeros(n_states)
+    q = mean_reward
+    iterations, delta = 0, 0.0
+    while iterations < max_iterations:
+        q = mean_reward + gamma * (probabilities @ values).reshape(n_states, n_actions)
+        new_values = np.where(allowed, q, -np.inf).max(axis=1, initial=-np.inf)
+        new_values[~allowed.any(axis=1)] = 0.0
+        delta = float(np.abs(new_values - values).max(initial=0.0))
+        values = new_values
+        iterations += 1
+        if delta <= tol:
+            break
+
+    weights = np.where(allowed, q, _floor(min_reward, gamma)).reshape(shape)
+    return weights, {"transitions": transitions, "iterations": iterations, "delta": delta,
+                     "pairs_trained": int(allowed.sum())}
+
+def _linear_features(env: np.ndarray, event: np.ndarray, metrics: np.ndarray, n_events: int) -> np.ndarray:
+    """Dense frozen_policy linear features for a block of states"""
+    n_env = len(ENVIRONMENTS)
+    features = np.zeros((len(env), n_env + n_events + 4))
+    rows = np.arange(len(env))
+    features[rows, env] = 1.0
+    features[rows, n_env + event] = 1.0
+    features[:, n_env + n_events:-1] = metrics
+    features[:, -1] = 1.0
+    return features
+
+def train_linear(chunks: Iterator[Dict[str, np.ndarray]], vocabulary: _Vocabulary, gamma: float = 0.9,
+                 min_count: int = 1, ridge: float = 1e-3, tol: float = 1e-6,
+                 max_iterations: int = 200) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Weights of shape (features, actions) and training statistics"""
+    collected = [chunk for chunk in chunks if len(chunk["reward"])]
+    if not collected:
+        raise ValueError("No valid transitions to train on")
+    data = {name: np.concatenate([chunk[name] for chunk in collected]) for name in FIELDS}
+    del collected
+    # Grouped by action (stable, so the order within an action is the input order)
+    order = np.argsort(data["action"], kind="stable")
+    data = {name: values[order] for name, values in data.items()}
+    n_env, n_actions, n_events = len(ENVIRONMENTS), len(ACTIONS), len(vocabulary.ids)
+    n_features = n_env + n_events + 4
+    bounds = np.searchsorted(data["action"], np.arange(n_actions + 1))
+    trained = np.diff(bounds) >= max(min_count, 1)
+    floor = _floor(float(data["reward"].min()), gamma)
+
+    # Anchors: every (environment, event_type) slot of the data where a legal action has
+    # fewer than min_count transitions adds a row with target floor at the slot's mean
+    # metrics, weighted like a typical action of the slot, so the shared weights do not
+    # carry an action into slots where it was never taken
+    n_slots = n_env * n_events
+    slot = data["env"].astype(np.int64) * n_events + data["event"]
+    pair_counts = np.bincount(slot * n_actions + data["action"], minlength=n_slots * n_actions)
+    pair_counts = pair_counts.reshape(n_slots, n_actions)
+    slot_counts = pair_counts.sum(axis=1)
+    mean_metrics = np.stack([np.bincount(slot, weights=data["metrics"][:, i], minlength=n_slots)
+                             for i in range(3)], axis=1) / np.maximum(slot_counts, 1)[:, None]
+    slot_env = np.repeat(np.arange(n_env), n_events)
+    anchor_weight = slot_counts / LEGAL.sum(axis=1)[slot_env]
+    anchor_features = _linear_features(slot_env, np.tile(np.arange(n_events), n_env), mean_metrics, n_events)
+    anchored = (pair_counts < max(min_count, 1)) & LEGAL[slot_env] & (slot_counts > 0)[:, None]
+
+    # Gram matrices do not depend on the targets: accumulate them once
+    gram = np.zeros((n_actions, n_features, n_features))
+    anchor_moments = np.zeros((n_actions, n_features))
+    for action in range(n_actions):
+        for start in range(bounds[action], bounds[action + 1], BLOCK):
+            stop = min(start + BLOCK, bounds[action + 1])
+            features = _linear_features(data["env"][start:stop], data["event"][start:stop],
+                                        data["metrics"][start:stop], n_events)
+            gram[action] += features.T @ features
+        rows, weight = anchor_features[anchored[:, action]], anchor_weight[anchored[:, action]]
+        gram[action] += (rows * weight[:, None]).T @ rows
+        anchor_moments[action] = rows.T @ (weight * floor)
+    solvers = [np.linalg.inv(gram[action] + ridge * np.eye(n_features)) for action in range(n_actions)]
+
+    # Illegal and untrained next actions never supply the max
+    mask = np.where(LEGAL & trained, 0.0, -np.inf)
+    live = data["next_env"] >= 0
+    next_env = np.maximum(data["next_env"], 0)
+    weights = np.zeros((n_features, n_actions))
+    iterations, delta = 0, 0.0
+    while iterations < max_iterations:
+        targets = np.empty(len(data["reward"]))
+        env_weights, event_weights = weights[:n_env], weights[n_env:n_env + n_events]
+        metric_weights, bias = weights[n_env + n_events:-1], weights[-1]
+        for start in range(0, len(targets), BLOCK):
+            stop = start + BLOCK
+            # features(s') . W without building the features: gathers plus a (block, 3) x (3, actions) product
+            q_next = (env_weights[next_env[start:stop]] + event_weights[data["next_event"][start:stop]]
+                      + data["next_metrics"][start:stop] @ metric_weights + bias + mask[next_env[start:stop]])
+            best = q_next.max(axis=1)
+            best[~live[start:stop] | ~np.isfinite(best)] = 0.0
+            targets[start:stop] = data["reward"][start:stop] + gamma * best
+
+        new_weights = np.zeros_like(weights)
+        for action in np.flatnonzero(trained):
+            # features.T @ targets without building the features
+            rows = slice(bounds[action], bounds[action + 1])
+            y = targets[rows]
+            moment = anchor_moments[action] + np.concatenate([
+                np.bincount(data["env"][rows], weights=y, minlength=n_env),
+                np.bincount(data["event"][rows], weights=y, minlength=n_events),
+                y @ data["metrics"][rows], [y.sum()]])
+            new_weights[:, action] = solvers[action] @ moment
+        delta = float(np.abs(new_weights - weights).max(initial=0.0))
+        weights = new_weights
+        iterations += 1
+        if gamma == 0.0 or delta <= tol:
+            break
+
+    weights[:, ~trained] = 0.0
+    weights[-1, ~trained] = floor
+    return weights, {"transitions": len(data["reward"]), "iterations": iterations, "delta": delta,
+                     "actions_trained": [ACTIONS[action] for action in np.flatnonzero(trained)]}
+
+def train(paths: Sequence[str], output_path: str, kind: str = "q_table", gamma: float = 0.9,
+          min_count: int = 1, jobs: int = 0, chunk_size: int = 8 << 20, version: Optional[str] = None,
+          max_iterations: Optional[int] = None) -> Dict[str, Any]:
+    """Train a frozen policy from transition logs, save it to output_path and return a summary"""
+    if not 0.0 <= gamma < 1.0:
+        raise ValueError("gamma must be in [0, 1)")
+    if kind not in ("q_table", "linear"):
+        raise ValueError(f"Unknown policy kind {kind!r} (expected q_table or linear)")
+    vocabulary = _Vocabulary()
+    skipped: Counter = Counter()
+
+    def chunks() -> Iterator[Dict[str, np.ndarray]]:
+        for names, arrays, chunk_skipped in read_transitions(paths, jobs, chunk_size):
+            skipped.update(chunk_skipped)
+            yield vocabulary.remap(arrays, names, skipped)
+
+    limits = {} if max_iterations is None else {"max_iterations": max_iterations}
+    trainer = train_q_table if kind == "q_table" else train_linear
+    weights, stats = trainer(chunks(), vocabulary, gamma, min_count, **limits)
+
+    if not np.isfinite(weights).all():
+        raise ValueError(f"Training produced non-finite weights (delta {stats.get('delta')}); nothing was saved")
+    stats.update(gamma=gamma, min_count=min_count, skipped=dict(sorted(skipped.items())))
+    save_frozen_policy(output_path, weights, kind, list(vocabulary.ids), version, extra={"training": stats})
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a frozen policy from JSONL transition logs")
+    parser.add_argument("inputs", nargs="+", help="JSONL files, one transition per line")
+    parser.add_argument("--out", required=True, help="weights file to write (.npy, with a .json sidecar)")
+    parser.add_argument("--kind", choices=["q_table", "linear"], default="q_table")
+    parser.add_argument("--gamma", type=float, default=0.9, help="discount factor in [0, 1)")
+    parser.add_argument("--min-count", type=int, default=1,
+                        help="transitions needed before an action may be chosen")
+    parser.add_argument("--max-iterations", type=int, help="cap on Q iterations")
+    parser.add_argument("--version", help="policy version (default: weights hash)")
+    parser.add_argument("--jobs", type=int, default=0, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=8 << 20, help="bytes per work unit")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = train(args.inputs, args.out, args.kind, args.gamma, args.min_count, args.jobs,
+                    args.chunk_size, args.version, args.max_iterations)
+    json.dump(summary, sys.stdout, indent=2)
+    print(f"\nWrote {args.out} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
@@ -0,0 +1,254 @@
+"""
+Unix Domain Socket Listener for RL Decision Brain
+Length-prefixed binary protocol for callers on the same host
+
+Run: python uds_server.py /run/rl-brain.sock
+     (RL_BRAIN_POLICY / RL_BRAIN_RULES / RL_BRAIN_VALIDATION apply as in app.py, see bootstrap.py)
+
+Every frame is a little-endian uint16 body length followed by the body.
+
+Request body (17 bytes + event type):
+    uint32  request id (echoed back)
+    uint8   environment id   (ENVIRONMENTS order: dev=0, stage=1, prod=2)
+    float32 cpu_percent, memory_percent, error_rate   (NaN = not reported)
+    bytes   event type, ASCII, rest of the body (at most MAX_EVENT_TYPE bytes)
+
+Response body (15 bytes):
+    uint32  request id
+    uint8   action id        (ACTIONS order: noop=0, scale_up=1, scale_down=2, restart=3)
+    uint8   proposed action id when downgraded by the safety filter, else NO_ACTION
+    uint8   flags            (FLAG_SAFETY_FILTERED, FLAG_INVALID)
+    float64 timestamp
+
+Requests are validated against the /decide schema once and decided with
+RLDecisionBrain.resolve_valid(), as for /decide; the reason text and policy
+version are not sent. A request failing the schema (e.g. cpu_percent above
+100) gets a NOOP flagged FLAG_INVALID. Requests may be pipelined: responses
+come back in request order, written once per socket read. A frame with an
+invalid length closes the connection. An existing socket file at the path
+is replaced at startup; any other file there is an error.
+"""
+
+import math
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from rl_decision_brain import Action, Environment, RLDecisionBrain
+
+LENGTH = struct.Struct("<H")
+REQUEST = struct.Struct("<IBfff")
+RESPONSE = struct.Struct("<IBBBd")
+
+ENVIRONMENTS = [environment.value for environment in Environment]
+ACTIONS = [action.value for action in Action]
+ACTION_IDS = {action: action_id for action_id, action in enumerate(ACTIONS)}
+METRIC_NAMES = ("cpu_percent", "memory_percent", "error_rate")
+
+NO_ACTION = 0xFF
+FLAG_SAFETY_FILTERED = 1
+FLAG_INVALID = 2
+
+MAX_EVENT_TYPE = 255
+RECV_SIZE = 65536
+
+def encode_request(request_id: int, environment: str, event_type: str,
+                   metrics: Optional[Mapping[str, Any]] = None) -> bytes:
+    """One request frame; raises ValueError for an unknown environment or oversized event type"""
+    if environment not in ENVIRONMENTS:
+        raise ValueError(f"Unknown environment: {environment}")
+    event = event_type.encode("ascii")
+    if len(event) > MAX_EVENT_TYPE:
+        raise ValueError(f"Event type longer than {MAX_EVENT_TYPE} bytes")
+    metrics = metrics or {}
+    values = []
+    for name in METRIC_NAMES:
+        value = metrics.get(name)
+        values.append(float(value) if isinstance(value, (int, float)) and not isinstance(value, bool)
+                      else math.nan)
+    return LENGTH.pack(REQUEST.size + len(event)) + REQUEST.pack(
+        request_id, ENVIRONMENTS.index(environment), *values) + event
+
+def decode_response(body: bytes) -> Dict[str, Any]:
+    """Response body as a dict"""
+    request_id, action_id, proposed_id, flags, timestamp = RESPONSE.unpack(body)
+    response = {
+        "request_id": request_id,
+        "action": ACTIONS[action_id],
+        "safety_filtered": bool(flags & FLAG_SAFETY_FILTERED),
+        "valid": not flags & FLAG_INVALID,
+        "timestamp": timestamp,
+    }
+    if proposed_id != NO_ACTION:
+        response["proposed_action"] = ACTIONS[proposed_id]
+    return response
+
+class _Handler(socketserver.BaseRequestHandler):
+    """One connection: parse every complete frame per read, answer them in one write"""
+
+    def handle(self):
+        server: DecisionSocketServer = self.server
+        sock = self.request
+        pending = b""
+        while True:
+            chunk = sock.recv(RECV_SIZE)
+            if not chunk:
+                return
+            pending = pending + chunk if pending else chunk
+            out = bytearray()
+            offset, end = 0, len(pending)
+            while end - offset >= LENGTH.size:
+                size, = LENGTH.unpack_from(pending, offset)
+                if size < REQUEST.size or size > REQUEST.size + MAX_EVENT_TYPE:
+                    return
+                if end - offset - LENGTH.size < size:
+                    break
+                start = offset + LENGTH.size
+                out += server.answer(pending, start, size)
+                offset = start + size
+            pending = pending[offset:]
+            if out:
+                sock.sendall(out)
+
+class DecisionSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket listener answering binary decision frames with an RLDecisionBrain"""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, agent: RLDecisionBrain,
+                 on_decision: Optional[Callable[[str, Dict[str, Any], float], None]] = None):
+        """
+        on_decision(event_type, response, timestamp) is called for every answered
+        request, e.g. to feed metrics or an audit log
+        """
+        self.agent = agent
+        self.on_decision = on_decision
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{path} exists and is not a socket; refusing to replace it")
+            os.unlink(path)   # stale socket from a previous run
+        super().__init__(path, _Handler)
+
+    def answer(self, buffer: bytes, start: int, size: int) -> bytes:
+        """Response frame for the request body at buffer[start:start + size]"""
+        request_id, env_id, cpu, memory, error_rate = REQUEST.unpack_from(buffer, start)
+        timestamp = time.time()
+        try:
+            event_type = buffer[start + REQUEST.size:start + size].decode("ascii")
+        except UnicodeDecodeError:
+            event_type = None
+        if env_id >= len(ENVIRONMENTS) or event_type is None:
+            return LENGTH.pack(RESPONSE.size) + RESPONSE.pack(request_id, 0, NO_ACTION, FLAG_INVALID, timestamp)
+
+        # NaN marks a metric that was not reported
+        metrics = {name: value for name, value in zip(METRIC_NAMES, (cpu, memory, error_rate)) if value == value}
+        request = {"environment": ENVIRONMENTS[env_id], "event_type": event_type, "metrics": metrics}
+        if self.agent._validate_request(request):
+            return LENGTH.pack(RESPONSE.size) + RESPONSE.pack(request_id, 0, NO_ACTION, FLAG_INVALID, timestamp)
+        response, _ = self.agent.resolve_valid(request)
+        if self.on_decision is not None:
+            self.on_decision(event_type, response, timestamp)
+        proposed = response.get("proposed_action")
+        return LENGTH.pack(RESPONSE.size) + RESPONSE.pack(
+            request_id, ACTION_IDS[response["action"]],
+            NO_ACTION if proposed is None else ACTION_IDS[proposed],
+            FLAG_SAFETY_FILTERED if response["safety_filtered"] else 0, timestamp)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+class DecisionSocketClient:
+    """Blocking client for DecisionSocketServer; not thread-safe, use one per thread"""
+
+    def __init__(self, path: str, timeout: Optional[float] = 10.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self._next_id = 0
+        self._pending = b""
+
+    def decide(self, environment: str, event_type: str,
+               metrics: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        """One request, one round trip"""
+        return self.decide_many([(environment, event_type, metrics)])[0]
+
+    def decide_many(self, requests: Iterable[Tuple[str, str, Optional[Mapping[str, Any]]]],
+                    depth: int = 256) -> List[Dict[str, Any]]:
+        """
+        Pipeline (environment, event_type, metrics) requests, keeping at most
+        depth of them in flight; results are returned in input order
+        """
+        requests = list(requests)
+        results: List[Dict[str, Any]] = []
+        for first in range(0, len(requests), depth):
+            frames = []
+            ids = []
+            for environment, event_type, metrics in requests[first:first + depth]:
+                request_id = self._next_id
+                self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+                ids.append(request_id)
+                frames.append(encode_request(request_id, environment, event_type, metrics))
+            self.sock.sendall(b"".join(frames))
+            for request_id in ids:
+                response = decode_response(self._read_frame())
+                if response["request_id"] != request_id:
+                    raise IOError(f"Out-of-order response {response['request_id']}, expected {request_id}")
+                results.append(response)
+        return results
+
+    def _read_frame(self) -> bytes:
+        while True:
+            if len(self._pending) >= LENGTH.size:
+                size, = LENGTH.unpack_from(self._pending)
+                end = LENGTH.size + size
+                if len(self._pending) >= end:
+                    body, self._pending = self._pending[LENGTH.size:end], self._pending[end:]
+                    return body
+            chunk = self.sock.recv(RECV_SIZE)
+            if not chunk:
+                raise IOError("Connection closed by server")
+            self._pending += chunk
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self) -> "DecisionSocketClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def serve_in_thread(path: str, agent: RLDecisionBrain, **kwargs) -> DecisionSocketServer:
+    """Start a listener on a daemon thread; stop it with server.shutdown() and server.server_close()"""
+    server = DecisionSocketServer(path, agent, **kwargs)
+    threading.Thread(target=server.serve_forever, name="rl-brain-uds", daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    import logging
+    logging.basicConfig(level=logging.INFO)
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('RL_BRAIN_UDS_PATH', '/tmp/rl-brain.sock')
+    from bootstrap import create_agent
+    agent, _ = create_agent()
+
+    with DecisionSocketServer(path, agent) as server:
+        logging.getLogger(__name__).info("Listening on %s", path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass